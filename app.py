@@ -6,6 +6,9 @@ from pages.TalkToDBPage import TalkToDBPage
 from pages.RoughBookPage import RoughBookPage
 from pages.TeachAndLearnPage import TeachAndLearnPage
 from pages.LiveTranscribePage import LiveTranscribePage
+from modules.db_registry import warm_up
+from modules.ingest_queue import get_ingest_queue
+from modules.batch_export import get_export_queue
 import queue
 
 
@@ -35,16 +38,10 @@ def initialize_session_state():
         st.session_state['rough_notes'] = None   
     if "fp_chat_history" not in st.session_state:
         st.session_state['fp_chat_history'] = []
-    if 'transcription_text' not in st.session_state:
-        st.session_state['transcription_text'] = ""
     if 'is_recording' not in st.session_state:
         st.session_state['is_recording'] = False
-    if 'audio_queue' not in st.session_state:
-        st.session_state['audio_queue'] = queue.Queue()
     if 'audio_status_queue' not in st.session_state:
         st.session_state['audio_status_queue'] = queue.Queue()
-    if 'whisper_model' not in st.session_state:
-        st.session_state['whisper_model'] = None
     if 'current_summary' not in st.session_state:
         st.session_state['current_summary'] = ""
     if 'last_processed_time' not in st.session_state:
@@ -53,6 +50,13 @@ def initialize_session_state():
 # Initialize all session state variables
 initialize_session_state()
 
+# Open the shared ChromaDB handles in the background (once per process)
+warm_up()
+
+# Start the background ingestion and export workers (once per process); they resume jobs left from a previous run
+get_ingest_queue().start_worker()
+get_export_queue().start_worker()
+
 # Setup sidebar
 setup_sidebar()
 
@@ -0,0 +1,83 @@
+"""
+Fixture audio shared by the live transcription benchmarks.
+"""
+import glob
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+CLIPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "asr")
+
+
+def read_wav(path, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "rb") as wf:
+        width, channels, rate = wf.getsampwidth(), wf.getnchannels(), wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    if width == 2:
+        audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768
+    elif width == 4:
+        audio = np.frombuffer(frames, dtype=np.int32).astype(np.float32) / 2**31
+    else:
+        audio = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate:
+        positions = np.arange(int(len(audio) * sample_rate / rate)) * rate / sample_rate
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def write_wav(path, audio, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def _phrase(rng, seconds, sample_rate):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(0.3, 1.0) * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    # ~4 syllables per second, with short unvoiced (noise-like) consonants in between
+    syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3.5, 5.0) * t), 0, None) ** 0.5
+    consonants = rng.normal(0, 0.3, len(t)) * (syllables < 0.2)
+    return 0.1 * (voiced * syllables + consonants)
+
+
+def synthetic_lecture(seconds=60.0, speech_ratio=0.6, noise=0.002, seed=0, sample_rate=SAMPLE_RATE, spans=False):
+    """Deterministic speech-like audio where about speech_ratio of the time is voiced.
+
+    With spans=True also returns the (start, end) seconds of every phrase.
+    """
+    rng = np.random.default_rng(seed)
+    parts, total, phrases = [], 0, []
+    target = int(seconds * sample_rate)
+    while total < target:
+        phrase = _phrase(rng, rng.uniform(1.5, 6.0), sample_rate)
+        # Mostly short pauses between phrases, sometimes long dead air (board writing, questions)
+        pause_seconds = rng.exponential(len(phrase) / sample_rate * (1 - speech_ratio) / speech_ratio)
+        pause = np.zeros(int(pause_seconds * sample_rate), dtype=np.float32)
+        phrases.append((total / sample_rate, (total + len(phrase)) / sample_rate))
+        parts += [phrase, pause]
+        total += len(phrase) + len(pause)
+    audio = np.concatenate(parts)[:target]
+    audio = (audio + rng.normal(0, noise, len(audio))).astype(np.float32)
+    return (audio, [(a, min(b, seconds)) for a, b in phrases if a < seconds]) if spans else audio
+
+
+def load_fixture(path=None, seconds=60.0, seed=0):
+    return read_wav(path) if path else synthetic_lecture(seconds, seed=seed)
+
+
+def fixture_clips(directory=CLIPS_DIR):
+    """(name, audio, reference text) of each WAV clip in directory with a transcript beside it."""
+    clips = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        reference = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(reference):
+            with open(reference, encoding="utf-8") as f:
+                clips.append((os.path.basename(path), read_wav(path), f.read().strip()))
+    return clips
@@ -0,0 +1,82 @@
+"""
+Real-time factor and word error rate of each speech recognition engine.
+
+Usage:
+    python benchmarks/bench_asr_engines.py --model base
+    python benchmarks/bench_asr_engines.py --variants whisper:fp32 faster-whisper:int8:/models/ct2-base --clips clips/
+"""
+import argparse
+import gc
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from audio_fixtures import CLIPS_DIR, SAMPLE_RATE, fixture_clips, synthetic_lecture  # noqa: E402
+from modules.asr_models import load_model  # noqa: E402
+from modules.live_transcriber import transcribe_audio  # noqa: E402
+
+
+def normalized_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions) and the reference length."""
+    ref, hyp = normalized_words(reference), normalized_words(hypothesis)
+    row = np.arange(len(hyp) + 1)
+    for i, word in enumerate(ref, 1):
+        previous, row = row, np.empty_like(row)
+        row[0] = i
+        for j, other in enumerate(hyp, 1):
+            row[j] = min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + (word != other))
+    return int(row[-1]), len(ref)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base", help="model size used by variants that do not name one")
+    parser.add_argument("--variants", nargs="+", default=["whisper:fp32", "whisper:int8", "faster-whisper:int8"])
+    parser.add_argument("--clips", default=CLIPS_DIR, help="directory of clip.wav + clip.txt pairs")
+    parser.add_argument("--seconds", type=float, default=60, help="length of the synthetic lecture without clips")
+    args = parser.parse_args()
+
+    clips = fixture_clips(args.clips)
+    if not clips:
+        print(f"no clips with transcripts in {args.clips}: timing a synthetic lecture, no WER")
+        clips = [("synthetic", synthetic_lecture(args.seconds), None)]
+    seconds = sum(len(audio) for _, audio, _ in clips) / SAMPLE_RATE
+    print(f"{len(clips)} clips, {seconds:.0f}s of audio")
+    print(f"{'engine':<16} {'precision':<10} {'model':<16} {'load s':>7} {'RTF':>6} {'WER':>7}")
+    for variant in args.variants:
+        engine, precision, *model = variant.split(":", 2)
+        size = model[0] if model else args.model
+        try:
+            start = time.perf_counter()
+            asr = load_model(size, "cpu", precision, engine)
+            load_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"{engine:<16} {precision:<10} {os.path.basename(size):<16} failed to load: {e}")
+            continue
+        transcribe_audio(asr, clips[0][1][:SAMPLE_RATE])  # warm-up
+        elapsed, errors, words = 0.0, 0, 0
+        for _, audio, reference in clips:
+            start = time.perf_counter()
+            text = transcribe_audio(asr, audio)
+            elapsed += time.perf_counter() - start
+            if reference is not None:
+                clip_errors, clip_words = word_errors(reference, text)
+                errors, words = errors + clip_errors, words + clip_words
+        wer = f"{errors / words:.1%}" if words else "n/a"
+        print(f"{engine:<16} {precision:<10} {os.path.basename(size):<16} {load_seconds:>7.1f} "
+              f"{elapsed / seconds:>6.2f} {wer:>7}")
+        del asr
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
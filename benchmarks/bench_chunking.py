@@ -0,0 +1,136 @@
+"""
+Structured token chunker versus the character based RecursiveCharacterTextSplitter.
+
+Usage:
+    python benchmarks/bench_chunking.py --documents 200 --queries 200
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+TOPICS = ["Neural networks", "Inflation", "Solar energy", "Protein folding", "Roman empire",
+          "Battery chemistry", "Product design", "Quantum computing", "Climate policy", "Startups"]
+ASPECTS = ["Overview", "Key ideas", "Numbers and facts", "Open questions"]
+FILLER = (
+    "the lecture explains how this works in practice and why it matters for students researchers and "
+    "engineers who want to apply the idea to real problems with limited data time and budget while keeping "
+    "results reliable reproducible and easy to explain to others"
+).split()
+
+
+def synthetic_summary(doc, rng):
+    """Returns (markdown text, [(fact query, fact sentence)])."""
+    topic = TOPICS[doc % len(TOPICS)]
+    lines, facts = [f"# {topic} lecture {doc}"], []
+    for aspect in ASPECTS:
+        lines.append(f"## {aspect}")
+        for paragraph in range(2):
+            sentences = [" ".join(rng.choice(FILLER, size=14)).capitalize() + "." for _ in range(4)]
+            if paragraph == 1:
+                value = int(rng.integers(1000, 9999))
+                if doc % 2:
+                    # Like most summary sentences, this one only makes sense under its headers
+                    fact = f"The figure quoted in this part is {value}."
+                else:
+                    fact = f"The {aspect.lower()} of {topic.lower()} lecture {doc} mention the figure {value}."
+                sentences.insert(int(rng.integers(0, 4)), fact)
+                facts.append((f"Which figure do the {aspect.lower()} of {topic.lower()} lecture {doc} mention?", fact))
+            lines.append(" ".join(sentences))
+            lines.append("")
+    return "\n".join(lines), facts
+
+
+def run_chunker(label, settings, pages, facts, args, db_utils, hybrid_search, count_tokens):
+    collection = db_utils.connect_db(f"bench_{label}", settings)
+    splitter = db_utils.get_text_splitter(collection)
+
+    start = time.perf_counter()
+    chunks = splitter.split_documents(pages)
+    split_seconds = time.perf_counter() - start
+
+    documents = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+    ids = [f"{label}{i}" for i in range(len(chunks))]
+    start = time.perf_counter()
+    for batch in range(0, len(documents), 1000):
+        db_utils.ingest_chunks(collection, documents[batch:batch + 1000], metadatas[batch:batch + 1000],
+                               ids[batch:batch + 1000])
+    ingest_seconds = time.perf_counter() - start
+
+    hits, reciprocal_ranks = 0, []
+    for query, fact in facts:
+        found = hybrid_search(collection, query, n_results=args.k, name=collection.name)["documents"][0]
+        rank = next((i for i, document in enumerate(found) if fact in document), None)
+        hits += rank is not None
+        reciprocal_ranks.append(0.0 if rank is None else 1.0 / (rank + 1))
+
+    tokens = [count_tokens(d) for d in documents]
+    return {
+        "chunks": len(documents),
+        "tokens_embedded": sum(tokens),
+        "mean_tokens": sum(tokens) / len(tokens),
+        "split_ms": split_seconds * 1000,
+        "ingest_s": ingest_seconds,
+        "recall": hits / len(facts),
+        "mrr": sum(reciprocal_ranks) / len(reciprocal_ranks),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--model", default="hashing-384")
+    parser.add_argument("--chunk-tokens", type=int, help="structured chunk size (default: chunking.CHUNK_TOKENS)")
+    parser.add_argument("--overlap-tokens", type=int, help="structured overlap (default: chunking.CHUNK_OVERLAP_TOKENS)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chunking-bench-")
+    os.chdir(workdir)
+    os.environ["EMBEDDING_MODEL"] = args.model
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    from langchain_core.documents import Document
+    from modules import db_utils
+    from modules.chunking import count_tokens
+    from modules.retrieval import hybrid_search
+
+    rng = np.random.default_rng(0)
+    pages, facts = [], []
+    for doc in range(args.documents):
+        text, doc_facts = synthetic_summary(doc, rng)
+        pages.append(Document(page_content=text, metadata={"source": f"data/summary_{doc}.pdf", "page": 0}))
+        facts.extend(doc_facts)
+    facts = [facts[i] for i in rng.choice(len(facts), size=min(args.queries, len(facts)), replace=False)]
+
+    chunkers = {
+        "recursive": db_utils.collection_settings(args.model, chunker="recursive"),
+        "structured": db_utils.collection_settings(args.model, args.chunk_tokens, args.overlap_tokens, chunker="structured"),
+    }
+    print(f"{args.documents} summaries, {len(facts)} fact queries, model {args.model}")
+    print(f"{'chunker':<11} {'settings':<14} {'chunks':>7} {'tokens':>8} {'tok/chunk':>9} "
+          f"{'split ms':>9} {'ingest s':>9} {'recall@' + str(args.k):>9} {'MRR':>6}")
+    try:
+        for label, settings in chunkers.items():
+            result = run_chunker(label, settings, pages, facts, args, db_utils, hybrid_search, count_tokens)
+            sizes = f"{settings['chunk_size']}/{settings['chunk_overlap']}"
+            print(f"{label:<11} {sizes:<14} {result['chunks']:>7} {result['tokens_embedded']:>8} "
+                  f"{result['mean_tokens']:>9.1f} {result['split_ms']:>9.1f} {result['ingest_s']:>9.2f} "
+                  f"{result['recall']:>9.3f} {result['mrr']:>6.3f}")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Query latency with a fresh ChromaDB client per call versus the shared registry client.
+
+Usage:
+    python benchmarks/bench_db_client.py --docs 2000 --queries 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules import db_registry  # noqa: E402
+
+DIM = 384
+
+
+def populate(path, name, n_docs, rng):
+    collection = chromadb.PersistentClient(path=path).get_or_create_collection(name=name)
+    batch = 500
+    for start in range(0, n_docs, batch):
+        stop = min(start + batch, n_docs)
+        collection.upsert(
+            ids=[f"ID{i}" for i in range(start, stop)],
+            documents=[f"synthetic chunk {i}" for i in range(start, stop)],
+            embeddings=rng.random((stop - start, DIM), dtype=np.float32).tolist(),
+        )
+
+
+def time_queries(get_collection, queries):
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        get_collection().query(query_embeddings=[q], n_results=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<20} mean {statistics.mean(timings):8.2f} ms   p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    name = "bench_summaries"
+    with tempfile.TemporaryDirectory() as path:
+        populate(path, name, args.docs, rng)
+        queries = rng.random((args.queries, DIM), dtype=np.float32).tolist()
+
+        per_call = time_queries(
+            lambda: chromadb.PersistentClient(path=path).get_or_create_collection(name=name), queries
+        )
+        shared = time_queries(lambda: db_registry.get_collection(name, path), queries)
+
+        print(f"{args.docs} chunks, {args.queries} queries")
+        report("per-call client", per_call)
+        report("shared registry", shared)
+        print(db_registry.db_stats(name, path))
+
+
+if __name__ == "__main__":
+    main()
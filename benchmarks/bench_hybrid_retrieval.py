@@ -0,0 +1,90 @@
+"""
+Recall@k and latency of vector-only and BM25-only retrieval versus hybrid BM25 + vector retrieval.
+
+Usage:
+    python benchmarks/bench_hybrid_retrieval.py --docs 5000 --queries 200 --k 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_corpus(n_docs, n_queries, rng):
+    topics = [[f"topic{t}word{w}" for w in range(300)] for t in range(20)]
+    documents, queries = [], []
+    doc_words = []
+    for i in range(n_docs):
+        topic = topics[i % len(topics)]
+        words = list(rng.choice(topic, size=45))
+        doc_words.append(words)
+        words = words[:]
+        words.insert(int(rng.integers(0, len(words))), f"XR{i:05d}")
+        documents.append(" ".join(words))
+    for doc_index in rng.choice(n_docs, size=n_queries, replace=False):
+        # A loose paraphrase: a few of the chunk's own words plus the identifier
+        words = list(rng.choice(doc_words[doc_index], size=3))
+        queries.append((f"what did the video say about XR{doc_index:05d} " + " ".join(words), f"ID{doc_index}"))
+    return documents, queries
+
+
+def evaluate(search, queries, k):
+    hits, timings = 0, []
+    for query, expected in queries:
+        start = time.perf_counter()
+        ids = search(query)[:k]
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += expected in ids
+    timings.sort()
+    return hits / len(queries), statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--model", default="hashing-384")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["EMBEDDING_MODEL"] = args.model
+        os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embedding_cache.sqlite3")
+        from modules import db_registry, retrieval
+        from modules.embeddings import embed_texts
+
+        rng = np.random.default_rng(0)
+        documents, queries = make_corpus(args.docs, args.queries, rng)
+        ids = [f"ID{i}" for i in range(len(documents))]
+        name, path = "bench_summaries", os.path.join(workdir, "chroma_db")
+
+        collection = db_registry.get_collection(name, path)
+        index = retrieval.get_lexical_index(collection, name, path)
+        embeddings, _ = embed_texts(documents)
+        for start in range(0, len(documents), 1000):
+            stop = start + 1000
+            collection.upsert(ids=ids[start:stop], documents=documents[start:stop], embeddings=embeddings[start:stop])
+        index.add(ids, documents)
+        index.save()
+
+        # Warm the query embedding cache so both paths pay the same embedding cost
+        embed_texts([q for q, _ in queries])
+
+        vector = evaluate(lambda q: retrieval.vector_search(collection, q, args.k), queries, args.k)
+        lexical = evaluate(lambda q: [doc_id for doc_id, _ in index.search(q, args.k)], queries, args.k)
+        hybrid = evaluate(lambda q: retrieval.hybrid_search(collection, q, args.k, name, path)["ids"][0], queries, args.k)
+
+        print(f"{args.docs} chunks, {args.queries} queries, model {args.model}")
+        print(f"{'path':<12} recall@{args.k:<4} p50 ms    p95 ms")
+        for label, (recall, p50, p95) in (("vector", vector), ("bm25", lexical), ("hybrid", hybrid)):
+            print(f"{label:<12} {recall:<10.3f} {p50:<9.2f} {p95:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cost of answering a chat question during a live session: the whole transcript versus TranscriptIndex.
+
+Usage:
+    python benchmarks/bench_live_chat.py --minutes 10 30 60 120 --embedding-model hashing-384
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from modules.live_transcriber import SegmentBuffer  # noqa: E402
+from modules.transcript_index import RECENT_SECONDS, TranscriptIndex  # noqa: E402
+
+VOCABULARY = ("gradient descent loss function model training data feature vector matrix layer network weight "
+              "bias error update step learning rate batch epoch validation test accuracy").split()
+TOPICS = ("eigenvalue", "bayesian", "convolution", "dropout", "attention", "kernel", "entropy", "markov",
+          "regularization", "momentum", "softmax", "bootstrap")
+
+
+def lecture(minutes, wpm, needles, rng, segment_seconds=4.0):
+    """Segments of a synthetic lecture and the (question, segment) pairs planted in it."""
+    segments, seconds = [], 0.0
+    while seconds < minutes * 60:
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(int(wpm * segment_seconds / 60)))
+        segments.append({"start": seconds, "end": seconds + segment_seconds, "text": text})
+        seconds += segment_seconds
+    # Planted before the verbatim recent window, so only retrieval can find them
+    earlier = [i for i, s in enumerate(segments) if s['end'] < seconds - RECENT_SECONDS]
+    planted = []
+    for n, i in enumerate(rng.sample(earlier, min(needles, len(earlier)))):
+        topic = TOPICS[n % len(TOPICS)]
+        segments[i]['text'] = f"the {topic} example number {n} shows why the {topic} trick matters here"
+        planted.append((f"what did you say about the {topic} example number {n}?", segments[i]['text']))
+    return segments, planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--wpm", type=int, default=140, help="words spoken per minute")
+    parser.add_argument("--needles", type=int, default=12)
+    parser.add_argument("--embedding-model", default="hashing-384", help="'' for BM25 only")
+    args = parser.parse_args()
+
+    print(f"{'minutes':>7} {'full words':>10} {'index words':>11} {'context p50':>11} {'p95':>8} "
+          f"{'indexing':>9} {'recall':>7}")
+    for minutes in args.minutes:
+        segments, planted = lecture(minutes, args.wpm, args.needles, random.Random(0))
+        buffer = SegmentBuffer()
+        index = TranscriptIndex(buffer, embedding_model=args.embedding_model)
+        indexing = 0.0
+        # Segments arrive a few at a time and the page indexes them on its next poll
+        for i in range(0, len(segments), 5):
+            buffer.extend(segments[i:i + 5])
+            start = time.perf_counter()
+            index.update()
+            indexing += time.perf_counter() - start
+        full_words = sum(len(s['text'].split()) for s in segments)
+
+        timings, words, found = [], [], 0
+        for question, needle in planted:
+            start = time.perf_counter()
+            context = index.context(question)
+            timings.append(time.perf_counter() - start)
+            words.append(len(context.split()))
+            found += needle in context
+        timings = np.asarray(timings) * 1e3
+        print(f"{minutes:>7.0f} {full_words:>10} {int(np.mean(words)):>11} {np.percentile(timings, 50):>9.2f}ms "
+              f"{np.percentile(timings, 95):>6.2f}ms {indexing:>8.2f}s {found:>3}/{len(planted)}")
+        if index.error:
+            print(f"  {index.error}")
+
+
+if __name__ == "__main__":
+    main()
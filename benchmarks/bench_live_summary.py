@@ -0,0 +1,70 @@
+"""
+Cost of summarizing a live session: one full-transcript prompt versus LiveSummarizer.
+
+Usage:
+    python benchmarks/bench_live_summary.py --minutes 120 --interval 5
+"""
+import argparse
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from modules.live_summarizer import SEGMENT_PROMPT, LiveSummarizer  # noqa: E402
+from modules.live_transcriber import SegmentBuffer  # noqa: E402
+
+VOCABULARY = ("gradient descent loss function model training data feature vector matrix layer network weight "
+              "bias error update step learning rate batch epoch validation test accuracy").split()
+
+
+class StandInModel:
+    """Records the size of every prompt and answers with a fixed-length summary."""
+
+    def __init__(self, summary_words):
+        self.summary = " ".join(["summary"] * summary_words)
+        self.prompt_words = []
+
+    def __call__(self, prompt):
+        self.prompt_words.append(len(prompt.split()))
+        return self.summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=120)
+    parser.add_argument("--wpm", type=int, default=140, help="words spoken per minute")
+    parser.add_argument("--interval", type=float, default=5, help="minutes between checkpoints")
+    parser.add_argument("--summary-words", type=int, default=150)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    segments, model = SegmentBuffer(), StandInModel(args.summary_words)
+    summarizer = LiveSummarizer(segments, topic="Machine Learning", generate=model)
+    seconds, segment_seconds, transcript = 0.0, 4.0, []
+    while seconds < args.minutes * 60:
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(int(args.wpm * segment_seconds / 60)))
+        segments.extend([{"start": seconds, "end": seconds + segment_seconds, "text": text}])
+        transcript.append(text)
+        seconds += segment_seconds
+        if seconds % (args.interval * 60) < segment_seconds:
+            summarizer.checkpoint()
+    # The last minutes are usually not checkpointed yet when the user clicks
+    segments.extend([{"start": seconds, "end": seconds + 90, "text": " ".join(["tail"] * int(args.wpm * 1.5))}])
+    transcript.append(" ".join(["tail"] * int(args.wpm * 1.5)))
+
+    background = list(model.prompt_words)
+    full_prompt = len(SEGMENT_PROMPT.format(topic="Machine Learning", transcript=" ".join(transcript)).split())
+    summarizer.final_summary()
+    final_prompt = model.prompt_words[-1]
+    print(f"{args.minutes:.0f} min lecture, {sum(len(t.split()) for t in transcript)} words, "
+          f"{len(summarizer.segment_summaries)} checkpoints")
+    print(f"final summary, full transcript prompt: {full_prompt:>8} words, 1 call")
+    print(f"final summary, LiveSummarizer:         {final_prompt:>8} words, 1 call "
+          f"(merging {len(summarizer.pieces)} pieces and the unsummarized tail)")
+    print(f"background: {len(background)} calls, {sum(background)} prompt words in total, "
+          f"largest {max(background)} words")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-chunk live transcription latency: WAV file round trip versus in-memory.
+
+Usage:
+    python benchmarks/bench_live_transcription.py --model base --chunk-seconds 5 --chunks 10
+    python benchmarks/bench_live_transcription.py --audio lecture.wav
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import whisper
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from audio_fixtures import SAMPLE_RATE, load_fixture, write_wav  # noqa: E402
+from modules.live_transcriber import transcribe_audio  # noqa: E402
+
+
+def wav_round_trip(model, chunk, path):
+    write_wav(path, chunk)
+    try:
+        result = model.transcribe(path, fp16=False, temperature=0, no_speech_threshold=0.4)
+        return result["text"].strip()
+    finally:
+        os.remove(path)
+
+
+def file_only(chunk, path):
+    write_wav(path, chunk)
+    whisper.load_audio(path)
+    os.remove(path)
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<22} p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--audio", help="16 kHz mono WAV to use instead of the synthetic fixture")
+    parser.add_argument("--chunk-seconds", type=float, default=5.0)
+    parser.add_argument("--chunks", type=int, default=10)
+    args = parser.parse_args()
+
+    audio = load_fixture(args.audio, seconds=args.chunk_seconds * args.chunks)
+    step = int(args.chunk_seconds * SAMPLE_RATE)
+    chunks = [audio[i:i + step] for i in range(0, len(audio) - step + 1, step)][:args.chunks]
+    model = whisper.load_model(args.model, device="cpu")
+    print(f"model {args.model}, {len(chunks)} chunks of {args.chunk_seconds:.1f}s")
+
+    workdir = tempfile.mkdtemp(prefix="live-bench-")
+    path = os.path.join(workdir, "live_chunk.wav")
+    try:
+        transcribe_audio(model, chunks[0])  # warm-up
+        results = {"in-memory": [], "wav round trip": [], "wav + ffmpeg only": []}
+        has_ffmpeg = shutil.which("ffmpeg") is not None
+        for chunk in chunks:
+            start = time.perf_counter()
+            transcribe_audio(model, chunk)
+            results["in-memory"].append((time.perf_counter() - start) * 1000)
+            if has_ffmpeg:
+                start = time.perf_counter()
+                wav_round_trip(model, chunk, path)
+                results["wav round trip"].append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                file_only(chunk, path)
+                results["wav + ffmpeg only"].append((time.perf_counter() - start) * 1000)
+        if not has_ffmpeg:
+            print("ffmpeg not found: skipping the WAV round trip")
+        for label, timings in results.items():
+            if timings:
+                report(label, timings)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
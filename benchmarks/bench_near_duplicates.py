@@ -0,0 +1,81 @@
+"""
+MinHash-LSH near-duplicate lookups as the second brain grows.
+
+Usage:
+    python benchmarks/bench_near_duplicates.py --sizes 1000,10000,50000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.near_duplicates import DUPLICATE_THRESHOLD, DuplicateIndex, minhash  # noqa: E402
+
+VOCABULARY = [f"w{i}" for i in range(5000)]
+EDIT_RATES = (0.0, 0.01, 0.03, 0.1, 0.3)
+
+
+def random_document(rng, words=300):
+    return rng.choice(VOCABULARY, size=words)
+
+
+def edited(words, rate, rng):
+    words = words.copy()
+    positions = rng.choice(len(words), size=int(len(words) * rate), replace=False)
+    words[positions] = rng.choice(VOCABULARY, size=len(positions))
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma separated index sizes in documents")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"threshold {DUPLICATE_THRESHOLD}, flagged share per edit rate: " + ", ".join(f"{r:.0%}" for r in EDIT_RATES))
+    with tempfile.TemporaryDirectory() as workdir:
+        index = DuplicateIndex(os.path.join(workdir, "bench.minhash.sqlite3"))
+        stored, signatures = [], []
+        for size in (int(s) for s in args.sizes.split(",")):
+            start, before = time.perf_counter(), len(stored)
+            while len(stored) < size:
+                words = random_document(rng)
+                signature = minhash(" ".join(words))
+                index.add(f"D{len(stored)}", signature, f"doc {len(stored)}")
+                stored.append(words)
+                signatures.append(signature)
+            added = time.perf_counter() - start
+            matrix = np.stack(signatures)
+
+            lsh_ms, scan_ms, flagged = [], [], {rate: 0 for rate in EDIT_RATES}
+            false_positives = 0
+            for _ in range(args.queries):
+                target = int(rng.integers(len(stored)))
+                for rate in EDIT_RATES:
+                    signature = minhash(" ".join(edited(stored[target], rate, rng)))
+                    t = time.perf_counter()
+                    match = index.find(signature)
+                    lsh_ms.append((time.perf_counter() - t) * 1000)
+                    flagged[rate] += match is not None and match[0] == f"D{target}"
+                t = time.perf_counter()
+                np.flatnonzero(np.mean(matrix == signature, axis=1) >= DUPLICATE_THRESHOLD)
+                scan_ms.append((time.perf_counter() - t) * 1000)
+                false_positives += index.find(minhash(" ".join(random_document(rng)))) is not None
+
+            print(
+                f"{size:>7} docs | minhash {added / max(1, size - before) * 1000:5.2f} ms/doc (incl. insert) | "
+                f"lookup p50 {statistics.median(lsh_ms):6.3f} ms, brute-force scan {statistics.median(scan_ms):7.3f} ms | "
+                "flagged " + " ".join(f"{flagged[r] / args.queries:.2f}" for r in EDIT_RATES) +
+                f" | false positives {false_positives / args.queries:.3f}"
+            )
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Audio capture hand-off: per-block queue of copies versus the SPSC ring buffer.
+
+Usage:
+    python benchmarks/bench_ring_buffer.py --seconds 300 --block 512 --stall-seconds 60
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from audio_fixtures import SAMPLE_RATE  # noqa: E402
+from modules.ring_buffer import AudioRingBuffer  # noqa: E402
+
+
+def produce(write, audio, block, timings=None):
+    for i in range(0, len(audio), block):
+        # sounddevice hands the callback a (frames, channels) array
+        indata = audio[i:i + block].reshape(-1, 1)
+        start = time.perf_counter()
+        write(indata)
+        if timings is not None:
+            timings.append(time.perf_counter() - start)
+
+
+def run_queue(audio, block):
+    audio_queue, timings, received = queue.Queue(), [], []
+
+    def put(indata):
+        audio_queue.put(indata.copy())
+
+    producer = threading.Thread(target=produce, args=(put, audio, block, timings))
+    start = time.perf_counter()
+    producer.start()
+    while producer.is_alive() or not audio_queue.empty():
+        blocks = []
+        while not audio_queue.empty():
+            blocks.append(audio_queue.get())
+        if blocks:
+            received.append(np.concatenate(blocks).reshape(-1))
+        else:
+            time.sleep(0.001)
+    return timings, time.perf_counter() - start, received
+
+
+def run_ring(audio, block, capacity, stall=0.0):
+    ring, timings, received = AudioRingBuffer(capacity), [], []
+    producer = threading.Thread(target=produce, args=(ring.write, audio, block, timings))
+    start = time.perf_counter()
+    producer.start()
+    time.sleep(stall)
+    while producer.is_alive() or len(ring):
+        view = ring.peek()
+        if len(view):
+            # What the worker keeps it copies (VAD/streaming buffers); the view itself is released at once
+            received.append(view.copy())
+            ring.release(len(view))
+        else:
+            time.sleep(0.001)
+    return timings, time.perf_counter() - start, received, ring
+
+
+def backlog_cost(write, audio, block):
+    """Peak traced memory (MB) and allocations per callback of writing audio while nothing is consumed."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    produce(write, audio, block)
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return peak / 1e6, allocations / (len(audio) // block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--block", type=int, default=512, help="samples per callback")
+    parser.add_argument("--capacity-seconds", type=float, default=60)
+    parser.add_argument("--stall-seconds", type=float, default=60, help="backlog while the consumer is stalled")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # A ramp, so a lost, repeated or reordered sample shows up
+    audio = (np.arange(int(args.seconds * SAMPLE_RATE)) % 2**24).astype(np.float32)
+    capacity = int(args.capacity_seconds * SAMPLE_RATE)
+
+    results = {"queue": [], "ring": []}
+    intact = True
+    for _ in range(args.repeats):
+        timings, elapsed, _ = run_queue(audio, args.block)
+        results["queue"].append((timings, elapsed))
+        # Sized for the whole run: the producer is thousands of times faster than real time, a callback is not
+        timings, elapsed, received, ring = run_ring(audio, args.block, len(audio))
+        results["ring"].append((timings, elapsed))
+        intact &= np.array_equal(np.concatenate(received), audio) and not ring.dropped
+    for label, runs in results.items():
+        p50 = np.median([np.percentile(t, 50) for t, _ in runs]) * 1e6
+        p99 = np.median([np.percentile(t, 99) for t, _ in runs]) * 1e6
+        speed = np.median([args.seconds / elapsed for _, elapsed in runs])
+        print(f"{label:<8} callback p50 {p50:6.2f} us  p99 {p99:6.2f} us  {speed:8.0f}x real time")
+    print(f"ring delivered every sample in order, none dropped, in all {args.repeats} runs: {intact}")
+
+    # Nothing is consumed while the backlog builds up, as while the model loads or a decode is slow
+    backlog = audio[:int(args.stall_seconds * SAMPLE_RATE)]
+    audio_queue = queue.Queue()
+    memory, allocations = backlog_cost(lambda indata: audio_queue.put(indata.copy()), backlog, args.block)
+    print(f"{args.stall_seconds:.0f}s backlog, queue: {memory:6.2f} MB held, "
+          f"{allocations:.1f} allocations per callback")
+    ring = AudioRingBuffer(capacity)
+    memory, allocations = backlog_cost(ring.write, backlog, args.block)
+    print(f"{args.stall_seconds:.0f}s backlog, ring:  {memory:6.2f} MB held (preallocated "
+          f"{ring.capacity * 4 / 1e6:.2f} MB), {allocations:.1f} allocations per callback")
+
+    # Stall the consumer for longer than it takes to fill the ring
+    _, _, received, ring = run_ring(audio[:10 * SAMPLE_RATE], args.block, SAMPLE_RATE, stall=0.5)
+    delivered = sum(len(part) for part in received)
+    print(f"stalled consumer, 1s ring: {ring.dropped / SAMPLE_RATE:.1f}s dropped in {ring.overflows} overflows, "
+          f"{delivered / SAMPLE_RATE:.1f}s delivered, accounted for: {delivered + ring.dropped == 10 * SAMPLE_RATE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Second-brain retrieval benchmark at increasing corpus sizes.
+
+Usage:
+    python benchmarks/bench_second_brain.py --sizes 500,5000,50000 --output report.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+FILLER = (
+    "lecture notes cover neural networks gradient descent attention transformers embeddings retrieval "
+    "vector databases chunking summaries quantum mechanics economics inflation markets history empire "
+    "biology cells proteins climate energy batteries solar startups product design marketing"
+).split()
+CODE_WORDS = ["amber", "basalt", "cobalt", "delta", "ember", "falcon", "garnet", "harbor", "indigo", "juniper"]
+
+
+def synthetic_chunks(size, seed=0):
+    """Yields (id, text, metadata, fact query) with one planted fact per chunk."""
+    rng = np.random.default_rng(seed)
+    for i in range(size):
+        filler = " ".join(rng.choice(FILLER, size=40))
+        code = f"{CODE_WORDS[i % len(CODE_WORDS)]}-{i:06d}"
+        text = f"{filler}. The code name of project {i} is {code}. {' '.join(rng.choice(FILLER, size=10))}"
+        metadata = {"source": f"synthetic/{i // 20}.pdf", "page": (i % 20), "source_type": "document",
+                    "created_at": 1700000000 + i, "created_date": "2023-11-14"}
+        yield f"S{i}", text, metadata, f"What is the code name of project {i}?"
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+
+
+def dir_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 1e6
+
+
+def run_size(size, args, db_utils, registry):
+    name = f"bench_{size}"
+    collection = db_utils.connect_db(name)
+    queries = []
+    batch = ([], [], [])
+    ingest_start = time.perf_counter()
+    for chunk_id, text, metadata, query in synthetic_chunks(size):
+        batch[0].append(text)
+        batch[1].append(metadata)
+        batch[2].append(chunk_id)
+        queries.append((query, chunk_id))
+        if len(batch[0]) >= args.ingest_batch:
+            db_utils.ingest_chunks(collection, *batch)
+            batch = ([], [], [])
+    if batch[0]:
+        db_utils.ingest_chunks(collection, *batch)
+    ingest_seconds = time.perf_counter() - ingest_start
+
+    rng = np.random.default_rng(1)
+    sample = [queries[i] for i in rng.choice(len(queries), size=min(args.queries, len(queries)), replace=False)]
+    registry.set_active_collection(name, registry.CHROMA_PATH)
+
+    search_ms, e2e_ms, hits = [], [], 0
+    for query, expected in sample:
+        start = time.perf_counter()
+        results = db_utils.search_db(query, n_results=args.k)
+        search_ms.append((time.perf_counter() - start) * 1000)
+        hits += expected in results["ids"][0]
+
+        start = time.perf_counter()
+        db_utils.talk_to_db(query)
+        e2e_ms.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "size": size,
+        "ingest_seconds": ingest_seconds,
+        "ingest_chunks_per_sec": size / ingest_seconds,
+        "search_ms": {"p50": percentile(search_ms, 0.5), "p95": percentile(search_ms, 0.95), "mean": statistics.mean(search_ms)},
+        "talk_to_db_ms": {"p50": percentile(e2e_ms, 0.5), "p95": percentile(e2e_ms, 0.95), "mean": statistics.mean(e2e_ms)},
+        f"recall_at_{args.k}": hits / len(sample),
+        "rss_mb": rss_mb(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+        "disk_mb": dir_mb(registry.CHROMA_PATH),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="500,5000,50000", help="comma separated corpus sizes in chunks")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--model", default="hashing-384")
+    parser.add_argument("--ingest-batch", type=int, default=1000, help="chunks per ingest_chunks call")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--keep", action="store_true", help="keep the generated database for inspection")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="second-brain-bench-")
+    # The modules use paths relative to the working directory (chroma_db, embedding cache)
+    os.chdir(workdir)
+    os.environ["EMBEDDING_MODEL"] = args.model
+    os.environ["ANSWER_CACHE_THRESHOLD"] = "2"  # never serve cached answers while measuring
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    from modules import db_registry, db_utils
+    import streamlit as st
+    db_utils.get_gemini_response = lambda prompt, *a, **kw: "stubbed answer"
+    st.session_state["db_conversation"] = []
+
+    runs = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        run = run_size(size, args, db_utils, db_registry)
+        st.session_state["db_conversation"] = []
+        runs.append(run)
+        print(
+            f"{size:>8} chunks | ingest {run['ingest_chunks_per_sec']:8.1f} chunks/s | "
+            f"search p50 {run['search_ms']['p50']:7.2f} ms p95 {run['search_ms']['p95']:7.2f} ms | "
+            f"talk_to_db p95 {run['talk_to_db_ms']['p95']:7.2f} ms | "
+            f"recall@{args.k} {run[f'recall_at_{args.k}']:.3f} | rss {run['rss_mb']:.0f} MB | disk {run['disk_mb']:.0f} MB"
+        )
+
+    report = {
+        "config": {"sizes": args.sizes, "queries": args.queries, "k": args.k, "model": args.model},
+        "environment": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "created_at": int(time.time()),
+        "runs": runs,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {output}")
+    os.chdir(REPO_ROOT)
+    if args.keep:
+        print(f"Working directory kept at {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Snapshot export/import throughput versus copying chroma_db and re-embedding.
+
+Usage:
+    python benchmarks/bench_snapshot.py --rows 50000 --batch-sizes 256,1000,5000
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def dir_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 1e6
+
+
+def report(label, rows, seconds, size_mb=None):
+    size = f"{size_mb:8.1f} MB" if size_mb is not None else " " * 11
+    print(f"{label:<28} {rows / seconds:>10.0f} rows/sec {seconds:>8.2f} s {size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--batch-sizes", default="256,1000,5000", help="upsert batch sizes to import with")
+    parser.add_argument("--model", default="hashing-384")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="snapshot-bench-")
+    os.chdir(workdir)
+    os.environ["EMBEDDING_MODEL"] = args.model
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    from modules import db_utils, snapshot
+    from modules.db_registry import CHROMA_PATH
+    quiet = lambda message: None  # noqa: E731
+
+    try:
+        rng = np.random.default_rng(0)
+        words = np.array("second brain notes lecture summary vector search chunk embedding topic".split())
+        documents = [" ".join(rng.choice(words, size=30)) + f" {i}" for i in range(args.rows)]
+        metadatas = [{"source_type": "note", "source": f"data/{i // 50}.pdf", "page": i % 50} for i in range(args.rows)]
+        ids = [f"C{i}" for i in range(args.rows)]
+
+        start = time.perf_counter()
+        source = db_utils.connect_db("bench_source")
+        for batch in range(0, args.rows, 5000):
+            db_utils.ingest_chunks(source, documents[batch:batch + 5000], metadatas[batch:batch + 5000],
+                                   ids[batch:batch + 5000], batch_size=5000)
+        print(f"{args.rows} rows, model {args.model}")
+        report("re-embed (ingest_chunks)", args.rows, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        shutil.copytree(CHROMA_PATH, "chroma_copy")
+        report("copy chroma_db directory", args.rows, time.perf_counter() - start, dir_mb("chroma_copy"))
+
+        for half in (False, True):
+            label = "float16" if half else "float32"
+            manifest = snapshot.export_collection("bench_source", f"snapshot_{label}", half=half, progress=quiet)
+            report(f"export ({label})", manifest["rows"], manifest["seconds"], dir_mb(f"snapshot_{label}"))
+
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            summary = snapshot.import_collection("snapshot_float32", f"bench_import_{batch_size}",
+                                                 batch_size=batch_size, progress=quiet)
+            report(f"import (batch {batch_size})", summary["rows"], summary["seconds"])
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
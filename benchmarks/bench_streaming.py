@@ -0,0 +1,137 @@
+"""
+Perceived live transcription latency: streaming (partial tail) versus whole segments.
+
+Usage:
+    python benchmarks/bench_streaming.py --model base --seconds 120
+    python benchmarks/bench_streaming.py --audio lecture.wav --step 0.5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import whisper
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from audio_fixtures import SAMPLE_RATE, load_fixture, synthetic_lecture  # noqa: E402
+from modules.live_transcriber import (CHUNK_SECONDS, StreamingTranscriber, transcribe_audio,  # noqa: E402
+                                      transcribe_segments)
+from modules.vad import VoiceActivitySegmenter  # noqa: E402
+
+BLOCK = SAMPLE_RATE // 10
+
+
+class TimedModel:
+    """Counts and times the Whisper calls of a model."""
+
+    def __init__(self, model):
+        self.model = model
+        self.timings = []
+
+    def transcribe(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.model.transcribe(*args, **kwargs)
+        finally:
+            self.timings.append(time.perf_counter() - start)
+
+
+def replay(audio, step):
+    """Runs step(blocks) as the worker would; returns (audio seconds captured, clock when done) per call."""
+    clock, position, calls = 0.0, 0, []
+    while position < len(audio):
+        # Everything captured while the last call ran is queued, and at least the next block
+        available = min(len(audio), max(position + BLOCK, int(clock * SAMPLE_RATE) // BLOCK * BLOCK))
+        clock = max(clock, available / SAMPLE_RATE)
+        start = time.perf_counter()
+        step([audio[i:i + BLOCK] for i in range(position, available, BLOCK)])
+        clock += time.perf_counter() - start
+        calls.append((available / SAMPLE_RATE, clock))
+        position = available
+    return calls
+
+
+def streaming(model, audio, step_seconds):
+    streamer = StreamingTranscriber(model, step_seconds)
+    decoded = []
+
+    def step(blocks):
+        before = len(model.timings)
+        for block in blocks:
+            streamer.feed(block)
+        if streamer.ready:
+            streamer.process()
+        decoded.append(len(model.timings) > before)
+
+    calls = replay(audio, step)
+    # A decode shows everything captured up to its window's end
+    return [(0.0, captured, done) for (captured, done), shown in zip(calls, decoded) if shown]
+
+
+def segments(model, audio):
+    segmenter = VoiceActivitySegmenter(SAMPLE_RATE, CHUNK_SECONDS)
+    closed = []
+
+    def step(blocks):
+        for block in blocks:
+            for segment in segmenter.feed(block):
+                transcribe_segments(model, segment['audio'], segment['start'])
+                closed.append((segment['start'], segment['end']))
+        closed.append(None)
+
+    calls = replay(audio, step)
+    updates, index = [], 0
+    for captured, done in calls:
+        while closed[index] is not None:
+            updates.append((*closed[index], done))
+            index += 1
+        index += 1
+    return updates
+
+
+def latencies(updates, phrases, resolution=0.1):
+    result = []
+    for start, end in phrases:
+        for spoken in np.arange(start, end, resolution):
+            shown = [done for first, last, done in updates if first <= spoken <= last]
+            if shown:
+                result.append(min(shown) - spoken)
+    return sorted(result)
+
+
+def report(label, timings, lags, seconds):
+    p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))] if lags else float("nan")
+    print(f"{label:<10} {len(timings):>8} {statistics.median(timings) * 1000:>9.0f} ms "
+          f"{sum(timings) / seconds:>6.2f} {statistics.median(lags) if lags else float('nan'):>8.2f}s {p95:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--audio", help="16 kHz mono WAV to use instead of the synthetic fixture")
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--step", type=float, default=1.0, help="streaming step, seconds of new speech per decode")
+    args = parser.parse_args()
+
+    if args.audio:
+        audio = load_fixture(args.audio)
+        # Without phrase labels, every 100 ms of the recording counts
+        phrases = [(0.0, len(audio) / SAMPLE_RATE)]
+    else:
+        audio, phrases = synthetic_lecture(args.seconds, spans=True)
+    seconds = len(audio) / SAMPLE_RATE
+    model = whisper.load_model(args.model, device="cpu")
+    transcribe_audio(model, audio[:SAMPLE_RATE])  # warm-up
+    print(f"model {args.model}, {seconds:.0f}s of audio, streaming step {args.step:.1f}s")
+    print(f"{'':<10} {'decodes':>8} {'per decode':>12} {'RTF':>6} {'p50 lag':>9} {'p95 lag':>9}")
+    for label, run in (("streaming", lambda m: streaming(m, audio, args.step)), ("segments", lambda m: segments(m, audio))):
+        timed = TimedModel(model)
+        updates = run(timed)
+        report(label, timed.timings, latencies(updates, phrases), seconds)
+
+
+if __name__ == "__main__":
+    main()
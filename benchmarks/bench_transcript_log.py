@@ -0,0 +1,100 @@
+"""
+Durability and memory of the live transcript: session-state string versus the segment log.
+
+Usage:
+    python benchmarks/bench_transcript_log.py --minutes 120 --sync-seconds 2
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from modules.live_transcriber import SegmentBuffer  # noqa: E402
+from modules.transcript_log import TranscriptLog  # noqa: E402
+
+VOCABULARY = ("gradient descent loss function model training data feature vector matrix layer network weight "
+              "bias error update step learning rate batch epoch validation test accuracy").split()
+
+
+def lecture(minutes, wpm, segment_seconds=3.0):
+    rng, segments, seconds = random.Random(0), [], 0.0
+    while seconds < minutes * 60:
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(int(wpm * segment_seconds / 60)))
+        segments.append({"start": seconds, "end": seconds + segment_seconds, "text": text,
+                         "confidence": round(rng.uniform(0.6, 0.99), 3)})
+        seconds += segment_seconds
+    return segments
+
+
+def append_timings(folder, segments, sync_seconds):
+    log = TranscriptLog("timing", folder, sync_seconds=sync_seconds)
+    timings = []
+    for segment in segments:
+        start = time.perf_counter()
+        log.append([segment])
+        timings.append(time.perf_counter() - start)
+    log.close()
+    os.remove(log.path)
+    return np.asarray(timings) * 1e3
+
+
+def peak_memory(feed):
+    tracemalloc.start()
+    feed()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=120)
+    parser.add_argument("--wpm", type=int, default=140, help="words spoken per minute")
+    parser.add_argument("--sync-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    segments = lecture(args.minutes, args.wpm)
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"{args.minutes:.0f} min lecture, {len(segments)} segments")
+        batched = f"fsync every {args.sync_seconds:g}s"
+        for label, sync_seconds in (("fsync every append", 0.0), (batched, args.sync_seconds)):
+            timings = append_timings(folder, segments, sync_seconds)
+            print(f"{label:<20} append p50 {np.percentile(timings, 50):6.3f} ms  "
+                  f"p99 {np.percentile(timings, 99):6.3f} ms  total {timings.sum() / 1e3:5.2f}s")
+
+        def grow_string():
+            text, kept = "", []
+            for segment in segments:
+                kept.append(dict(segment))
+                text += segment['text'] + " "
+
+        def fill_log():
+            buffer = SegmentBuffer(TranscriptLog("memory", folder))
+            for segment in segments:
+                buffer.extend([dict(segment)])
+            buffer.log.close()
+
+        print(f"memory, string + segment list: {peak_memory(grow_string):6.2f} MB")
+        print(f"memory, log-backed tail:       {peak_memory(fill_log):6.2f} MB")
+
+        # A crash in the middle of writing a line
+        path = os.path.join(folder, "memory.jsonl")
+        with open(path, "ab") as f:
+            f.write(b'{"start": 1.0, "end"')
+        start = time.perf_counter()
+        log = TranscriptLog("memory", folder)
+        elapsed = time.perf_counter() - start
+        print(f"reopen after a torn write: {elapsed * 1e3:.1f} ms, {len(log)} segments recovered, "
+              f"{os.path.getsize(path) / 1e6:.2f} MB on disk")
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
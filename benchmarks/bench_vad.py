@@ -0,0 +1,82 @@
+"""
+Voice activity segmentation versus fixed-length chunks on lecture-like audio.
+
+Usage:
+    python benchmarks/bench_vad.py --seconds 600 --speech-ratio 0.5
+    python benchmarks/bench_vad.py --seconds 120 --model base
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from audio_fixtures import SAMPLE_RATE, synthetic_lecture  # noqa: E402
+from modules.vad import VoiceActivitySegmenter  # noqa: E402
+
+BLOCK = SAMPLE_RATE // 10
+
+
+def covered(intervals, seconds, resolution=100):
+    mask = np.zeros(int(seconds * resolution) + 1, dtype=bool)
+    for start, end in intervals:
+        mask[int(start * resolution):int(end * resolution)] = True
+    return mask
+
+
+def inside_phrase(cut, phrases, margin=0.05):
+    return any(start + margin < cut < end - margin for start, end in phrases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--speech-ratio", type=float, default=0.5, help="share of the lecture that is speech")
+    parser.add_argument("--chunk-seconds", type=float, default=5.0, help="fixed chunk length to compare with")
+    parser.add_argument("--model", help="Whisper model to time both approaches with, e.g. base")
+    args = parser.parse_args()
+
+    audio, phrases = synthetic_lecture(args.seconds, args.speech_ratio, spans=True)
+    segmenter = VoiceActivitySegmenter()
+    start = time.perf_counter()
+    segments = []
+    for i in range(0, len(audio), BLOCK):
+        segments += segmenter.feed(audio[i:i + BLOCK])
+    segments += segmenter.flush()
+    elapsed = time.perf_counter() - start
+
+    step = int(args.chunk_seconds * SAMPLE_RATE)
+    chunks = [{"start": i / SAMPLE_RATE, "end": min(i + step, len(audio)) / SAMPLE_RATE, "audio": audio[i:i + step]}
+              for i in range(0, len(audio), step)]
+
+    speech = covered(phrases, args.seconds)
+    print(f"{args.seconds:.0f}s lecture, {speech.mean():.0%} speech in {len(phrases)} phrases; "
+          f"VAD runs at {args.seconds / elapsed:.0f}x real time")
+    print(f"{'':<14} {'calls':>6} {'audio s':>8} {'speech kept':>12} {'cuts mid-phrase':>16}")
+    for label, parts in ((f"fixed {args.chunk_seconds:.0f}s", chunks), ("vad", segments)):
+        kept = covered([(p["start"], p["end"]) for p in parts], args.seconds)
+        cuts = [p["end"] for p in parts[:-1]]
+        mid = sum(inside_phrase(cut, phrases) for cut in cuts)
+        seconds = sum(len(p["audio"]) for p in parts) / SAMPLE_RATE
+        print(f"{label:<14} {len(parts):>6} {seconds:>8.0f} {(kept & speech).sum() / speech.sum():>12.1%} "
+              f"{mid:>7}/{len(cuts):<8}")
+
+    if args.model:
+        import whisper
+        from modules.live_transcriber import transcribe_audio
+
+        model = whisper.load_model(args.model, device="cpu")
+        transcribe_audio(model, chunks[0]["audio"])  # warm-up
+        for label, parts in ((f"fixed {args.chunk_seconds:.0f}s", chunks), ("vad", segments)):
+            start = time.perf_counter()
+            for part in parts:
+                transcribe_audio(model, part["audio"])
+            seconds = time.perf_counter() - start
+            print(f"{label:<14} Whisper {args.model}: {seconds:.1f}s ({seconds / args.seconds:.2f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+ChromaDB versus the memory-mapped NumPy store (float16/int8, brute force/IVF).
+
+Usage:
+    python benchmarks/bench_vector_store.py --rows 100000 --dim 384 --queries 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules import vector_store  # noqa: E402
+
+
+def clustered_vectors(rows, dim, rng, clusters=200):
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fill(collection, vectors, batch=5000):
+    for start in range(0, len(vectors), batch):
+        stop = min(start + batch, len(vectors))
+        collection.upsert(ids=[f"ID{i}" for i in range(start, stop)], embeddings=vectors[start:stop],
+                          documents=[f"chunk {i}" for i in range(start, stop)],
+                          metadatas=[{"source_type": "video"} for _ in range(start, stop)])
+
+
+def measure(open_collection, queries, exact, k):
+    start = time.perf_counter()
+    collection = open_collection()
+    collection.query(query_embeddings=[queries[0]], n_results=k)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    timings, hits = [], 0
+    for query, truth in zip(queries, exact):
+        start = time.perf_counter()
+        ids = collection.query(query_embeddings=[query], n_results=k)["ids"][0]
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += len(truth & {int(i[2:]) for i in ids})
+    return cold_ms, statistics.median(timings), hits / (len(queries) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.rows, args.dim, rng)
+    queries = vectors[rng.choice(args.rows, size=args.queries, replace=False)] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    exact = [set(np.argsort(-(vectors @ q))[:args.k].tolist()) for q in queries]
+
+    print(f"{args.rows} rows x {args.dim} dims, {args.queries} queries")
+    print(f"{'backend':<22} {'open+first ms':>14} {'p50 ms':>8} {'recall@' + str(args.k):>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        chroma_path = os.path.join(workdir, "chroma")
+        fill(chromadb.PersistentClient(path=chroma_path).get_or_create_collection("bench"), vectors)
+        result = measure(lambda: chromadb.PersistentClient(path=chroma_path).get_collection("bench"), queries, exact, args.k)
+        print(f"{'chroma':<22} {result[0]:>14.1f} {result[1]:>8.2f} {result[2]:>10.3f}")
+
+        for dtype in ("float16", "int8"):
+            vector_store.VECTOR_DTYPE = dtype
+            path = os.path.join(workdir, dtype)
+            collection = vector_store.NumpyClient(path).get_or_create_collection("bench")
+            ivf_min_rows = vector_store.IVF_MIN_ROWS
+            vector_store.IVF_MIN_ROWS = args.rows + 1  # fill without IVF, build it explicitly below
+            fill(collection, vectors)
+            vector_store.IVF_MIN_ROWS = ivf_min_rows
+
+            result = measure(lambda: vector_store.NumpyClient(path).get_collection("bench"), queries, exact, args.k)
+            print(f"{'numpy ' + dtype + ' flat':<22} {result[0]:>14.1f} {result[1]:>8.2f} {result[2]:>10.3f}")
+
+            start = time.perf_counter()
+            collection.build_ivf()
+            build_s = time.perf_counter() - start
+            result = measure(lambda: vector_store.NumpyClient(path).get_collection("bench"), queries, exact, args.k)
+            print(f"{'numpy ' + dtype + ' ivf':<22} {result[0]:>14.1f} {result[1]:>8.2f} {result[2]:>10.3f}   (build {build_s:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
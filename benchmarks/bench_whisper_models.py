@@ -0,0 +1,77 @@
+"""
+Whisper load time, memory and real-time factor per model size and precision.
+
+Usage:
+    python benchmarks/bench_whisper_models.py --models tiny base --precisions fp32 int8
+    python benchmarks/bench_whisper_models.py --audio lecture.wav --seconds 120
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from audio_fixtures import SAMPLE_RATE, load_fixture  # noqa: E402
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def weights_mb(model):
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return len(buffer.getvalue()) / 1e6
+
+
+def measure(size, precision, audio_path, seconds, chunk_seconds):
+    from modules.asr_models import load_model
+    from modules.live_transcriber import transcribe_audio
+
+    audio = load_fixture(audio_path, seconds=seconds)[:int(seconds * SAMPLE_RATE)]
+    before = rss_mb()
+    start = time.perf_counter()
+    model = load_model(size, "cpu", precision, engine="whisper")
+    load_seconds = time.perf_counter() - start
+    memory = rss_mb() - before
+
+    step = int(chunk_seconds * SAMPLE_RATE)
+    transcribe_audio(model, audio[:step])  # warm-up
+    start = time.perf_counter()
+    for i in range(0, len(audio), step):
+        transcribe_audio(model, audio[i:i + step])
+    return load_seconds, memory, weights_mb(model), (time.perf_counter() - start) / (len(audio) / SAMPLE_RATE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "int8"], choices=["fp32", "int8"])
+    parser.add_argument("--audio", help="16 kHz mono WAV to use instead of the synthetic fixture")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--chunk-seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'model':<12} {'precision':<10} {'load s':>7} {'memory MB':>10} {'weights MB':>11} {'RTF':>6}")
+    for size in args.models:
+        for precision in args.precisions:
+            # A fresh process per variant, so memory is not shared with the previous one
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                load_seconds, memory, weights, rtf = pool.submit(
+                    measure, size, precision, args.audio, args.seconds, args.chunk_seconds).result()
+            print(f"{os.path.basename(size):<12} {precision:<10} {load_seconds:>7.1f} {memory:>10.0f} "
+                  f"{weights:>11.0f} {rtf:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,143 @@
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import chromadb
+"""
+Bulk (re-)indexing of the second-brain database.
+
+    python filldb.py ingest data --source-type document --tags lecture,rag
+    python filldb.py reindex youtube_summaries_v2 --chunker structured --chunk-size 200 --chunk-overlap 20
+    python filldb.py swap youtube_summaries_v2 --drop-old
+    python filldb.py export backups/2026-10-19
+    python filldb.py import backups/2026-10-19 --activate
+    python filldb.py archive semester.zip --format markdown --source-types video,note --since 2026-09-01
+    python filldb.py status
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from modules.batch_export import EXPORT_FORMATS, EXPORT_WORKERS, export_documents
+from modules.bulk_index import ingest_directory, reindex, swap
+from modules.db_registry import CHROMA_PATH, active_collection_name, db_stats, set_active_collection
+from modules.db_utils import collection_names
+from modules.ingest_queue import get_ingest_queue, write_lock
+from modules.snapshot import MANIFEST, export_collection, import_collection, read_manifest
+from modules.metadata_utils import SOURCE_TYPES, parse_tags
 
-# setting the environment
 DATA_PATH = r"data"
-CHROMA_PATH = r"chroma_db"
 
-chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
 
-collection = chroma_client.get_or_create_collection(name="youtube_summaries")
+def print_summary(summary):
+    print(
+        f"Done: {summary['items']} items, {summary['chunks']} chunks in {summary['seconds']:.1f}s "
+        f"({summary['items_per_sec']:.2f} items/sec, {summary['chunks_per_sec']:.1f} chunks/sec)"
+    )
+
+
+def run_command(args):
+    if args.command == "ingest":
+        print_summary(ingest_directory(
+            args.directory,
+            source_type=args.source_type,
+            tags=parse_tags(args.tags),
+            base_name=args.collection,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            restart=args.restart,
+        ))
+    elif args.command == "reindex":
+        for summary in reindex(args.target, args.embedding_model, args.chunk_size, args.chunk_overlap,
+                               args.restart, chunker=args.chunker):
+            print_summary(summary)
+        print(f"Run 'python filldb.py swap {args.target}' to make it active.")
+    elif args.command == "swap":
+        old = swap(args.target, args.drop_old)
+        print(f"Active collection: '{old}' -> '{args.target}'")
+    elif args.command == "export":
+        # One snapshot directory per collection (several when partitioned by source type)
+        for name in ([args.collection] if args.collection else collection_names()):
+            manifest = export_collection(name, os.path.join(args.output, name), args.page_size, args.half)
+            print(f"Exported '{name}': {manifest['rows']} rows in {manifest['seconds']:.1f}s "
+                  f"({manifest['rows_per_sec']:.0f} rows/sec)")
+    elif args.command == "import":
+        snapshots = [args.snapshot] if os.path.exists(os.path.join(args.snapshot, MANIFEST)) else sorted(
+            os.path.join(args.snapshot, d) for d in os.listdir(args.snapshot)
+            if os.path.exists(os.path.join(args.snapshot, d, MANIFEST)))
+        if not snapshots:
+            raise SystemExit(f"No snapshot found in '{args.snapshot}'")
+        for snapshot in snapshots:
+            summary = import_collection(snapshot, args.collection if len(snapshots) == 1 else None)
+            print(f"Imported '{summary['collection']}': {summary['rows']} rows in {summary['seconds']:.1f}s "
+                  f"({summary['rows_per_sec']:.0f} rows/sec)")
+        if args.activate:
+            base = read_manifest(snapshots[0])["collection"].split("__")[0]
+            set_active_collection(args.collection or base, CHROMA_PATH)
+            print(f"Active collection: '{args.collection or base}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="ingest every PDF under a directory")
+    ingest.add_argument("directory", nargs="?", default=DATA_PATH)
+    ingest.add_argument("--source-type", choices=SOURCE_TYPES, default="document")
+    ingest.add_argument("--tags", default="", help="comma separated tags")
+    ingest.add_argument("--collection", help="base collection name (defaults to the active one)")
+    ingest.add_argument("--workers", type=int, default=4, help="parallel PDF loaders")
+    ingest.add_argument("--batch-size", type=int, default=256, help="chunks per upsert")
+    ingest.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
 
-# loading the document
-loader = PyPDFDirectoryLoader(DATA_PATH)
-raw_documents = loader.load()
+    rebuild = commands.add_parser("reindex", help="re-index the active collection into a shadow collection")
+    rebuild.add_argument("target", help="base name of the shadow collection")
+    rebuild.add_argument("--embedding-model")
+    rebuild.add_argument("--chunker", choices=("structured", "recursive"))
+    rebuild.add_argument("--chunk-size", type=int, help="tokens (structured) or characters (recursive)")
+    rebuild.add_argument("--chunk-overlap", type=int)
+    rebuild.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
 
-# splitting the document
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=300,
-    chunk_overlap=100,
-    length_function=len,
-    is_separator_regex=False,
-)
+    switch = commands.add_parser("swap", help="atomically make another collection the active one")
+    switch.add_argument("target")
+    switch.add_argument("--drop-old", action="store_true", help="delete the previously active collection")
 
-chunks = text_splitter.split_documents(raw_documents)
+    export = commands.add_parser("export", help="write the active collection(s) to a checksummed snapshot")
+    export.add_argument("output", help="directory to create; holds one snapshot per collection")
+    export.add_argument("--collection", help="export only this collection")
+    export.add_argument("--page-size", type=int, default=5000, help="rows per snapshot file")
+    export.add_argument("--half", action="store_true", help="store embeddings as float16")
 
-# Get existing IDs to prevent overwriting
-existing_data = collection.get()
-existing_ids = set(existing_data["ids"]) if existing_data["ids"] else set()
+    load = commands.add_parser("import", help="load a snapshot without re-embedding")
+    load.add_argument("snapshot", help="snapshot directory, or a directory of snapshots written by export")
+    load.add_argument("--collection", help="import a single snapshot under another name")
+    load.add_argument("--activate", action="store_true", help="make the imported collection the active one")
 
-# preparing to be added in chromadb
-documents = []
-metadata = []
-ids = []
+    archive = commands.add_parser("archive", help="export stored documents as PDF volumes or Markdown in a zip")
+    archive.add_argument("output", help="zip file to write")
+    archive.add_argument("--format", choices=EXPORT_FORMATS, default="pdf")
+    archive.add_argument("--source-types", default="", help="comma separated source types (default: all)")
+    archive.add_argument("--since", type=datetime.fromisoformat, help="only documents created on or after YYYY-MM-DD")
+    archive.add_argument("--tags", default="", help="only documents with all of these comma separated tags")
+    archive.add_argument("--workers", type=int, default=EXPORT_WORKERS, help="parallel PDF renderers")
 
-# Start ID numbering after the last existing ID
-i = len(existing_ids)
+    commands.add_parser("status", help="show the active collection and its size")
 
-for chunk in chunks:
-    new_id = "ID" + str(i)
+    args = parser.parse_args()
 
-    # Avoid ID duplication
-    while new_id in existing_ids:
-        i += 1
-        new_id = "ID" + str(i)
+    if args.command == "status":
+        print(f"Active collection: {active_collection_name(CHROMA_PATH)}")
+        for name in collection_names():
+            print(json.dumps(db_stats(name, CHROMA_PATH), indent=2))
+        print(f"Ingestion queue: {get_ingest_queue().counts()}")
+        return
 
-    documents.append(chunk.page_content)
-    ids.append(new_id)
-    metadata.append(chunk.metadata)
+    if args.command == "archive":
+        # Read-only, so saves from the app are not held up
+        filters = {"source_types": parse_tags(args.source_types), "since": args.since, "tags": parse_tags(args.tags)}
+        summary = export_documents(args.output, args.format, filters, workers=args.workers)
+        print(f"Wrote {summary['documents']} documents ({summary['bytes'] / 1e6:.1f} MB) to {summary['path']} "
+              f"in {summary['seconds']:.1f}s ({summary['items_per_sec']:.1f} documents/sec)")
+        return
 
-    i += 1
+    with write_lock():
+        run_command(args)
 
-# adding to chromadb
-collection.upsert(
-    documents=documents,
-    metadatas=metadata,
-    ids=ids
-)
 
-print(collection)
-print(f"Added {len(documents)} new documents to ChromaDB.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "512"))
+
+
+class SemanticAnswerCache:
+    """LRU cache of answers to similar queries, invalidated by collection epochs."""
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, max_entries=ANSWER_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (unit vector, query, answer, scope, epochs)
+        self._next_key = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, embedding, scope, epochs):
+        """Returns (cached query, answer) for the closest match above the threshold, or None."""
+        vector = self._unit(embedding)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[3] == scope and entry[4] != epochs]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry[3] == scope]
+            if candidates:
+                matrix = np.stack([entry[0] for _, entry in candidates])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def store(self, embedding, query, answer, scope, epochs):
+        with self._lock:
+            self._entries[self._next_key] = (self._unit(embedding), query, answer, scope, epochs)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "threshold": self.threshold,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Returns the process-wide answer cache shared by all sessions."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+    return _cache
@@ -0,0 +1,151 @@
+"""Speech recognition models loaded once per process and shared by all sessions."""
+import os
+import threading
+import time
+from concurrent.futures import Future
+import torch
+import whisper
+
+ASR_ENGINE = os.environ.get("ASR_ENGINE", "whisper")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+WHISPER_DEVICE = os.environ.get("WHISPER_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+# Unset: fp16 on CUDA; on CPU int8 for faster-whisper and fp32 for whisper
+WHISPER_PRECISION = os.environ.get("WHISPER_PRECISION")
+PRECISIONS = ("fp32", "fp16", "int8")
+
+_lock = threading.Lock()
+_models = {}
+
+
+def _plain_linears(module):
+    # The quantizer only converts torch.nn.Linear itself, not Whisper's subclass
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            linear.weight, linear.bias = child.weight, child.bias
+            setattr(module, name, linear)
+        else:
+            _plain_linears(child)
+
+
+def quantize_int8(model):
+    """Quantizes the linear layers of a CPU Whisper model to int8."""
+    _plain_linears(model)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class WhisperEngine:
+    """openai-whisper; size is a model name such as "base" or a checkpoint path."""
+
+    def __init__(self, size, device="cpu", precision="fp32"):
+        self.precision = precision
+        self.model = whisper.load_model(size, device=device)
+        if precision == "int8":
+            quantize_int8(self.model)
+
+    def transcribe(self, audio, **options):
+        options["fp16"] = self.precision == "fp16"
+        return self.model.transcribe(audio, **options)
+
+
+class FasterWhisperEngine:
+    """faster-whisper (CTranslate2); size is a model name or the directory of a converted model."""
+
+    COMPUTE_TYPES = {"fp32": "float32", "fp16": "float16", "int8": "int8"}
+
+    def __init__(self, size, device="cpu", precision="int8"):
+        from faster_whisper import WhisperModel  # only needed with ASR_ENGINE=faster-whisper
+
+        self.model = WhisperModel(size, device=device, compute_type=self.COMPUTE_TYPES[precision])
+
+    def transcribe(self, audio, fp16=None, sample_len=None, logprob_threshold=-1.0, **options):
+        # whisper's transcribe() decodes greedily unless asked for beams; faster-whisper defaults to 5
+        options.setdefault("beam_size", 1)
+        if sample_len:
+            options["max_new_tokens"] = sample_len
+        segments, info = self.model.transcribe(audio, log_prob_threshold=logprob_threshold, **options)
+        result = {"text": "", "segments": [], "language": info.language}
+        for segment in segments:
+            words = [
+                {"start": float(w.start), "end": float(w.end), "word": w.word, "probability": float(w.probability)}
+                for w in segment.words or []
+            ]
+            result["segments"].append({"start": float(segment.start), "end": float(segment.end),
+                                       "text": segment.text, "avg_logprob": float(segment.avg_logprob),
+                                       "words": words})
+            result["text"] += segment.text
+        return result
+
+
+ASR_ENGINES = {"whisper": WhisperEngine, "faster-whisper": FasterWhisperEngine}
+
+
+def load_model(size, device="cpu", precision="fp32", engine=ASR_ENGINE):
+    """Loads an engine's model without caching it."""
+    return ASR_ENGINES[engine](size, device, precision)
+
+
+class SharedASRModel:
+    """A speech recognition model loading in the background; transcribe() runs one call at a time."""
+
+    def __init__(self, engine, size, device, precision):
+        self.engine, self.size, self.device, self.precision = engine, size, device, precision
+        self.load_seconds = None
+        self._future = Future()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._load, name=f"asr-load-{os.path.basename(size)}", daemon=True).start()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            model = load_model(self.size, self.device, self.precision, self.engine)
+        except Exception as e:
+            self._future.set_exception(e)
+            return
+        self.load_seconds = time.perf_counter() - start
+        self._future.set_result(model)
+
+    @property
+    def ready(self):
+        return self._future.done() and self._future.exception() is None
+
+    @property
+    def error(self):
+        return self._future.exception() if self._future.done() else None
+
+    def model(self, timeout=None):
+        """The loaded engine, waiting up to timeout seconds for it; raises the load error if it failed."""
+        return self._future.result(timeout)
+
+    def transcribe(self, audio, **options):
+        model = self.model()
+        # Whisper's decoder hooks its key/value cache into the model for each call, so calls must not overlap
+        with self._lock:
+            return model.transcribe(audio, **options)
+
+
+def model_key(engine=None, size=None, device=None, precision=None):
+    engine, size, device = engine or ASR_ENGINE, size or WHISPER_MODEL, device or WHISPER_DEVICE
+    if engine not in ASR_ENGINES:
+        raise ValueError(f"Unknown ASR engine '{engine}', expected one of {tuple(ASR_ENGINES)}")
+    if precision is None and device == WHISPER_DEVICE:
+        precision = WHISPER_PRECISION
+    if precision is None:
+        precision = "fp16" if device == "cuda" else ("int8" if engine == "faster-whisper" else "fp32")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown ASR precision '{precision}', expected one of {PRECISIONS}")
+    if precision == "int8" and device != "cpu":
+        raise ValueError("int8 speech recognition models run on CPU only")
+    if precision == "fp16" and device == "cpu":
+        raise ValueError("fp16 speech recognition models need a CUDA device")
+    return engine, size, device, precision
+
+
+def get_asr_model(engine=None, size=None, device=None, precision=None, reload=False):
+    """The process-wide model for a key, loading in the background."""
+    key = model_key(engine, size, device, precision)
+    with _lock:
+        model = _models.get(key)
+        if model is None or (reload and model.error is not None):
+            model = _models[key] = SharedASRModel(*key)
+    return model
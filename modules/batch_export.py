@@ -0,0 +1,212 @@
+"""Batch export of stored documents to one zip archive of PDF volumes or markdown files."""
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from multiprocessing import get_context
+import streamlit as st
+from .bulk_index import CHUNK_KEYS, PAGE_SIZE, Throughput, stitch_chunks
+from .db_utils import collection_names, connect_db
+from .ingest_queue import EXPORT_QUEUE_PATH, get_ingest_queue
+from .metadata_utils import build_where
+from .pdf_generator import EXPORT_DIR, document_pdf
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # PyPDF2 (requirements.txt) has the same writer API
+    from PyPDF2 import PdfWriter
+
+EXPORT_FORMATS = ("pdf", "markdown")
+DOCS_PER_VOLUME = int(os.environ.get("EXPORT_DOCS_PER_VOLUME", "50"))
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+BATCH_EXPORT_DIR = os.path.join(EXPORT_DIR, "batch")
+
+# Metadata that differs between the pages of one PDF
+PAGE_KEYS = ("page", "page_label", "total_pages")
+
+
+def _document_key(metadata):
+    if metadata.get("doc_id"):
+        return metadata["doc_id"]
+    return json.dumps({k: v for k, v in metadata.items() if k not in CHUNK_KEYS + PAGE_KEYS}, sort_keys=True)
+
+
+def document_groups(filters=None, base_name=None):
+    """(collection name, chunk IDs) of every stored document matching the filters, oldest first."""
+    filters = filters or {}
+    where = build_where(**filters)
+    groups = {}
+    for name in collection_names(filters.get("source_types"), base_name):
+        collection = connect_db(name)
+        offset = 0
+        while True:
+            page = collection.get(where=where, include=["metadatas"], limit=PAGE_SIZE, offset=offset)
+            if not page["ids"]:
+                break
+            for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+                group = groups.setdefault((name, _document_key(metadata)), {"created_at": 0, "ids": []})
+                group["created_at"] = metadata.get("created_at") or 0
+                group["ids"].append(chunk_id)
+            offset += len(page["ids"])
+    ordered = sorted(groups.items(), key=lambda item: item[1]["created_at"])
+    return [(name, group["ids"]) for (name, _), group in ordered]
+
+
+def load_document(collection, ids):
+    """Rebuilds one document from its chunks: title, a line of details and the text of each page."""
+    found = collection.get(ids=ids, include=["documents", "metadatas"])
+    pages = {}
+    for document, metadata in zip(found["documents"], found["metadatas"]):
+        pages.setdefault(metadata.get("page") or 0, []).append((document, metadata))
+    metadata = {k: v for k, v in found["metadatas"][0].items() if k not in CHUNK_KEYS + PAGE_KEYS}
+    title = metadata.get("title") or os.path.basename(metadata.get("source", "")) or "Untitled"
+    details = [metadata.get("source_type", "document").replace("_", " "), metadata.get("created_date")]
+    details += [f"tags: {metadata['tags']}" if metadata.get("tags") else None, metadata.get("url")]
+    return {
+        "key": _document_key(found["metadatas"][0]),
+        "title": title,
+        "details": " · ".join(d for d in details if d),
+        "metadata": metadata,
+        "pages": [stitch_chunks(pages[page]) for page in sorted(pages)],
+        "chunks": len(found["ids"]),
+    }
+
+
+def document_markdown(document):
+    header = f"# {document['title']}\n\n"
+    if document["details"]:
+        header += f"_{document['details']}_\n\n"
+    return header + "\n\n".join(document["pages"]) + "\n"
+
+
+def markdown_path(document):
+    metadata = document["metadata"]
+    slug = re.sub(r"[^\w]+", "-", document["title"].lower()).strip("-")[:60] or "untitled"
+    digest = hashlib.sha1(document["key"].encode("utf-8")).hexdigest()[:8]
+    return f"{metadata.get('source_type', 'document')}/{metadata.get('created_date', 'undated')}-{slug}-{digest}.md"
+
+
+def _rendered(pool, documents, window):
+    """(title, chunks, PDF bytes) of each document in order, with at most `window` renders in flight."""
+    if pool is None:
+        for document in documents:
+            yield document["title"], document["chunks"], document_pdf(document)
+        return
+    pending = deque()
+    for document in documents:
+        pending.append((document["title"], document["chunks"], pool.submit(document_pdf, document)))
+        if len(pending) >= window:
+            title, chunks, future = pending.popleft()
+            yield title, chunks, future.result()
+    while pending:
+        title, chunks, future = pending.popleft()
+        yield title, chunks, future.result()
+
+
+def _write_volume(archive, writer, number):
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    archive.writestr(f"volume-{number:03d}.pdf", buffer.getvalue())
+
+
+def export_documents(output_path, fmt="pdf", filters=None, base_name=None, workers=EXPORT_WORKERS,
+                     docs_per_volume=DOCS_PER_VOLUME, progress=print):
+    """Writes every document matching the filters to the zip archive output_path; returns a summary."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+    groups = document_groups(filters, base_name)
+    progress(f"Exporting {len(groups)} documents as {fmt}")
+    throughput = Throughput(len(groups), progress)
+    # Only one document's chunks are loaded at a time, as the archive asks for it
+    documents = (load_document(connect_db(name), ids) for name, ids in groups)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".partial"
+    volumes = 0
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        if fmt == "markdown":
+            for document in documents:
+                archive.writestr(markdown_path(document), document_markdown(document))
+                throughput.update(document["title"], document["chunks"])
+        else:
+            # spawn: forking from the app's threads can deadlock; one worker renders in-process
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) if workers > 1 else None
+            with pool or nullcontext():
+                writer, in_volume = PdfWriter(), 0
+                for title, chunks, data in _rendered(pool, documents, window=workers * 2):
+                    writer.append(io.BytesIO(data), outline_item=title)
+                    throughput.update(title, chunks)
+                    in_volume += 1
+                    if in_volume == docs_per_volume:
+                        volumes += 1
+                        _write_volume(archive, writer, volumes)
+                        writer, in_volume = PdfWriter(), 0
+                if in_volume:
+                    volumes += 1
+                    _write_volume(archive, writer, volumes)
+    os.replace(tmp_path, output_path)
+
+    summary = throughput.summary()
+    summary.update(path=output_path, format=fmt, documents=len(groups), volumes=volumes,
+                   bytes=os.path.getsize(output_path))
+    return summary
+
+
+def run_export_job(payload, progress):
+    """Runs a queued export; called by the export queue's worker thread."""
+    filters = dict(payload["filters"])
+    for key in ("since", "until"):
+        if filters.get(key):
+            filters[key] = datetime.fromtimestamp(filters[key])
+    return export_documents(payload["output"], payload["format"], filters, progress=progress)
+
+
+def get_export_queue():
+    return get_ingest_queue(EXPORT_QUEUE_PATH)
+
+
+def enqueue_export(fmt="pdf", filters=None, label=None):
+    """Queues an export of the documents matching the filters and returns the job ID right away."""
+    job_id = uuid.uuid4().hex[:12]
+    filters = dict(filters or {})
+    for key in ("since", "until"):
+        if filters.get(key):
+            filters[key] = int(filters[key].timestamp())
+    payload = {"format": fmt, "filters": filters, "output": os.path.join(BATCH_EXPORT_DIR, f"{job_id}.zip")}
+    return get_export_queue().enqueue("export", payload, label or f"{fmt} export", job_id)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.fragment(run_every=2)
+def write_export_jobs(limit=3):
+    # Progress of this session's exports and a download button for finished ones
+    jobs = get_export_queue().get_many(st.session_state.get('export_jobs', [])[-limit:])
+    for job in reversed(jobs):
+        if job['status'] == 'queued':
+            st.caption(f"⏳ {job['label']} · queued ({job['position']} ahead) · job {job['id']}")
+        elif job['status'] == 'running':
+            st.caption(f"⚙️ {job['label']} · {job['progress'] or 'starting'} · {time.time() - job['started_at']:.0f}s")
+        elif job['status'] == 'done' and os.path.exists(job['result']['path']):
+            result = job['result']
+            st.download_button(
+                f"📦 {job['label']}: {result['documents']} documents, {result['bytes'] / 1e6:.1f} MB",
+                data=lambda path=result['path']: _read(path),
+                file_name=f"second-brain-{result['format']}-{job['id']}.zip",
+                mime="application/zip",
+                on_click="ignore",
+                key=f"export_{job['id']}",
+            )
+        elif job['status'] == 'failed':
+            st.caption(f"❌ {job['label']} · failed: {job['error']} · job {job['id']}")
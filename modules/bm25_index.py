@@ -0,0 +1,152 @@
+import json
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "say", "said", "that", "the", "this", "to", "was",
+    "what", "when", "where", "which", "who", "why", "with",
+}
+COMPACT_AFTER = 5000
+
+
+def tokenize(text):
+    """Lowercased word tokens; numbers and acronyms are kept as-is."""
+    return [t for t in re.findall(r"\w+", text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 index persisted as a snapshot plus a change log."""
+
+    def __init__(self, path=None, k1=1.5, b=0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings = {}   # term -> {doc_id: term frequency}
+        self._doc_terms = {}  # doc_id -> Counter of terms
+        self._doc_len = {}
+        self._total_len = 0
+        self._pending = []
+        self._logged = 0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_terms
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id)
+        for term in terms:
+            docs = self._postings[term]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self._postings[term]
+
+    def _add(self, doc_id, text):
+        self._remove(doc_id)
+        terms = Counter(tokenize(text))
+        self._doc_terms[doc_id] = terms
+        self._doc_len[doc_id] = sum(terms.values())
+        self._total_len += self._doc_len[doc_id]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def add(self, ids, documents):
+        """Adds or replaces chunks; existing IDs are re-indexed."""
+        with self._lock:
+            for doc_id, text in zip(ids, documents):
+                self._add(doc_id, text)
+                self._pending.append(["add", doc_id, text])
+
+    def remove(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+                self._pending.append(["remove", doc_id])
+
+    def search(self, query, k=10, allowed_ids=None):
+        """Returns up to k (doc_id, score) pairs, best first."""
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs
+            scores = {}
+            for term in set(tokenize(query)):
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    if allowed_ids is not None and doc_id not in allowed_ids:
+                        continue
+                    doc_len = self._doc_len[doc_id]
+                    norm = tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    # --- persistence ---
+
+    def _log_path(self):
+        return self.path + ".log"
+
+    def save(self):
+        """Appends pending changes to the log, compacting into a snapshot when it grows large."""
+        if not self.path:
+            return
+        with self._lock:
+            log_path = self._log_path()
+            if self._pending:
+                with open(log_path, "a", encoding="utf-8") as f:
+                    for entry in self._pending:
+                        f.write(json.dumps(entry) + "\n")
+                self._logged += len(self._pending)
+                self._pending = []
+            if not os.path.exists(self.path) or self._logged > COMPACT_AFTER:
+                self.compact()
+
+    def compact(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((self._postings, self._doc_terms, self._doc_len, self._total_len), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self._log_path()):
+                os.remove(self._log_path())
+            self._pending = []
+            self._logged = 0
+
+    def load(self):
+        """Replaces the in-memory index with the snapshot plus the log on disk."""
+        with self._lock:
+            self._postings, self._doc_terms, self._doc_len, self._total_len = {}, {}, {}, 0
+            self._logged = 0
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    self._postings, self._doc_terms, self._doc_len, self._total_len = pickle.load(f)
+            try:
+                with open(self._log_path(), encoding="utf-8") as f:
+                    for line in f:
+                        # Another process may be appending to the log
+                        if not line.endswith("\n"):
+                            break
+                        entry = json.loads(line)
+                        self._logged += 1
+                        if entry[0] == "add":
+                            self._add(entry[1], entry[2])
+                        else:
+                            self._remove(entry[1])
+            except FileNotFoundError:
+                # No changes since the snapshot, or another process just compacted them into it
+                pass
+            self._pending = []
+        return self
@@ -0,0 +1,259 @@
+import glob
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from .db_registry import CHROMA_PATH, active_collection_name, set_active_collection, delete_collection, get_client
+from .db_utils import (UPSERT_BATCH_SIZE, collection_names, collection_settings, connect_db,
+                       get_text_splitter, ingest_chunks, check_duplicate, delete_document)
+from .context_builder import text_overlap
+from .embeddings import EMBEDDING_MODEL
+from .metadata_utils import build_metadata
+from .near_duplicates import (DUPLICATE_POLICY, document_id, get_duplicate_index, copy_duplicate_index,
+                              forget_duplicate_index)
+from .retrieval import forget_lexical_index
+
+CHECKPOINT_DIR = os.path.join(CHROMA_PATH, "checkpoints")
+PAGE_SIZE = 1000
+
+# Metadata that belongs to one chunk rather than to the document it came from
+CHUNK_KEYS = ("start_index", "header_path")
+
+
+class Checkpoint:
+    """Set of finished work items persisted after each item so a crashed run can resume."""
+
+    def __init__(self, path, restart=False):
+        self.path = path
+        self.done = {}
+        if restart and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = json.load(f)["done"]
+
+    def is_done(self, key):
+        return key in self.done
+
+    def mark_done(self, key, chunks):
+        self.done[key] = chunks
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"done": self.done}, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def finish(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def checkpoint_path(job, *parts):
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(CHECKPOINT_DIR, f"{job}-{digest}.json")
+
+
+def chunk_id(metadata, text):
+    """Deterministic chunk ID, so re-running a half-finished item overwrites instead of duplicating."""
+    key = json.dumps([metadata.get("source"), metadata.get("page"), metadata.get("start_index"),
+                      metadata.get("created_at"), text], ensure_ascii=False)
+    return "C" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+class Throughput:
+    def __init__(self, total, progress):
+        self.total = total
+        self.progress = progress
+        self.items = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+
+    def update(self, label, chunks):
+        self.items += 1
+        self.chunks += chunks
+        elapsed = time.perf_counter() - self.started
+        self.progress(
+            f"[{self.items}/{self.total}] {label}: {chunks} chunks "
+            f"({self.items / elapsed:.2f} items/sec, {self.chunks / elapsed:.1f} chunks/sec)"
+        )
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "items": self.items,
+            "chunks": self.chunks,
+            "seconds": elapsed,
+            "items_per_sec": self.items / elapsed if elapsed else 0.0,
+            "chunks_per_sec": self.chunks / elapsed if elapsed else 0.0,
+        }
+
+
+def _load_pdf(path):
+    return path, PyPDFLoader(path).load()
+
+
+def bounded_map(pool, fn, items, window):
+    """Like pool.map, but keeps at most `window` results in flight to bound memory."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def ingest_directory(directory, source_type="document", tags=None, base_name=None, workers=4,
+                     batch_size=UPSERT_BATCH_SIZE, restart=False, progress=print):
+    """Loads every PDF under directory in parallel and ingests it file by file."""
+    base_name = base_name or active_collection_name(CHROMA_PATH)
+    name = collection_names([source_type], base_name)[0]
+    collection = connect_db(name)
+    splitter = get_text_splitter(collection)
+
+    files = sorted(glob.glob(os.path.join(directory, "**", "*.pdf"), recursive=True))
+    checkpoint = Checkpoint(checkpoint_path("ingest", name, os.path.abspath(directory)), restart)
+    pending = [f for f in files if not checkpoint.is_done(f)]
+    if len(pending) < len(files):
+        progress(f"Resuming: {len(files) - len(pending)} of {len(files)} files already ingested")
+
+    throughput = Throughput(len(pending), progress)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, pages in bounded_map(pool, _load_pdf, pending, window=workers * 2):
+            # The file's mtime as creation date keeps chunk IDs stable when a crashed run is resumed
+            created = datetime.fromtimestamp(os.path.getmtime(path))
+            text = "\n".join(page.page_content for page in pages)
+            signature, match = check_duplicate(collection, text)
+            if match and DUPLICATE_POLICY == "skip":
+                progress(f"Skipping {os.path.basename(path)}: {match[2]:.0%} similar to '{match[1]}'")
+                checkpoint.mark_done(path, 0)
+                throughput.update(os.path.basename(path), 0)
+                continue
+            if match:
+                delete_document(collection, match[0])
+            doc_id = document_id(text)
+            metadata_base = build_metadata(source_type, tags=tags, title=os.path.basename(path), created=created)
+            metadata_base["doc_id"] = doc_id
+            chunks = splitter.split_documents(pages)
+            documents = [chunk.page_content for chunk in chunks]
+            metadatas = [{**chunk.metadata, **metadata_base} for chunk in chunks]
+            ids = [chunk_id(m, d) for m, d in zip(metadatas, documents)]
+            if documents:
+                ingest_chunks(collection, documents, metadatas, ids, batch_size)
+            get_duplicate_index(collection.name).add(doc_id, signature, os.path.basename(path))
+            checkpoint.mark_done(path, len(documents))
+            throughput.update(os.path.basename(path), len(documents))
+    checkpoint.finish()
+    return throughput.summary()
+
+
+def _group_key(metadata):
+    return json.dumps({k: v for k, v in (metadata or {}).items() if k not in CHUNK_KEYS}, sort_keys=True)
+
+
+def stitch_chunks(chunks):
+    """Rebuilds a page's text from its overlapping chunks."""
+    chunks = sorted(chunks, key=lambda c: (c[1].get("start_index") is None, c[1].get("start_index") or 0))
+    text = ""
+    for document, metadata in chunks:
+        start = metadata.get("start_index")
+        if start is not None:
+            if start >= len(text):
+                # The splitter dropped the whitespace between chunks; newlines keep offsets and line structure
+                text += "\n" * (start - len(text)) + document
+            else:
+                text += document[len(text) - start:]
+        else:
+            text += document[text_overlap(text, document):] if text else document
+    return text
+
+
+def _source_groups(collection):
+    """Maps each source document (metadata without chunk keys) to its chunk IDs."""
+    groups = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            break
+        for chunk_id_, metadata in zip(page["ids"], page["metadatas"]):
+            groups.setdefault(_group_key(metadata), []).append(chunk_id_)
+        offset += len(page["ids"])
+    return groups
+
+
+def reindex_collection(source, target, settings, batch_size=UPSERT_BATCH_SIZE, restart=False, progress=print):
+    """Re-chunks and re-embeds every document of source into the shadow collection target."""
+    source_collection = connect_db(source)
+    target_collection = connect_db(target, settings)
+    splitter = get_text_splitter(target_collection)
+    # doc_id metadata carries over, so the source's near-duplicate signatures stay valid
+    copy_duplicate_index(source, target, CHROMA_PATH)
+
+    groups = _source_groups(source_collection)
+    checkpoint = Checkpoint(checkpoint_path("reindex", source, target, json.dumps(settings, sort_keys=True)), restart)
+    pending = [key for key in groups if not checkpoint.is_done(key)]
+    if len(pending) < len(groups):
+        progress(f"Resuming: {len(groups) - len(pending)} of {len(groups)} documents already re-indexed")
+
+    throughput = Throughput(len(pending), progress)
+    for key in pending:
+        # Only one source document's chunks are held in memory at a time
+        found = source_collection.get(ids=groups[key], include=["documents", "metadatas"])
+        metadata = json.loads(key)
+        page = Document(page_content=stitch_chunks(list(zip(found["documents"], found["metadatas"]))), metadata=metadata)
+        chunks = splitter.split_documents([page])
+        documents = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        ids = [chunk_id(m, d) for m, d in zip(metadatas, documents)]
+        if documents:
+            ingest_chunks(target_collection, documents, metadatas, ids, batch_size)
+        checkpoint.mark_done(key, len(documents))
+        throughput.update(metadata.get("title") or os.path.basename(metadata.get("source", "?")), len(documents))
+    checkpoint.finish()
+    return throughput.summary()
+
+
+def reindex(target_base, embedding_model=None, chunk_size=None, chunk_overlap=None, restart=False, progress=print,
+            chunker=None):
+    """Re-indexes the active collection (and its partitions) into target_base without touching it."""
+    source_base = active_collection_name(CHROMA_PATH)
+    if target_base == source_base:
+        raise ValueError("The shadow collection must differ from the active collection")
+    current = connect_db(source_base).metadata or {}
+    current_chunker = current.get("chunker", "recursive")
+    if chunker and chunker != current_chunker:
+        # Sizes are measured differently per chunker, so the old ones do not carry over
+        current = {k: v for k, v in current.items() if k not in ("chunk_size", "chunk_overlap")}
+    settings = collection_settings(
+        embedding_model or current.get("embedding_model", EMBEDDING_MODEL),
+        chunk_size or current.get("chunk_size"),
+        chunk_overlap if chunk_overlap is not None else current.get("chunk_overlap"),
+        chunker or current_chunker,
+    )
+    summaries = []
+    for source, target in zip(collection_names(base_name=source_base), collection_names(base_name=target_base)):
+        progress(f"Re-indexing '{source}' into '{target}' with {settings}")
+        summaries.append(reindex_collection(source, target, settings, restart=restart, progress=progress))
+    return summaries
+
+
+def swap(target_base, drop_old=False):
+    """Atomically makes target_base the active collection, optionally dropping the old one."""
+    old_base = active_collection_name(CHROMA_PATH)
+    existing = {c.name if hasattr(c, "name") else c for c in get_client(CHROMA_PATH).list_collections()}
+    missing = [n for n in collection_names(base_name=target_base) if n not in existing]
+    if missing:
+        raise ValueError(f"Cannot swap to '{target_base}': missing collections {missing}")
+    set_active_collection(target_base, CHROMA_PATH)
+    if drop_old and old_base != target_base:
+        for name in collection_names(base_name=old_base):
+            if name in existing:
+                delete_collection(name, CHROMA_PATH)
+                forget_lexical_index(name, CHROMA_PATH)
+                forget_duplicate_index(name, CHROMA_PATH)
+    return old_base
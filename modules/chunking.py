@@ -0,0 +1,192 @@
+import os
+import re
+from langchain_core.documents import Document
+
+# Chunker used for new collections: "structured" (below) or "recursive" (character based)
+CHUNKER = os.environ.get("CHUNKER", "structured")
+CHUNK_TOKENS = 160
+CHUNK_OVERLAP_TOKENS = 16
+
+HEADER_PATH_SEPARATOR = " > "
+BOLD_HEADER_LEVEL = 7  # "**Title**" lines nest below every markdown header
+
+# Header lines; the length cap keeps flattened PDF text from turning into one huge header
+HEADER_RE = re.compile(r"^[ \t]*(?:(#{1,6})[ \t]+([^\n]{1,120}?)[ \t#]*|\*\*([^*\n]{1,120}?)\*\*:?)[ \t]*$", re.MULTILINE)
+PARAGRAPH_RE = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+WORD_RE = re.compile(r"\S+")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Words and punctuation marks, close to what word-piece tokenizers count for English text."""
+    return len(TOKEN_RE.findall(text))
+
+
+def indexed_text(document, metadata):
+    """Text a chunk is embedded and BM25-indexed as: its header path, then the chunk itself."""
+    # Continuation chunks lack their section's header line, so the path is what a query about the section matches
+    header_path = (metadata or {}).get("header_path")
+    return f"{header_path}\n{document}" if header_path else document
+
+
+def _trim(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split(text, start, end, pattern):
+    """Non-empty spans of text[start:end] between matches of pattern, whitespace trimmed."""
+    spans = []
+    position = start
+    for match in pattern.finditer(text, start, end):
+        spans.append(_trim(text, position, match.start()))
+        position = match.end()
+    spans.append(_trim(text, position, end))
+    return [(s, e) for s, e in spans if s < e]
+
+
+def _common_path(a, b):
+    common = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        common.append(x)
+    return common
+
+
+def sections(text, path=()):
+    """Splits text at markdown (and bold-line) headers into (start, end, header path) sections."""
+    stack = [(0, title) for title in path]
+    found = []
+    position = 0
+    for match in HEADER_RE.finditer(text):
+        found.append((position, match.start(), [title for _, title in stack]))
+        level = len(match.group(1)) if match.group(1) else BOLD_HEADER_LEVEL
+        title = (match.group(2) or match.group(3)).strip().strip("*").strip()
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        position = match.start()
+    found.append((position, len(text), [title for _, title in stack]))
+    return [s for s in found if text[s[0]:s[1]].strip()], [title for _, title in stack]
+
+
+class StructuredTextSplitter:
+    """Token-measured chunker that splits at headers, then paragraphs, then sentences."""
+
+    def __init__(self, chunk_size=CHUNK_TOKENS, chunk_overlap=CHUNK_OVERLAP_TOKENS, length_function=count_tokens):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length = length_function
+
+    def _word_windows(self, text, start, end):
+        window_start = window_end = None
+        tokens = 0
+        for match in WORD_RE.finditer(text, start, end):
+            word_tokens = self.length(match.group())
+            if window_start is not None and tokens + word_tokens > self.chunk_size:
+                yield window_start, window_end
+                window_start = None
+            if window_start is None:
+                window_start, tokens = match.start(), 0
+            window_end = match.end()
+            tokens += word_tokens
+        if window_start is not None:
+            yield window_start, window_end
+
+    def _units(self, text, start, end):
+        # Largest pieces that fit a chunk: paragraphs, else sentences, else runs of words
+        for p_start, p_end in _split(text, start, end, PARAGRAPH_RE):
+            if self.length(text[p_start:p_end]) <= self.chunk_size:
+                yield p_start, p_end
+                continue
+            for s_start, s_end in _split(text, p_start, p_end, SENTENCE_RE):
+                if self.length(text[s_start:s_end]) <= self.chunk_size:
+                    yield s_start, s_end
+                else:
+                    yield from self._word_windows(text, s_start, s_end)
+
+    def _overlap_start(self, text, start, end):
+        # Earliest sentence start in text[start:end] whose tail fits the overlap budget
+        if self.chunk_overlap <= 0:
+            return None
+        for s_start, _ in _split(text, start, end, SENTENCE_RE)[1:]:
+            if self.length(text[s_start:end]) <= self.chunk_overlap:
+                return s_start
+        return None
+
+    def split_spans(self, text, path=()):
+        """Returns ([(start, end, header path)], path at the end of the text)."""
+        found, end_path = sections(text, path)
+        chunks = []
+        current = None  # [start, end, path, tokens]
+        whole = False  # current holds only complete sections
+        for sec_start, sec_end, sec_path in found:
+            section_tokens = self.length(text[sec_start:sec_end])
+            # A bare parent header goes with its first subsection instead of standing alone
+            bare_parent = (current and current[3] <= self.chunk_overlap
+                           and _common_path(current[2], sec_path) == current[2])
+            if (current and whole and current[3] + section_tokens <= self.chunk_size
+                    and (_common_path(current[2], sec_path) or not (current[2] or sec_path))):
+                # The whole section fits next to related sections already collected
+                current[1] = _trim(text, sec_start, sec_end)[1]
+                current[2] = list(sec_path) if bare_parent else _common_path(current[2], sec_path)
+                current[3] += section_tokens
+                continue
+            carry = None
+            if bare_parent:
+                carry = current
+            elif current:
+                chunks.append(current)
+            current, whole = None, True
+            for unit_start, unit_end in self._units(text, sec_start, sec_end):
+                tokens = self.length(text[unit_start:unit_end])
+                if current and current[3] + tokens <= self.chunk_size:
+                    current[1] = unit_end
+                    current[3] += tokens
+                    continue
+                start = unit_start
+                if carry:
+                    if carry[3] + tokens <= self.chunk_size:
+                        start, tokens = carry[0], carry[3] + tokens
+                    else:
+                        chunks.append(carry)
+                    carry = None
+                if current:
+                    chunks.append(current)
+                    whole = False
+                    overlap = self._overlap_start(text, current[0], current[1])
+                    if overlap is not None:
+                        overlap_tokens = self.length(text[overlap:current[1]])
+                        if overlap_tokens + tokens <= self.chunk_size:
+                            start, tokens = overlap, overlap_tokens + tokens
+                current = [start, unit_end, list(sec_path), tokens]
+            if carry:
+                chunks.append(carry)
+        if current:
+            chunks.append(current)
+        return [(start, end, path) for start, end, path, _ in chunks], end_path
+
+    def split_text(self, text):
+        return [text[start:end] for start, end, _ in self.split_spans(text)[0]]
+
+    def split_documents(self, documents):
+        """Splits langchain Documents (e.g. PDF pages), carrying header paths across pages of one source."""
+        chunks = []
+        path, source = [], None
+        for document in documents:
+            if document.metadata.get("source") != source:
+                path, source = [], document.metadata.get("source")
+            spans, path = self.split_spans(document.page_content, path)
+            for start, end, header_path in spans:
+                metadata = {**document.metadata, "start_index": start}
+                if header_path:
+                    metadata["header_path"] = HEADER_PATH_SEPARATOR.join(header_path)
+                chunks.append(Document(page_content=document.page_content[start:end], metadata=metadata))
+        return chunks
@@ -0,0 +1,133 @@
+import os
+import re
+
+CONTEXT_TOKEN_BUDGET = 2000
+NEAR_DUPLICATE_THRESHOLD = 0.85
+MIN_TEXT_OVERLAP = 20
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def _shingles(text, size=3):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def text_overlap(left, right):
+    """Length of the longest suffix of left that is a prefix of right."""
+    for size in range(min(len(left), len(right)), MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _try_merge(a, b):
+    """Merges two passages from the same source if they touch or overlap, else returns None."""
+    if a["start"] is not None and b["start"] is not None:
+        first, second = (a, b) if a["start"] <= b["start"] else (b, a)
+        first_end = first["start"] + len(first["text"])
+        if second["start"] > first_end:
+            return None
+        tail = second["text"][first_end - second["start"]:]
+        return dict(first, text=first["text"] + tail, score=max(a["score"], b["score"]))
+
+    if b["text"] in a["text"]:
+        return dict(a, score=max(a["score"], b["score"]))
+    if a["text"] in b["text"]:
+        return dict(b, score=max(a["score"], b["score"]))
+    for first, second in ((a, b), (b, a)):
+        overlap = text_overlap(first["text"], second["text"])
+        if overlap:
+            return dict(first, text=first["text"] + second["text"][overlap:], score=max(a["score"], b["score"]))
+    return None
+
+
+def source_label(metadata):
+    """Human readable label for a chunk's origin."""
+    metadata = metadata or {}
+    label = metadata.get("title") or metadata.get("url") or os.path.basename(metadata.get("source", "")) or "unknown source"
+    if metadata.get("page") is not None:
+        label += f", page {int(metadata['page']) + 1}"
+    if metadata.get("header_path"):
+        label += f", {metadata['header_path']}"
+    return label
+
+
+def _truncate(text, max_tokens):
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    sentence_end = max(cut.rfind(". "), cut.rfind("\n"))
+    if sentence_end > limit // 2:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(" ", 1)[0] + " …"
+
+
+def assemble_context(documents, metadatas=None, scores=None, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Builds the prompt context from retrieved chunks: merged, deduplicated and packed into token_budget."""
+    metadatas = metadatas or [{}] * len(documents)
+    if scores is None:
+        scores = [1.0 / (rank + 1) for rank in range(len(documents))]
+
+    passages = []
+    for text, metadata, score in zip(documents, metadatas, scores):
+        metadata = metadata or {}
+        passage = {
+            "text": text.strip(),
+            "metadata": metadata,
+            "key": (metadata.get("source"), metadata.get("page"), metadata.get("created_at")),
+            "start": metadata.get("start_index"),
+            "score": score,
+        }
+        # Fold into an earlier passage from the same source until nothing more merges
+        merged = True
+        while merged:
+            merged = False
+            for i, other in enumerate(passages):
+                if other["key"] == passage["key"]:
+                    combined = _try_merge(other, passage)
+                    if combined is not None:
+                        passage = combined
+                        passages.pop(i)
+                        merged = True
+                        break
+        passages.append(passage)
+
+    passages.sort(key=lambda p: p["score"], reverse=True)
+
+    kept, kept_shingles = [], []
+    for passage in passages:
+        shingles = _shingles(passage["text"])
+        if any(_jaccard(shingles, other) >= NEAR_DUPLICATE_THRESHOLD for other in kept_shingles):
+            continue
+        kept.append(passage)
+        kept_shingles.append(shingles)
+
+    blocks, used = [], 0
+    for passage in kept:
+        header = f"[{len(blocks) + 1}] Source: {source_label(passage['metadata'])}\n"
+        remaining = token_budget - used - estimate_tokens(header)
+        if remaining <= 0:
+            break
+        text = passage["text"]
+        if estimate_tokens(text) > remaining:
+            # Only trim the passage if a useful part of it still fits
+            if remaining < 50:
+                continue
+            text = _truncate(text, remaining)
+        block = header + text
+        blocks.append(block)
+        used += estimate_tokens(block)
+    return "\n\n".join(blocks)
@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+import chromadb
+from .vector_store import NumpyClient
+
+CHROMA_PATH = "chroma_db"
+COLLECTION_NAME = "youtube_summaries"
+# "chroma" (default) or "numpy" for the memory-mapped store in vector_store.py
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "chroma")
+ACTIVE_POINTER_FILE = "active_collection.json"
+
+# Process-wide handles shared by every Streamlit session.
+_lock = threading.RLock()
+_clients = {}
+_collections = {}
+_warmup_threads = {}
+_warmup_errors = {}
+
+
+def get_client(path=CHROMA_PATH):
+    """Returns the shared vector store client for a path, creating it on first use."""
+    client = _clients.get(path)
+    if client is None:
+        with _lock:
+            client = _clients.get(path)
+            if client is None:
+                if VECTOR_STORE_BACKEND == "numpy":
+                    client = NumpyClient(path)
+                else:
+                    client = chromadb.PersistentClient(path=path)
+                _clients[path] = client
+    return client
+
+
+def active_collection_name(path=CHROMA_PATH):
+    """Name of the collection the app reads and writes; changed by an atomic swap."""
+    try:
+        with open(os.path.join(path, ACTIVE_POINTER_FILE), encoding="utf-8") as f:
+            return json.load(f)["name"]
+    except (OSError, ValueError, KeyError):
+        return COLLECTION_NAME
+
+
+def set_active_collection(name, path=CHROMA_PATH):
+    """Points the app at another collection; readers see either the old or the new name."""
+    os.makedirs(path, exist_ok=True)
+    pointer = os.path.join(path, ACTIVE_POINTER_FILE)
+    with _lock:
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"name": name, "swapped_at": int(time.time())}, f)
+        os.replace(pointer + ".tmp", pointer)
+
+
+def get_collection(name=None, path=CHROMA_PATH, metadata=None):
+    """Returns the shared collection handle (the active one by default), creating the collection if needed."""
+    name = name or active_collection_name(path)
+    key = (path, name)
+    collection = _collections.get(key)
+    if collection is None:
+        with _lock:
+            collection = _collections.get(key)
+            if collection is None:
+                client = get_client(path)
+                try:
+                    collection = client.get_collection(name=name)
+                except Exception:
+                    collection = client.get_or_create_collection(name=name, metadata=metadata or None)
+                _collections[key] = collection
+    return collection
+
+
+def delete_collection(name, path=CHROMA_PATH):
+    with _lock:
+        get_client(path).delete_collection(name=name)
+        _collections.pop((path, name), None)
+
+
+def forget_collection(name, path=CHROMA_PATH):
+    """Drops a cached collection handle, e.g. after the collection was deleted."""
+    with _lock:
+        _collections.pop((path, name), None)
+
+
+def _epoch_path(name, path):
+    return os.path.join(path, f"{name}.epoch")
+
+
+def get_epoch(name=COLLECTION_NAME, path=CHROMA_PATH):
+    """Returns the collection's write epoch, which changes whenever its contents change."""
+    try:
+        with open(_epoch_path(name, path), encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def bump_epoch(name=COLLECTION_NAME, path=CHROMA_PATH):
+    """Marks the collection as changed; call after every write."""
+    with _lock:
+        epoch = get_epoch(name, path) + 1
+        os.makedirs(path, exist_ok=True)
+        tmp_path = _epoch_path(name, path) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(epoch))
+        os.replace(tmp_path, _epoch_path(name, path))
+        return epoch
+
+
+def warm_up(name=None, path=CHROMA_PATH):
+    """Opens the client and collection in a background thread so the first query is fast."""
+    name = name or active_collection_name(path)
+    key = (path, name)
+    with _lock:
+        thread = _warmup_threads.get(key)
+        if thread is not None:
+            return thread
+
+        def _load():
+            try:
+                get_collection(name, path).count()
+            except Exception as e:
+                # Reported by db_stats; the first query opens the handles again
+                _warmup_errors[key] = str(e)
+
+        thread = threading.Thread(target=_load, name="chroma-warmup", daemon=True)
+        _warmup_threads[key] = thread
+        thread.start()
+        return thread
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return total
+
+
+def db_stats(name=None, path=CHROMA_PATH):
+    """Returns health and size information about the shared database handles."""
+    name = name or active_collection_name(path)
+    stats = {
+        "path": path,
+        "collection": name,
+        "healthy": False,
+        "heartbeat_ms": None,
+        "count": None,
+        "disk_bytes": _dir_size(path) if os.path.isdir(path) else 0,
+        "error": None,
+    }
+    try:
+        start = time.perf_counter()
+        get_client(path).heartbeat()
+        stats["heartbeat_ms"] = (time.perf_counter() - start) * 1000
+        stats["count"] = get_collection(name, path).count()
+        stats["healthy"] = True
+        _warmup_errors.pop((path, name), None)
+    except Exception as e:
+        stats["error"] = str(e)
+    # Counted once the calls above have opened (or reused) the handles
+    stats["cached_clients"] = len(_clients)
+    stats["cached_collections"] = len(_collections)
+    stats["warmup_error"] = _warmup_errors.get((path, name))
+    return stats
@@ -1,40 +1,157 @@
-import chromadb
+import os
 import subprocess
+import time
 import streamlit as st 
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from .summarization import get_gemini_response
+from .db_registry import CHROMA_PATH, get_collection, active_collection_name, db_stats, get_epoch, bump_epoch
+from .embeddings import EMBEDDING_MODEL, embed_texts, embed_query, collection_model
+from .answer_cache import get_answer_cache
+from .retrieval import get_lexical_index, hybrid_search, lexical_index_written
+from .context_builder import assemble_context, CONTEXT_TOKEN_BUDGET
+from .metadata_utils import SOURCE_TYPES, build_metadata, build_where
+from .chunking import CHUNKER, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, StructuredTextSplitter, indexed_text
+from .ingest_queue import enqueue_pdf, get_ingest_queue
+from .near_duplicates import DUPLICATE_POLICY, minhash, document_id, get_duplicate_index
 
-CHROMA_PATH = "chroma_db"
+UPSERT_BATCH_SIZE = 256
+N_RESULTS = 10
+# Character sizes of the "recursive" chunker, used by collections created before the structured one
+CHUNK_SIZE = 300
+CHUNK_OVERLAP = 100
 
-def connect_db():
-    #Connects to the ChromaDB database
-    collection =  chromadb.PersistentClient(path=CHROMA_PATH)
-    return collection.get_or_create_collection(name="youtube_summaries")
+# Optionally keep one collection per source type so filtered queries only touch their partition
+PARTITION_BY_SOURCE_TYPE = os.environ.get("PARTITION_BY_SOURCE_TYPE", "").lower() in ("1", "true", "yes")
 
-def add_pdf_documents_to_db(pdf_file_path):
+def collection_settings(embedding_model=EMBEDDING_MODEL, chunk_size=None, chunk_overlap=None, chunker=CHUNKER):
+    # Chunking settings stored in a new collection's metadata (sizes in tokens for the structured chunker).
+    if chunker == "structured":
+        default_size, default_overlap = CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
+    else:
+        default_size, default_overlap = CHUNK_SIZE, CHUNK_OVERLAP
+    return {
+        "embedding_model": embedding_model,
+        "chunker": chunker,
+        "chunk_size": chunk_size or default_size,
+        "chunk_overlap": chunk_overlap if chunk_overlap is not None else default_overlap,
+    }
+
+def partition_name(source_type, base_name=None):
+    return f"{base_name or active_collection_name(CHROMA_PATH)}__{source_type}"
+
+def collection_names(source_types=None, base_name=None):
+    # Names of the collections a query or ingest has to touch
+    base_name = base_name or active_collection_name(CHROMA_PATH)
+    if not PARTITION_BY_SOURCE_TYPE:
+        return [base_name]
+    return [partition_name(t, base_name) for t in (source_types or SOURCE_TYPES)]
+
+def connect_db(name=None, settings=None):
+    #Connects to the ChromaDB database through the shared process-wide client
+    return get_collection(name or active_collection_name(CHROMA_PATH), CHROMA_PATH, settings or collection_settings())
+
+def get_text_splitter(collection):
+    # Splitter configured the way the collection was built; collections without a chunker setting predate the structured one
+    settings = collection.metadata or {}
+    if settings.get("chunker", "recursive") == "structured":
+        return StructuredTextSplitter(
+            chunk_size=int(settings.get("chunk_size", CHUNK_TOKENS)),
+            chunk_overlap=int(settings.get("chunk_overlap", CHUNK_OVERLAP_TOKENS)),
+        )
+    return RecursiveCharacterTextSplitter(
+        chunk_size=int(settings.get("chunk_size", CHUNK_SIZE)),
+        chunk_overlap=int(settings.get("chunk_overlap", CHUNK_OVERLAP)),
+        length_function=len,
+        is_separator_regex=False,
+        add_start_index=True,
+    )
+
+def store_chunks(collection, documents, metadatas, ids, embeddings, batch_size=UPSERT_BATCH_SIZE):
+    # Upserts already embedded chunks in bounded batches and keeps the lexical index and epoch in step
+    lexical_index = get_lexical_index(collection, collection.name)
+
+    # adding to chromadb in bounded batches
+    for start in range(0, len(documents), batch_size):
+        stop = start + batch_size
+        collection.upsert(
+            documents=documents[start:stop],
+            embeddings=embeddings[start:stop],
+            metadatas=metadatas[start:stop],
+            ids=ids[start:stop]
+        )
+
+    # keeping the lexical index in step with the collection
+    lexical_index.add(ids, [indexed_text(d, m) for d, m in zip(documents, metadatas)])
+    lexical_index.save()
+    lexical_index_written(collection.name, bump_epoch(collection.name, CHROMA_PATH))
+
+def ingest_chunks(collection, documents, metadatas, ids, batch_size=UPSERT_BATCH_SIZE):
+    # Embeds chunks with the collection's model and stores them
+
+    # embedding explicitly so repeated chunks come from the embedding cache
+    texts = [indexed_text(d, m) for d, m in zip(documents, metadatas)]
+    embeddings, stats = embed_texts(texts, model_name=collection_model(collection))
+    store_chunks(collection, documents, metadatas, ids, embeddings, batch_size)
+    return stats
+
+def check_duplicate(collection, text):
+    # Near-duplicate check of a whole document; returns (signature, (doc_id, title, similarity) or None).
+    signature = minhash(text)
+    if DUPLICATE_POLICY == "off":
+        return signature, None
+    return signature, get_duplicate_index(collection.name).find(signature)
+
+def skipped_stats(match):
+    # ingest stats of a document that was not ingested because a near-duplicate is stored
+    return {"chunks": 0, "cached": 0, "computed": 0, "seconds": 0.0, "chunks_per_sec": 0.0,
+            "duplicate_of": match[1], "similarity": match[2]}
+
+def delete_document(collection, doc_id):
+    # Removes every chunk of a stored document, e.g. when a newer near-duplicate replaces it
+    ids = collection.get(where={"doc_id": doc_id}, include=[])["ids"]
+    if ids:
+        collection.delete(ids=ids)
+        lexical_index = get_lexical_index(collection, collection.name)
+        lexical_index.remove(ids)
+        lexical_index.save()
+        lexical_index_written(collection.name, bump_epoch(collection.name, CHROMA_PATH))
+    get_duplicate_index(collection.name).remove(doc_id)
+    return len(ids)
+
+def add_pdf_documents_to_db(pdf_file_path, metadata=None, source=None):
      
-     #Processes and adds new documents from PDFs into ChromaDB.
+     #Processes and adds a new PDF document into ChromaDB.
+     # source: path recorded in the chunks' metadata when the file was copied for ingestion
 
-     chroma_client = chromadb.PersistentClient(path=CHROMA_PATH)
-     collection = chroma_client.get_or_create_collection(name="youtube_summaries")
+     metadata_base = metadata or build_metadata("document")
+     name = collection_names([metadata_base["source_type"]])[0]
+     collection = connect_db(name)
      
      # loading the document
-     loader = PyPDFDirectoryLoader("data")
+     loader = PyPDFLoader(pdf_file_path)
      raw_documents = loader.load()
+     if source:
+         for document in raw_documents:
+             document.metadata["source"] = source
+
+     # skipping (or replacing) near-duplicates of stored documents before spending any embedding compute
+     text = "\n".join(document.page_content for document in raw_documents)
+     signature, match = check_duplicate(collection, text)
+     if match and DUPLICATE_POLICY == "skip":
+         return 0, skipped_stats(match)
+     if match:
+         delete_document(collection, match[0])
+     doc_id = document_id(text)
+     metadata_base = {**metadata_base, "doc_id": doc_id}
      
      # splitting the document
-     text_splitter = RecursiveCharacterTextSplitter(
-         chunk_size=300,
-         chunk_overlap=100,
-         length_function=len,
-         is_separator_regex=False,
-     )
+     text_splitter = get_text_splitter(collection)
      
      chunks = text_splitter.split_documents(raw_documents)
      
      # Get existing IDs to prevent overwriting
-     existing_data = collection.get()
+     existing_data = collection.get(include=[])
      existing_ids = set(existing_data["ids"]) if existing_data["ids"] else set()
      
      # preparing to be added in chromadb
@@ -55,44 +172,101 @@ def add_pdf_documents_to_db(pdf_file_path):
      
          documents.append(chunk.page_content)
          ids.append(new_id)
-         metadata.append(chunk.metadata)
+         metadata.append({**chunk.metadata, **metadata_base})
      
          i += 1
 
-     # adding to chromadb
-     collection.upsert(
-         documents=documents,
-         metadatas=metadata,
-         ids=ids
-     )
+     stats = ingest_chunks(collection, documents, metadata, ids)
+     get_duplicate_index(collection.name).add(doc_id, signature, metadata_base.get("title") or source or pdf_file_path)
 
-     return len(documents)
+     return len(documents), stats
 
-def add_to_db(pdf_file_path):
+def add_to_db(pdf_file_path, metadata=None):
    
-   #Loads PDF summaries from data folder and adds them to ChromaDB.
+   #Queues a PDF summary for the background ingestion worker and returns its job ID right away.
 
     try:
-        new_doc_count = add_pdf_documents_to_db(pdf_file_path)
-        st.session_state['collection'] = connect_db()
-        st.success(f"{new_doc_count} new documents added to the database successfully!")
+        job_id = enqueue_pdf(pdf_file_path, metadata)
+        st.session_state.setdefault('ingest_jobs', []).append(job_id)
+        st.info(f"Saving to the database in the background (job {job_id}). You can keep working.")
+        return job_id
     except Exception as e:
-        st.error(f"Error updating database: {e}")
+        st.error(f"Error queueing document for the database: {e}")
+
+@st.fragment(run_every=2)
+def write_ingest_jobs(limit=5):
+    # Live status of this session's most recent saves, refreshed without rerunning the page
+    jobs = get_ingest_queue().get_many(st.session_state.get('ingest_jobs', [])[-limit:])
+    for job in reversed(jobs):
+        if job['status'] == 'queued':
+            st.caption(f"⏳ {job['label']} · queued ({job['position']} ahead) · job {job['id']}")
+        elif job['status'] == 'running':
+            st.caption(f"⚙️ {job['label']} · indexing for {time.time() - job['started_at']:.0f}s · job {job['id']}")
+        elif job['status'] == 'done' and job['result'].get('duplicate_of'):
+            result = job['result']
+            st.caption(
+                f"⏭️ {job['label']} · not added, {result['similarity']:.0%} similar to "
+                f"'{result['duplicate_of']}' already in the database · job {job['id']}"
+            )
+        elif job['status'] == 'done':
+            result = job['result']
+            st.caption(
+                f"✅ {job['label']} · {result['chunks']} chunks added "
+                f"({result['chunks_per_sec']:.1f} chunks/sec, {result['cached']} embeddings from cache) · job {job['id']}"
+            )
+        else:
+            st.caption(f"❌ {job['label']} · failed: {job['error']} · job {job['id']}")
 
-def talk_to_db(query):
+def search_db(query, filters=None, n_results=N_RESULTS):
+    # Hybrid search over every collection the filters allow, merged by fused score
+    filters = filters or {}
+    where = build_where(**filters)
+    hits = []
+    for name in collection_names(filters.get("source_types")):
+        collection = connect_db(name)
+        if collection.count() == 0:
+            continue
+        results = hybrid_search(collection, query, n_results=n_results, name=name, where=where)
+        hits.extend(zip(results['ids'][0], results['documents'][0], results['metadatas'][0], results['scores'][0]))
+    hits.sort(key=lambda hit: hit[3], reverse=True)
+    hits = hits[:n_results]
+    return {
+        'ids': [[h[0] for h in hits]],
+        'documents': [[h[1] for h in hits]],
+        'metadatas': [[h[2] for h in hits]],
+        'scores': [[h[3] for h in hits]],
+    }
+
+def talk_to_db(query, filters=None, token_budget=CONTEXT_TOKEN_BUDGET):
     # Submits query to DB and retrieves response
+    # filters: optional dict of source_types, since, until and tags (see build_where)
     if query.strip():
             with st.spinner(" 🧠 Thinking..."):
                 
-                collection = connect_db()
-                
-                # Query ChromaDB
-                results = collection.query(query_texts=[query], n_results=10)
+                # Serve a cached answer to an equivalent question if the DB has not changed since
+                names = collection_names((filters or {}).get("source_types"))
+                scope = repr((names, build_where(**(filters or {}))))
+                epochs = tuple(get_epoch(name, CHROMA_PATH) for name in names)
+                query_embedding = embed_query(query)
+                cached = get_answer_cache().lookup(query_embedding, scope, epochs)
+                if cached is not None:
+                    response = cached[1]
+                    st.session_state['db_conversation'].append((query, response))
+                    return response
+
+                # Query ChromaDB and the lexical index together
+                results = search_db(query, filters)
+                context = assemble_context(
+                    results['documents'][0],
+                    results['metadatas'][0],
+                    results['scores'][0],
+                    token_budget=token_budget,
+                )
 
                 # Format AI system prompt
                 system_prompt = f"""
                 You are my second brain. You are an extension of me. 
-                You have summaries about different YouTube videos I watched. 
+                You have summaries about different YouTube videos I watched, websites I read, my notes and live sessions I attended. 
                 Answer my questions based on the data given here. If there is no information that directly answers the question I asked, 
                 tell that there is no information on the topic in "the second brain" yet. Use the phrase "second brain"
                 Don't make things up on your own and don't give irrelevant information. 
@@ -101,13 +275,15 @@ def talk_to_db(query):
                 {query}
 
                 The data:
-                {results['documents']}
+                {context}
                 """
 
                 # Get AI-generated response
                 try:
                     response = get_gemini_response(system_prompt)
                     # print(response)
+                    if not response.startswith("Error generating content"):
+                        get_answer_cache().store(query_embedding, query, response, scope, epochs)
                     st.session_state['db_conversation'].append((query, response)) 
                     return response
                 except Exception as e:
@@ -115,6 +291,26 @@ def talk_to_db(query):
     else:
         st.warning("Please enter a question.")
 
+def write_db_status():
+    # Shows health and size of the shared database connection
+    for name in collection_names():
+        stats = db_stats(name, CHROMA_PATH)
+        if stats["healthy"]:
+            st.caption(
+                f"🟢 {stats['count']} chunks in '{stats['collection']}' · "
+                f"{stats['disk_bytes'] / 1e6:.1f} MB on disk · heartbeat {stats['heartbeat_ms']:.1f} ms"
+            )
+        else:
+            st.caption(f"🔴 Database unavailable: {stats['error']}")
+        if stats["warmup_error"]:
+            st.caption(f"⚠️ Background warm-up failed: {stats['warmup_error']}")
+    cache_stats = get_answer_cache().stats()
+    if cache_stats["hits"] + cache_stats["misses"]:
+        st.caption(
+            f"⚡ Answer cache: {cache_stats['hit_rate']:.0%} hit rate "
+            f"({cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries)"
+        )
+
 def write_db_conversation_history():
      for i, (q, a) in enumerate(st.session_state['db_conversation']):
             st.write(f"**Q{i+1}:** {q}")
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# "hashing-384" is an offline feature-hashing model used by the benchmarks
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBED_BATCH_SIZE = 64
+EMBED_WORKERS = min(4, os.cpu_count() or 1)
+
+_lock = threading.Lock()
+_embedders = {}
+_caches = {}
+
+
+def _hashing_embedder(dim):
+    def embed(texts):
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % dim] += 1.0 if (value >> 63) else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    return embed
+
+
+def get_embedder(model_name=EMBEDDING_MODEL):
+    """Returns a function mapping a list of texts to a float32 matrix of embeddings."""
+    with _lock:
+        embedder = _embedders.get(model_name)
+        if embedder is None:
+            if model_name.startswith("hashing-"):
+                embedder = _hashing_embedder(int(model_name.split("-", 1)[1]))
+            elif model_name == "all-MiniLM-L6-v2":
+                from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+                default_ef = DefaultEmbeddingFunction()
+                embedder = lambda texts: np.asarray(default_ef(list(texts)), dtype=np.float32)
+            else:
+                from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                st_ef = SentenceTransformerEmbeddingFunction(model_name=model_name)
+                embedder = lambda texts: np.asarray(st_ef(list(texts)), dtype=np.float32)
+            _embedders[model_name] = embedder
+    return embedder
+
+
+def collection_model(collection):
+    """Embedding model a collection was built with (stored in its metadata)."""
+    return (collection.metadata or {}).get("embedding_model", EMBEDDING_MODEL)
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Disk-backed embedding store keyed by (model, sha256 of the text)."""
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model_name, hashes):
+        found = {}
+        unique = list(set(hashes))
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model_name, *part],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model_name, h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in items],
+            )
+            self._conn.commit()
+
+
+def get_cache(path=EMBEDDING_CACHE_PATH):
+    with _lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = EmbeddingCache(path)
+            _caches[path] = cache
+    return cache
+
+
+def embed_texts(texts, model_name=EMBEDDING_MODEL, batch_size=EMBED_BATCH_SIZE,
+                workers=EMBED_WORKERS, cache_path=EMBEDDING_CACHE_PATH):
+    """Embeds texts in batches on a thread pool, reusing cached vectors; returns (embeddings, stats)."""
+    start = time.perf_counter()
+    cache = get_cache(cache_path)
+    hashes = [text_hash(t) for t in texts]
+    vectors = cache.get_many(model_name, hashes)
+
+    # Each distinct missing text is embedded once, even if it repeats in the input
+    missing = {}
+    for h, text in zip(hashes, texts):
+        if h not in vectors and h not in missing:
+            missing[h] = text
+    missing_hashes = list(missing)
+    batches = [missing_hashes[i:i + batch_size] for i in range(0, len(missing_hashes), batch_size)]
+
+    if batches:
+        embedder = get_embedder(model_name)
+
+        def run(batch):
+            result = embedder([missing[h] for h in batch])
+            cache.put_many(model_name, zip(batch, result))
+            return batch, result
+
+        # The first batch runs inline so lazily loaded models initialise once
+        done = [run(batches[0])]
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                done.extend(pool.map(run, batches[1:]))
+        for batch, result in done:
+            for h, vector in zip(batch, result):
+                vectors[h] = np.asarray(vector, dtype=np.float32)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "chunks": len(texts),
+        "cached": len(texts) - sum(1 for h in hashes if h in missing),
+        "computed": len(missing_hashes),
+        "seconds": elapsed,
+        "chunks_per_sec": len(texts) / elapsed if elapsed > 0 else 0.0,
+    }
+    return [vectors[h].tolist() for h in hashes], stats
+
+
+def embed_query(query, model_name=EMBEDDING_MODEL, cache_path=EMBEDDING_CACHE_PATH):
+    """Embeds a single query, served from the cache when it was asked before."""
+    embeddings, _ = embed_texts([query], model_name=model_name, cache_path=cache_path)
+    return embeddings[0]
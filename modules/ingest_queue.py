@@ -0,0 +1,236 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from .db_registry import CHROMA_PATH
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+QUEUE_PATH = os.path.join(CHROMA_PATH, "ingest_queue.sqlite3")
+SPOOL_DIR = os.path.join(CHROMA_PATH, "ingest_spool")
+WRITE_LOCK_PATH = os.path.join(CHROMA_PATH, "ingest.lock")
+EXPORT_QUEUE_PATH = os.path.join(CHROMA_PATH, "export_queue.sqlite3")
+# Jobs that only read the vector store run without the write lock
+READ_ONLY_KINDS = ("export",)
+POLL_INTERVAL = 1.0
+KEEP_FINISHED_JOBS = 200
+
+_lock = threading.Lock()
+_queues = {}
+_thread_lock = threading.Lock()
+
+
+@contextmanager
+def write_lock(path=WRITE_LOCK_PATH):
+    """Cross-process lock held while writing to the vector store."""
+    with _thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        return False  # os.kill would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _run_job(kind, payload, progress):
+    # Imported here because db_utils and batch_export enqueue through this module
+    if kind == "export":
+        from .batch_export import run_export_job
+        return run_export_job(payload, progress)
+
+    from .db_utils import add_pdf_documents_to_db
+    if kind == "pdf":
+        try:
+            count, stats = add_pdf_documents_to_db(payload["path"], payload["metadata"], source=payload["source"])
+        finally:
+            if os.path.exists(payload["path"]):
+                os.remove(payload["path"])
+        result = {"chunks": count, "cached": stats["cached"], "chunks_per_sec": stats["chunks_per_sec"]}
+        if stats.get("duplicate_of"):
+            result.update(duplicate_of=stats["duplicate_of"], similarity=stats["similarity"])
+        return result
+    raise ValueError(f"Unknown ingestion job kind: {kind}")
+
+
+class IngestQueue:
+    """Persistent SQLite FIFO of ingestion jobs drained by one background worker thread."""
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, label TEXT, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "worker_pid INTEGER, result TEXT, error TEXT)"
+        )
+        # Queues created before jobs reported progress lack the column
+        if "progress" not in {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def enqueue(self, kind, payload, label=None, job_id=None):
+        job_id = job_id or uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, label, payload, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, label, json.dumps(payload), time.time()),
+            )
+            self._conn.commit()
+        self.start_worker()
+        self._wakeup.set()
+        return job_id
+
+    def _job(self, row):
+        job = dict(row)
+        job.pop("payload")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def get_many(self, job_ids):
+        """Status of the given jobs, in the given order; queued jobs include their position."""
+        if not job_ids:
+            return []
+        with self._lock:
+            placeholders = ",".join("?" * len(job_ids))
+            rows = self._conn.execute(f"SELECT * FROM jobs WHERE id IN ({placeholders})", list(job_ids)).fetchall()
+            jobs = {row["id"]: self._job(row) for row in rows}
+            for job in jobs.values():
+                if job["status"] == "queued":
+                    job["position"] = self._conn.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running') AND created_at < ?",
+                        (job["created_at"],),
+                    ).fetchone()[0]
+        return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+
+    def get(self, job_id):
+        found = self.get_many([job_id])
+        return found[0] if found else None
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _requeue_orphans(self):
+        # Called as a worker starts: a job running under this process belonged to a worker thread that died
+        with self._lock:
+            rows = self._conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+            orphans = [row["id"] for row in rows if row["worker_pid"] in (None, os.getpid())
+                       or not _pid_alive(row["worker_pid"])]
+            self._conn.executemany("UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?",
+                                   [(job_id,) for job_id in orphans])
+            self._conn.commit()
+
+    def _claim(self):
+        # BEGIN IMMEDIATE makes the select-and-update atomic across processes
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ? WHERE id = ?",
+                    (time.time(), os.getpid(), row["id"]),
+                )
+            self._conn.commit()
+        return row
+
+    def set_progress(self, job_id, message):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (message, job_id))
+            self._conn.commit()
+
+    def _finish(self, job_id, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                ("failed" if error else "done", time.time(), json.dumps(result) if result else None, error, job_id),
+            )
+            # Only the most recent finished jobs are kept for status display
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND id NOT IN ("
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') ORDER BY finished_at DESC LIMIT ?)",
+                (KEEP_FINISHED_JOBS,),
+            )
+            self._conn.commit()
+
+    def _work(self):
+        self._requeue_orphans()
+        while True:
+            row = self._claim()
+            if row is None:
+                self._wakeup.wait(POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            try:
+                with nullcontext() if row["kind"] in READ_ONLY_KINDS else write_lock():
+                    result = _run_job(row["kind"], json.loads(row["payload"]), partial(self.set_progress, row["id"]))
+                self._finish(row["id"], result=result)
+            except Exception as e:
+                self._finish(row["id"], error=str(e))
+
+    def start_worker(self):
+        """Starts the worker thread once per process."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                name = os.path.splitext(os.path.basename(self.path))[0] + "-worker"
+                self._worker = threading.Thread(target=self._work, name=name, daemon=True)
+                self._worker.start()
+        return self._worker
+
+
+def get_ingest_queue(path=QUEUE_PATH):
+    """Returns the shared queue stored at path."""
+    with _lock:
+        queue = _queues.get(path)
+        if queue is None:
+            queue = IngestQueue(path)
+            _queues[path] = queue
+    return queue
+
+
+def enqueue_pdf(pdf_file_path, metadata=None, label=None):
+    """Copies a PDF to the spool directory, queues it for ingestion and returns the job ID."""
+    job_id = uuid.uuid4().hex[:12]
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    spool_path = os.path.join(SPOOL_DIR, f"{job_id}.pdf")
+    # The worker deletes its input once ingested, and the original belongs to the caller
+    shutil.copyfile(pdf_file_path, spool_path)
+    label = label or (metadata or {}).get("title") or os.path.basename(pdf_file_path)
+    payload = {"path": spool_path, "source": pdf_file_path, "metadata": metadata}
+    return get_ingest_queue().enqueue("pdf", payload, label, job_id)
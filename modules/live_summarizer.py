@@ -0,0 +1,171 @@
+"""Incremental summaries of a live session, built in the background."""
+import os
+import threading
+import time
+import streamlit as st
+from .summarization import get_gemini_response
+from .time_utils import clock_time
+
+SUMMARY_INTERVAL_SECONDS = float(os.environ.get("LIVE_SUMMARY_INTERVAL_SECONDS", "300"))
+# Less new transcript than this waits for the next checkpoint
+MIN_SEGMENT_WORDS = 60
+MERGE_FANOUT = 4
+IDLE_EXIT_SECONDS = 600
+SUMMARY_MODEL = "gemini-2.0-flash"
+
+SEGMENT_PROMPT = """
+You are a helpful teaching assistant. Summarize the following transcript segment from a {topic} session.
+Focus on the main points and key takeaways. If there are any technical terms or jargon, briefly explain them.
+
+Transcript:
+{transcript}
+
+Summary:
+"""
+
+MERGE_PROMPT = """
+You are a helpful teaching assistant. Below are summaries of consecutive parts of a {topic} session,
+in order{tail_note}. Merge them into one summary of the session so far: keep the main points, key takeaways
+and brief explanations of technical terms, in the order they came up, without repeating anything.
+
+{parts}
+
+Summary:
+"""
+
+
+class LiveSummarizer:
+    """Background thread that keeps segment summaries and a running summary of one live session."""
+
+    def __init__(self, segments, topic="the session", interval=SUMMARY_INTERVAL_SECONDS, generate=None):
+        self.segments = segments
+        self.topic = topic
+        self.interval = interval
+        self.generate = generate or (lambda prompt: get_gemini_response(prompt, model_name=SUMMARY_MODEL))
+        self.segment_summaries = []  # {"start", "end", "summary"} per checkpoint
+        self.running_summary = ""
+        self.error = None
+        self.calls = 0
+        self._levels = []  # _levels[k]: merged summaries of MERGE_FANOUT**k segments each, oldest first
+        self._cursor = 0  # segments up to here are summarized
+        self._fresh = True  # running_summary covers every summarized segment
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def ensure_running(self):
+        with self._thread_lock:
+            if not self._stopped.is_set() and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="live-summarizer", daemon=True)
+                self._thread.start()
+
+    def _call(self, prompt):
+        self.calls += 1
+        response = self.generate(prompt)
+        # get_gemini_response reports failures as text
+        if response.startswith("Error generating content"):
+            raise RuntimeError(response)
+        return response
+
+    def _merge(self, pieces, tail=None):
+        parts = [f"[{clock_time(p['start'])}-{clock_time(p['end'])}]\n{p['summary']}" for p in pieces]
+        if tail:
+            parts.append(f"[{clock_time(tail[0]['start'])}-{clock_time(tail[-1]['end'])}, transcript]\n"
+                         + " ".join(s['text'] for s in tail))
+        tail_note = ", followed by the transcript of its latest minutes" if tail else ""
+        return self._call(MERGE_PROMPT.format(topic=self.topic, tail_note=tail_note, parts="\n\n".join(parts)))
+
+    @property
+    def pieces(self):
+        """Merged summaries covering everything checkpointed, oldest first."""
+        # Higher levels cover older stretches; each level is in order
+        return [piece for level in reversed(self._levels) for piece in level]
+
+    def _add(self, piece):
+        level = 0
+        while True:
+            if len(self._levels) == level:
+                self._levels.append([])
+            self._levels[level].append(piece)
+            if len(self._levels[level]) < MERGE_FANOUT:
+                return
+            pieces = self._levels[level]
+            # If the merge fails the pieces stay where they are and are merged with the next one
+            piece = {"start": pieces[0]['start'], "end": pieces[-1]['end'], "summary": self._merge(pieces)}
+            self._levels[level] = []
+            level += 1
+
+    def checkpoint(self, min_words=MIN_SEGMENT_WORDS):
+        """Summarizes the transcript since the last checkpoint; returns whether there was enough new text."""
+        new = self.segments.since(self._cursor)
+        # A reopened session's transcript is caught up on an interval at a time, as if it had been recorded live
+        new = [s for s in new if s['start'] < new[0]['start'] + self.interval] if new else new
+        if not new or sum(len(s['text'].split()) for s in new) < min_words:
+            return False
+        with self._lock:
+            text = " ".join(s['text'] for s in new)
+            summary = self._call(SEGMENT_PROMPT.format(topic=self.topic, transcript=text))
+            piece = {"start": new[0]['start'], "end": new[-1]['end'], "summary": summary}
+            self.segment_summaries.append(piece)
+            self._cursor += len(new)
+            self._fresh = False
+            self._add(dict(piece))
+            pieces = self.pieces
+            self.running_summary = pieces[0]['summary'] if len(pieces) == 1 else self._merge(pieces)
+            self._fresh = True
+        return True
+
+    def final_summary(self):
+        """Summary of the whole session so far: the running summary if nothing new came in, else one merge call."""
+        with self._lock:
+            tail = self.segments.since(self._cursor)
+            if not tail and self._fresh:
+                return self.running_summary
+            pieces = self.pieces
+            if pieces:
+                return self._merge(pieces, tail)
+            text = " ".join(s['text'] for s in tail)
+            return self._call(SEGMENT_PROMPT.format(topic=self.topic, transcript=text)) if text else ""
+
+    def stop(self):
+        """Ends the thread after its current model call, e.g. when the page opens another session."""
+        self._stopped.set()
+
+    def _run(self):
+        last_text = time.monotonic()
+        next_checkpoint = time.monotonic() + self.interval
+        while not self._stopped.wait(1.0):
+            now = time.monotonic()
+            if now < next_checkpoint:
+                continue
+            next_checkpoint = now + self.interval
+            try:
+                while not self._stopped.is_set() and self.checkpoint():
+                    last_text = now
+                self.error = None
+            except Exception as e:
+                # The checkpoint stays where it was, so the same text is retried next time
+                self.error = str(e)
+            if now - last_text >= IDLE_EXIT_SECONDS:
+                return
+
+
+@st.fragment(run_every=5)
+def write_live_summary():
+    # The running summary and the per-segment summaries, mirrored into the session as they are made
+    summarizer = st.session_state.get('live_summarizer')
+    if summarizer is None:
+        return
+    if st.session_state.get('is_recording'):
+        summarizer.ensure_running()
+    st.session_state['segment_summaries'] = list(summarizer.segment_summaries)
+    if summarizer.error:
+        st.caption(f"⚠️ Background summary failed, retrying at the next checkpoint: {summarizer.error}")
+    if not summarizer.segment_summaries:
+        st.caption(f"🧾 A running summary appears every {summarizer.interval / 60:.0f} minutes of transcript")
+        return
+    with st.expander(f"🧾 Running summary (up to {clock_time(summarizer.segment_summaries[-1]['end'])})"):
+        st.markdown(summarizer.running_summary)
+        for piece in reversed(st.session_state['segment_summaries']):
+            st.markdown(f"**{clock_time(piece['start'])}–{clock_time(piece['end'])}**\n\n{piece['summary']}")
@@ -1,87 +1,466 @@
 import streamlit as st
-import threading
 import queue
+import threading
 import time
-import whisper
-import sounddevice as sd
-import numpy as np
-import wave
 import os
-import torch
+import numpy as np
+from .asr_models import get_asr_model
+from .ring_buffer import AudioRingBuffer
+from .transcript_log import TAIL_SEGMENTS
+from .vad import PADDING_SECONDS, VoiceActivitySegmenter
+
+try:
+    import sounddevice as sd
+except OSError:  # PortAudio is missing (e.g. a headless server): transcription works, capture does not
+    sd = None
+
+SAMPLE_RATE = 16000
+# Longest segment sent to Whisper; voice activity detection usually closes segments earlier, at pauses
+CHUNK_SECONDS = float(os.environ.get("LIVE_CHUNK_SECONDS", "10"))
+LIVE_VAD = os.environ.get("LIVE_VAD", "1").lower() not in ("0", "false", "no")
+IDLE_FLUSH_SECONDS = 1.0
+IDLE_EXIT_SECONDS = 600
+# Captured audio the worker can fall behind by (e.g. while the model loads) before samples are dropped
+BUFFER_SECONDS = float(os.environ.get("LIVE_BUFFER_SECONDS", "60"))
+POLL_SECONDS = 0.05
+# Replays this audio file instead of capturing the microphone, e.g. to try the page on a server without one
+LIVE_AUDIO_FILE = os.environ.get("LIVE_AUDIO_FILE")
+# "streaming" shows a partial tail that updates every STREAM_STEP_SECONDS; "segments" shows whole segments only
+LIVE_MODE = os.environ.get("LIVE_TRANSCRIPTION_MODE", "streaming")
+STREAM_STEP_SECONDS = float(os.environ.get("LIVE_STREAM_STEP_SECONDS", "1.0"))
+# Committed audio is dropped from the window once it is this long; a window never grows past the maximum
+STREAM_TRIM_SECONDS = 8.0
+STREAM_WINDOW_SECONDS = 15.0
+PROMPT_CHARS = 200
+# Far more tokens than a window of speech needs; bounds a decode that gets stuck repeating itself
+STREAM_MAX_TOKENS = 128
 
 def load_whisper_model():
-    try:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = whisper.load_model("base", device=device)
-        return model
-    except Exception as e:
-        st.error(f"Failed to load Whisper model: {e}")
+    """The process-wide speech recognition model of the configured engine, loading in the background."""
+    model = get_asr_model()
+    if model.error is not None:
+        st.error(f"Failed to load the {model.engine} model: {model.error}")
         st.info("Try reinstalling with:")
         st.code("""
 pip uninstall torch torchaudio
 pip install torch torchaudio
 pip install --upgrade openai-whisper
+pip install --upgrade faster-whisper  # ASR_ENGINE=faster-whisper
         """)
+        if st.button("🔄 Retry loading the model"):
+            get_asr_model(reload=True)
+            st.rerun()
         return None
+    return model
 
-def record_audio(audio_queue, status_queue, control_flag):
-    sample_rate = 16000
-    chunk_duration = 5
+def new_audio_buffer(seconds=BUFFER_SECONDS):
+    return AudioRingBuffer(int(seconds * SAMPLE_RATE))
 
+def replay_audio(audio_buffer, control_flag, audio, block_seconds=0.1):
+    """Writes audio to the buffer at capture pace, standing in for the microphone."""
+    block = int(block_seconds * SAMPLE_RATE)
+    next_block = time.monotonic()
+    for i in range(0, len(audio), block):
+        if not control_flag['running']:
+            return
+        audio_buffer.write(audio[i:i + block])
+        next_block += block_seconds
+        time.sleep(max(0.0, next_block - time.monotonic()))
+
+def record_audio(audio_buffer, status_queue, control_flag):
     def callback(indata, frames, time_info, status):
+        # Runs on PortAudio's thread: copy into the preallocated ring, nothing else
         try:
             if status:
                 status_queue.put(f"Audio warning: {status}")
-            audio_queue.put(indata.copy())
+            audio_buffer.write(indata)
         except Exception as e:
             status_queue.put(f"Callback Error: {str(e)}")
 
+    if LIVE_AUDIO_FILE:
+        from whisper.audio import load_audio
+
+        replay_audio(audio_buffer, control_flag, load_audio(LIVE_AUDIO_FILE, SAMPLE_RATE))
+        return
+    if sd is None:
+        status_queue.put("Audio capture unavailable: the PortAudio library was not found")
+        return
+
     try:
-        with sd.InputStream(samplerate=sample_rate, channels=1, callback=callback):
+        with sd.InputStream(samplerate=SAMPLE_RATE, dtype='float32', channels=1, callback=callback):
             while control_flag['running']:
-                time.sleep(chunk_duration)
+                time.sleep(0.1)
     except Exception as e:
         status_queue.put(f"Stream Error: {str(e)}")
 
-def transcribe_audio_chunks():
-    if st.session_state['audio_queue'].empty():
-        return
+def _transcribe(model, audio, **options):
+    audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+    return model.transcribe(audio, fp16=False, temperature=0, no_speech_threshold=0.4, **options)
 
-    audio_chunks = []
-    while not st.session_state['audio_queue'].empty():
-        audio_chunks.append(st.session_state['audio_queue'].get())
+def transcribe_audio(model, audio):
+    """Transcribes a float32 16 kHz mono buffer in memory; Whisper takes the array as is, no file or ffmpeg."""
+    return _transcribe(model, audio)['text'].strip()
 
-    if not audio_chunks:
-        return
+def _confidence(probabilities):
+    probabilities = [p for p in probabilities if p is not None]
+    return round(float(np.mean(probabilities)), 3) if probabilities else None
+
+def transcribe_segments(model, audio, offset=0.0):
+    """Whisper segments of a buffer as {"start", "end", "text", "confidence"} dicts, in seconds from offset."""
+    segments = []
+    for segment in _transcribe(model, audio)['segments']:
+        text = segment['text'].strip()
+        if text:
+            # The probability of the decoded tokens, on average
+            confidence = np.exp(segment['avg_logprob']) if 'avg_logprob' in segment else None
+            segments.append({"start": offset + segment['start'], "end": offset + segment['end'], "text": text,
+                             "confidence": _confidence([confidence])})
+    return segments
 
-    audio_data = np.concatenate(audio_chunks)
+def transcribe_words(model, audio, offset=0.0, prompt=None):
+    """Whisper words of a buffer as {"start", "end", "word", "probability"} dicts, in seconds from offset."""
+    result = _transcribe(model, audio, word_timestamps=True, initial_prompt=prompt or None,
+                         condition_on_previous_text=False, sample_len=STREAM_MAX_TOKENS)
+    return [
+        {"start": offset + word['start'], "end": offset + word['end'], "word": word['word'],
+         "probability": word.get('probability')}
+        for segment in result['segments'] for word in segment.get('words', []) if word['word'].strip()
+    ]
 
-    # Create recordings folder if needed
-    recordings_dir = os.path.join(os.getcwd(), "recordings")
-    os.makedirs(recordings_dir, exist_ok=True)
+def _normalized(word):
+    return word['word'].strip().strip('.,!?;:"\'').lower()
 
-    # Define audio file path
-    audio_path = os.path.join(recordings_dir, "live_chunk.wav")
+def _join(words):
+    return "".join(word['word'] for word in words).strip()
 
-    try:
-        # Write the audio file
-        with wave.open(audio_path, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(16000)
-            wf.writeframes((audio_data * 32767).astype(np.int16).tobytes())
 
-        # Transcribe
-        result = st.session_state['whisper_model'].transcribe(audio_path, fp16=False, temperature=0, no_speech_threshold=0.4)
-        text = result['text'].strip()
+class StreamingTranscriber:
+    """Sliding-window streaming transcription that commits words two decodes agree on."""
 
-        if text:
-            # Update live session state
-            st.session_state['transcription_text'] += text + " "
+    def __init__(self, model, step_seconds=STREAM_STEP_SECONDS, vad=True, sample_rate=SAMPLE_RATE):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.step = int(step_seconds * sample_rate)
+        self.segmenter = VoiceActivitySegmenter(sample_rate, STREAM_WINDOW_SECONDS, enabled=vad)
+        self.audio = np.empty(0, dtype=np.float32)
+        self.offset = 0.0  # stream time of self.audio[0]
+        self.received = 0  # samples of speech since the last decode
+        self.committed = ""
+        self.committed_end = 0.0
+        self.hypothesis = []  # uncommitted words of the last decode
 
-    except Exception as e:
-        st.session_state['audio_status_queue'].put(f"Transcription error: {str(e)}")
+    @property
+    def partial(self):
+        return _join(self.hypothesis)
+
+    @property
+    def ready(self):
+        return self.received >= self.step
+
+    def _trim(self, seconds):
+        """Drops the audio before stream time seconds from the window."""
+        cut = min(len(self.audio), max(0, int(round((seconds - self.offset) * self.sample_rate))))
+        self.audio = self.audio[cut:]
+        self.offset += cut / self.sample_rate
+
+    def _decode(self):
+        self.received = 0
+        words = transcribe_words(self.model, self.audio, self.offset, self.committed[-PROMPT_CHARS:])
+        # Skip words of the window already committed, including a repeat at the boundary
+        words = [word for word in words if word['start'] > self.committed_end - 0.1]
+        if words and abs(words[0]['start'] - self.committed_end) < 1.0:
+            tail = [word.strip('.,!?;:"\'').lower() for word in self.committed.split()]
+            for n in range(min(5, len(words), len(tail)), 0, -1):
+                if [_normalized(word) for word in words[:n]] == tail[-n:]:
+                    words = words[n:]
+                    break
+        return words
+
+    def _commit(self, words):
+        if not words:
+            return []
+        text = _join(words)
+        self.committed = f"{self.committed} {text}".strip()
+        self.committed_end = words[-1]['end']
+        if len(self.audio) > STREAM_TRIM_SECONDS * self.sample_rate:
+            self._trim(self.committed_end)
+        return [{"start": words[0]['start'], "end": words[-1]['end'], "text": text,
+                 "confidence": _confidence([word.get('probability') for word in words])}]
+
+    def feed(self, block):
+        """Adds a capture block; returns the segment committed if it completes a pause, else []."""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        paused = self.segmenter.feed(block)
+        self.audio = np.concatenate([self.audio, block])
+        if paused:
+            return self.finish(flush=False)
+        if self.segmenter.in_speech:
+            self.received += len(block)
+        elif not self.hypothesis:
+            # Silence before any speech: keep only enough of it to lead into the next word
+            self._trim(self.offset + len(self.audio) / self.sample_rate - PADDING_SECONDS)
+        return []
+
+    def process(self):
+        """Decodes the window again and returns the newly agreed words as a segment (or [])."""
+        if len(self.audio) >= STREAM_WINDOW_SECONDS * self.sample_rate:
+            return self.finish(flush=False)
+        words = self._decode()
+        agreed = 0
+        for previous, current in zip(self.hypothesis, words):
+            if _normalized(previous) != _normalized(current):
+                break
+            agreed += 1
+        self.hypothesis = words[agreed:]
+        return self._commit(words[:agreed])
+
+    def finish(self, flush=True):
+        """Commits everything heard so far and starts an empty window."""
+        if flush:
+            self.segmenter.flush()
+        words = self._decode() if self.hypothesis or len(self.audio) >= self.sample_rate // 2 else []
+        self.hypothesis = []
+        segments = self._commit(words)
+        self._trim(self.offset + len(self.audio) / self.sample_rate)
+        return segments
+
+
+class SegmentBuffer:
+    """Transcript segments appended by a worker thread and read by the page."""
+
+    def __init__(self, log=None, tail=TAIL_SEGMENTS):
+        self._lock = threading.Lock()
+        self.log = log
+        self.tail = tail
+        self.offset = log.last_end if log is not None else 0.0
+        self._segments = log.read(max(0, len(log) - tail)) if log is not None else []
+        self._first = len(log) - len(self._segments) if log is not None else 0  # position of _segments[0]
+        self.partial = ""
+
+    def __len__(self):
+        with self._lock:
+            return self._first + len(self._segments)
+
+    def extend(self, segments):
+        if self.offset:
+            segments = [{**s, "start": s['start'] + self.offset, "end": s['end'] + self.offset} for s in segments]
+        with self._lock:
+            if self.log is not None:
+                self.log.append(segments)
+            self._segments.extend(segments)
+            if self.log is not None and len(self._segments) > self.tail:
+                dropped = len(self._segments) - self.tail
+                del self._segments[:dropped]
+                self._first += dropped
+
+    def since(self, index):
+        """Segments from position index on, so a reader only picks up what it has not seen."""
+        with self._lock:
+            if index >= self._first:
+                return self._segments[index - self._first:]
+            return self.log.read(index, self._first) + self._segments
+
+    def latest(self):
+        """The segments kept in memory, oldest first."""
+        with self._lock:
+            return list(self._segments)
+
+
+class TranscriptionWorker:
+    """Long-lived thread that transcribes one session's captured audio as it arrives."""
+
+    def __init__(self, model, audio_buffer, status_queue, chunk_seconds=CHUNK_SECONDS, vad=LIVE_VAD, mode=LIVE_MODE,
+                 log=None):
+        self.model = model
+        self.audio_buffer = audio_buffer
+        self.status_queue = status_queue
+        # Segment times are seconds of the session's recording time, dropped silence included
+        self.segmenter = VoiceActivitySegmenter(SAMPLE_RATE, chunk_seconds, enabled=vad)
+        self.streamer = StreamingTranscriber(model, vad=vad) if mode == "streaming" else None
+        self.segments = SegmentBuffer(log)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    def ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="transcription-worker", daemon=True)
+                self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Ends the thread after its current decode, e.g. before another worker takes over the audio buffer."""
+        self._stopped = True
+        with self._lock:
+            if self._thread is not None:
+                self._thread.join()
+
+    def _transcribe(self, speech_segments):
+        for speech in speech_segments:
+            try:
+                self.segments.extend(transcribe_segments(self.model, speech['audio'], speech['start']))
+            except Exception as e:
+                self.status_queue.put(f"Transcription error: {str(e)}")
+
+    def _stream(self, step):
+        try:
+            self.segments.extend(step())
+        except Exception as e:
+            self.status_queue.put(f"Transcription error: {str(e)}")
+        self.segments.partial = self.streamer.partial
+
+    def _feed(self, block):
+        if self.streamer is None:
+            self._transcribe(self.segmenter.feed(block))
+        else:
+            self._stream(lambda: self.streamer.feed(block))
+
+    def _run(self):
+        last_audio, flushed = time.monotonic(), True
+        step = self.streamer.step if self.streamer is not None else int(STREAM_STEP_SECONDS * SAMPLE_RATE)
+        while not self._stopped:
+            view = self.audio_buffer.peek(step)
+            now = time.monotonic()
+            if len(view):
+                # A backlog is fed a step at a time, decoding in between, so no window outgrows the maximum
+                while len(view):
+                    self._feed(view)
+                    self.audio_buffer.release(len(view))
+                    if self.streamer is not None and self.streamer.ready:
+                        self._stream(self.streamer.process)
+                    view = self.audio_buffer.peek(step)
+                last_audio, flushed = now, False
+            else:
+                time.sleep(POLL_SECONDS)
+            idle = now - last_audio
+            if not flushed and idle >= IDLE_FLUSH_SECONDS:
+                if self.streamer is None:
+                    self._transcribe(self.segmenter.flush())
+                else:
+                    self._stream(self.streamer.finish)
+                # Everything said before the pause is on disk, not only in the OS cache
+                if self.segments.log is not None:
+                    self.segments.log.sync()
+                flushed = True
+            if idle >= IDLE_EXIT_SECONDS:
+                return
+
+
+class LiveSession:
+    """The audio buffer, recorder and transcription worker of one logged session, shared by every page run."""
+
+    def __init__(self, model, log):
+        self.log = log
+        self.audio_buffer = new_audio_buffer()
+        self.status_queue = queue.Queue()
+        self.worker = TranscriptionWorker(model, self.audio_buffer, self.status_queue, log=log)
+        # Set by the page, which builds them on the worker's segments
+        self.summarizer = None
+        self.index = None
+        self.closed = False
+        self._control_flag = {'running': False}
+        self._recorder = None
+        self._lock = threading.Lock()
+
+    @property
+    def session_id(self):
+        return self.log.session_id
+
+    @property
+    def recording(self):
+        return self._control_flag['running'] and self._recorder is not None and self._recorder.is_alive()
+
+    def start_recording(self):
+        with self._lock:
+            self.worker.ensure_running()
+            if self.summarizer is not None:
+                self.summarizer.ensure_running()
+            if self.recording:
+                return
+            # A fresh flag per recorder, so one still winding down never writes next to the new one
+            self._control_flag = {'running': True}
+            self._recorder = threading.Thread(
+                target=record_audio, args=(self.audio_buffer, self.status_queue, self._control_flag),
+                name="audio-recorder", daemon=True,
+            )
+            self._recorder.start()
+
+    def stop_recording(self):
+        with self._lock:
+            self._control_flag['running'] = False
+            recorder = self._recorder
+        if recorder is not None:
+            recorder.join(timeout=1.0)
+        self.log.sync()
+
+    def close(self):
+        """Ends recording, transcription and summaries and closes the log; the session can be reopened from it."""
+        self.stop_recording()
+        self.worker.stop()
+        if self.summarizer is not None:
+            self.summarizer.stop()
+        self.log.close()
+        self.closed = True
+        with _sessions_lock:
+            if _live_sessions.get(self.session_id) is self:
+                del _live_sessions[self.session_id]
+
+
+_sessions_lock = threading.Lock()
+_live_sessions = {}
+
+
+def find_live_session(session_id):
+    """The open live session with this ID, if any, e.g. one still recording from before a reload."""
+    with _sessions_lock:
+        session = _live_sessions.get(session_id)
+    return session if session is not None and not session.closed else None
+
+
+def get_live_session(model, log):
+    """The process's live session of log; a page run after a reload gets the one still recording, not a second."""
+    with _sessions_lock:
+        session = _live_sessions.get(log.session_id)
+        if session is None or session.closed:
+            session = LiveSession(model, log)
+            _live_sessions[log.session_id] = session
+        # Sessions nobody records into and whose worker has exited are closed; they reopen from their logs
+        idle = [other for other in _live_sessions.values()
+                if other is not session and not other.recording and not other.worker.running]
+    for other in idle:
+        other.close()
+    return session
+
+
+@st.fragment(run_every=1)
+def write_live_transcript():
+    # Shows the latest transcript kept by the worker (the rest is in the session log), without rerunning the page
+    worker = st.session_state.get('transcription_worker')
+    if not get_asr_model().ready:
+        st.caption("⏳ Loading the speech recognition model in the background; recorded audio waits for it")
+    # Passages for the chat are indexed as they close, so a question never waits for a backlog
+    if st.session_state.get('transcript_index') is not None:
+        st.session_state['transcript_index'].update()
+
+    while not st.session_state['audio_status_queue'].empty():
+        st.warning(st.session_state['audio_status_queue'].get())
+    audio_buffer = st.session_state.get('audio_buffer')
+    if audio_buffer is not None and audio_buffer.dropped:
+        st.caption(f"⚠️ {audio_buffer.dropped / SAMPLE_RATE:.1f}s of audio dropped in {audio_buffer.overflows} "
+                   f"overflows: transcription fell more than {audio_buffer.capacity / SAMPLE_RATE:.0f}s behind")
+    if worker is None:
+        return
 
-    finally:
-        if os.path.exists(audio_path):
-            os.remove(audio_path) 
\ No newline at end of file
+    # The partial tail is shown greyed out after the committed text until the worker commits it
+    latest, partial = worker.segments.latest(), worker.segments.partial
+    earlier = len(worker.segments) - len(latest)
+    if latest or partial:
+        if earlier:
+            st.caption(f"Showing the latest {len(latest)} segments; {earlier} earlier ones are in the session log")
+        text = " ".join(segment['text'] for segment in latest)
+        with st.container(height=200):
+            st.markdown(text + (f" :gray[{partial.replace('[', '(').replace(']', ')')}]" if partial else ""))
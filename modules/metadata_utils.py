@@ -0,0 +1,70 @@
+import re
+from datetime import datetime, timedelta
+
+SOURCE_TYPES = ("video", "website", "document", "note", "live_session")
+DATE_RANGES = ("Any time", "Today", "This week", "This month", "This year")
+
+
+def tag_key(tag):
+    """Metadata key used to store a tag as a filterable boolean flag."""
+    return "tag_" + re.sub(r"\W+", "_", tag.strip().lower()).strip("_")
+
+
+def parse_tags(text):
+    return [t.strip() for t in (text or "").split(",") if t.strip()]
+
+
+def build_metadata(source_type, url=None, video_id=None, tags=None, title=None, created=None):
+    """Builds the structured metadata stored with every chunk of a document."""
+    if source_type not in SOURCE_TYPES:
+        raise ValueError(f"Unknown source type '{source_type}', expected one of {SOURCE_TYPES}")
+    created = created or datetime.now()
+    metadata = {
+        "source_type": source_type,
+        "created_at": int(created.timestamp()),
+        "created_date": created.strftime("%Y-%m-%d"),
+    }
+    if url:
+        metadata["url"] = url
+    if video_id:
+        metadata["video_id"] = video_id
+    if title:
+        metadata["title"] = title
+    tags = tags or []
+    # Chroma metadata only holds scalars: tags are joined for display and stored as one flag each for where filters
+    if tags:
+        metadata["tags"] = ", ".join(tags)
+        for tag in tags:
+            metadata[tag_key(tag)] = True
+    return metadata
+
+
+def date_range_start(label, now=None):
+    """Start of a named date range such as 'This month', or None for 'Any time'."""
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if label == "Today":
+        return today
+    if label == "This week":
+        return today - timedelta(days=today.weekday())
+    if label == "This month":
+        return today.replace(day=1)
+    if label == "This year":
+        return today.replace(month=1, day=1)
+    return None
+
+
+def build_where(source_types=None, since=None, until=None, tags=None):
+    """Builds a Chroma where clause from the filters, or None when nothing is filtered."""
+    clauses = []
+    if source_types:
+        clauses.append({"source_type": {"$in": list(source_types)}})
+    if since:
+        clauses.append({"created_at": {"$gte": int(since.timestamp())}})
+    if until:
+        clauses.append({"created_at": {"$lt": int(until.timestamp())}})
+    for tag in tags or []:
+        clauses.append({tag_key(tag): True})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
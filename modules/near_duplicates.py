@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+from .db_registry import CHROMA_PATH
+
+# Documents at least this similar (Jaccard over word shingles) count as the same document
+DUPLICATE_THRESHOLD = float(os.environ.get("DUPLICATE_THRESHOLD", "0.9"))
+# "skip" keeps the stored copy, "replace" swaps it for the new one, "off" ingests everything
+DUPLICATE_POLICY = os.environ.get("DUPLICATE_POLICY", "skip")
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs at 0.9 similarity share a band with >99% probability, pairs at 0.5 with ~6%
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(1)
+# a * x stays below 2**63 for 32-bit shingle hashes, so the permutations never overflow uint64
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """Stable 32-bit hashes of the text's word n-grams."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(text):
+    """MinHash signature (NUM_PERM uint64 values) of a document's shingle set."""
+    hashes = shingle_hashes(text)
+    signature = np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    # Blocks of shingles bound the (NUM_PERM x block) temporary matrix for long documents
+    for start in range(0, len(hashes), 4096):
+        block = hashes[start:start + 4096]
+        permuted = (np.outer(_PERM_A, block) + _PERM_B[:, None]) % np.uint64(_MERSENNE_PRIME)
+        signature = np.minimum(signature, permuted.min(axis=1))
+    return signature
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def _band_keys(signature):
+    return [
+        hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).hexdigest()
+        for band in range(LSH_BANDS)
+    ]
+
+
+def document_id(text):
+    """Identifier stored as "doc_id" on every chunk of a document."""
+    return "D" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class DuplicateIndex:
+    """MinHash-LSH index of the documents in one collection, stored next to it."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "doc_id TEXT PRIMARY KEY, signature BLOB NOT NULL, title TEXT, added_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, key TEXT NOT NULL, doc_id TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bands_key ON bands (band, key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bands_doc ON bands (doc_id)")
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def find(self, signature, threshold=DUPLICATE_THRESHOLD):
+        """Returns (doc_id, title, similarity) of the most similar stored document, or None."""
+        keys = _band_keys(signature)
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(keys):
+                candidates.update(row[0] for row in self._conn.execute(
+                    "SELECT doc_id FROM bands WHERE band = ? AND key = ?", (band, key)))
+            best = None
+            for doc_id in candidates:
+                blob, title = self._conn.execute(
+                    "SELECT signature, title FROM signatures WHERE doc_id = ?", (doc_id,)).fetchone()
+                score = similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+                if score >= threshold and (best is None or score > best[2]):
+                    best = (doc_id, title, score)
+        return best
+
+    def add(self, doc_id, signature, title=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (doc_id, signature, title, added_at) VALUES (?, ?, ?, ?)",
+                (doc_id, signature.astype(np.uint64).tobytes(), title, time.time()),
+            )
+            self._conn.execute("DELETE FROM bands WHERE doc_id = ?", (doc_id,))
+            self._conn.executemany("INSERT INTO bands (band, key, doc_id) VALUES (?, ?, ?)",
+                                   [(band, key, doc_id) for band, key in enumerate(_band_keys(signature))])
+            self._conn.commit()
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM signatures WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM bands WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
+
+    def backup(self, destination):
+        """Copies the index to a new SQLite file, consistent even while it is being written."""
+        with self._lock:
+            target = sqlite3.connect(destination)
+            self._conn.backup(target)
+            target.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def duplicate_index_path(name, path=CHROMA_PATH):
+    return os.path.join(path, f"{name}.minhash.sqlite3")
+
+
+def get_duplicate_index(name, path=CHROMA_PATH):
+    """Returns the shared near-duplicate index of a collection."""
+    key = (path, name)
+    with _lock:
+        index = _indexes.get(key)
+        if index is None:
+            os.makedirs(path, exist_ok=True)
+            index = DuplicateIndex(duplicate_index_path(name, path))
+            _indexes[key] = index
+    return index
+
+
+def copy_duplicate_index(source, target, path=CHROMA_PATH):
+    """Seeds a shadow collection's index from the collection it is rebuilt from (doc_ids carry over)."""
+    target_path = duplicate_index_path(target, path)
+    if os.path.exists(target_path) or not os.path.exists(duplicate_index_path(source, path)):
+        return
+    get_duplicate_index(source, path).backup(target_path)
+
+
+def forget_duplicate_index(name, path=CHROMA_PATH):
+    """Drops the shared index of a deleted collection and its file."""
+    with _lock:
+        index = _indexes.pop((path, name), None)
+    if index is not None:
+        index.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(duplicate_index_path(name, path) + suffix):
+            os.remove(duplicate_index_path(name, path) + suffix)
@@ -1,51 +1,156 @@
+import hashlib
 import os
+import threading
+from datetime import datetime
 import streamlit as st
-from fpdf import FPDF
-def generate_pdf_of_youtube_summaries():
-    """Generates a PDF containing the summary and Q&A."""
-    data_folder = "data"
-    os.makedirs(data_folder, exist_ok=True)
-    pdf_path = os.path.join(data_folder, "summary.pdf")
+from fpdf import FPDF, set_global
+from .time_utils import clock_time
+
+FONT_FAMILY = "Noto"
+FONT_PATH = os.path.join("fonts", "NotoSans-Regular.ttf")
+FONT_SIZE = 5
+# Saved PDFs are named by their content, outside "data" so `filldb.py ingest data` never picks them up
+EXPORT_DIR = os.environ.get("PDF_EXPORT_DIR", "exports")
+
+# Metrics are cached per process below, so fpdf's .pkl files next to the font are not needed
+set_global("FPDF_CACHE_MODE", 1)
+
+_font_lock = threading.Lock()
+_fonts = {}
+
+
+def _copy_font(font):
+    # The glyph subset is filled per document; the parsed widths are shared read-only
+    return dict(font, subset=list(font["subset"])) if "subset" in font else dict(font)
+
 
-    pdf = FPDF()
+class ExportPDF(FPDF):
+    """FPDF that parses each TrueType font once per process instead of once per document."""
+
+    def add_font(self, family, style="", fname="", uni=False):
+        key = (family.lower(), style.upper(), fname, uni)
+        with _font_lock:
+            cached = _fonts.get(key)
+            if cached is None:
+                fonts, files = set(self.fonts), set(self.font_files)
+                super().add_font(family, style, fname, uni)
+                _fonts[key] = (
+                    {k: _copy_font(v) for k, v in self.fonts.items() if k not in fonts},
+                    {k: dict(v) for k, v in self.font_files.items() if k not in files},
+                )
+                return
+        fonts, files = cached
+        for fontkey, font in fonts.items():
+            if fontkey not in self.fonts:
+                self.fonts[fontkey] = dict(_copy_font(font), i=len(self.fonts) + 1)
+        for name, entry in files.items():
+            self.font_files.setdefault(name, dict(entry))
+
+
+def new_pdf():
+    pdf = ExportPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
-    pdf.add_font('Noto', '', 'fonts/NotoSans-Regular.ttf', uni=True)
-    pdf.set_font('Noto', '', 5)
+    pdf.add_font(FONT_FAMILY, '', FONT_PATH, uni=True)
+    pdf.set_font(FONT_FAMILY, '', FONT_SIZE)
+    return pdf
+
 
+def pdf_bytes(pdf):
+    """Renders the PDF in memory."""
+    output = pdf.output(dest='S')
+    # fpdf returns the document as a latin-1 str
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+def write_summary(pdf, summary, conversation_history=None):
     pdf.cell(200, 10, "Summary", ln=True, align='C')
     pdf.ln(10)
-    pdf.multi_cell(190, 10, st.session_state['summary']
-)
+    pdf.multi_cell(190, 10, summary)
+    if conversation_history is None:
+        return
 
     pdf.ln(10)
     pdf.cell(200, 10, "Questions & Answers", ln=True, align='C')
     pdf.ln(10)
+    page_width = pdf.w - 2 * pdf.l_margin
+    for i, (q, a) in enumerate(conversation_history):
+        pdf.multi_cell(page_width, 10, f"Q{i+1}: {q}")
+        pdf.multi_cell(page_width, 10, f"A{i+1}: {a}")
+        pdf.ln(5)
+
+
+def youtube_summary_pdf(summary, conversation_history):
+    """PDF bytes of a summary and its Q&A, e.g. for st.download_button."""
+    pdf = new_pdf()
+    write_summary(pdf, summary, conversation_history or [])
+    return pdf_bytes(pdf)
 
-    if st.session_state['conversation_history']:
-        page_width = pdf.w - 2 * pdf.l_margin
-        for i, (q, a) in enumerate(st.session_state['conversation_history']):
-            pdf.multi_cell(page_width, 10, f"Q{i+1}: {q}")
-            pdf.multi_cell(page_width, 10, f"A{i+1}: {a}")
-            pdf.ln(5)
 
-    pdf.output(pdf_path)
+def rough_notes_pdf(notes):
+    """PDF bytes of a rough note."""
+    pdf = new_pdf()
+    write_summary(pdf, notes)
+    return pdf_bytes(pdf)
+
+
+def document_pdf(document):
+    """PDF bytes of one stored document, a dict with its title, a line of details and the text of each page."""
+    pdf = new_pdf()
+    pdf.cell(200, 10, document["title"], ln=True, align='C')
+    if document["details"]:
+        pdf.multi_cell(190, 10, document["details"])
+    pdf.ln(5)
+    for text in document["pages"]:
+        pdf.multi_cell(190, 10, text)
+    return pdf_bytes(pdf)
+
+
+def content_key(*parts):
+    """Hash of the text a PDF is rendered from (the PDF bytes themselves carry a creation date)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def save_pdf(render, key, prefix="summary", folder=EXPORT_DIR):
+    """Writes render() to a path named by key, reusing an existing file."""
+    os.makedirs(folder, exist_ok=True)
+    pdf_path = os.path.join(folder, f"{prefix}-{key}.pdf")
+    if not os.path.exists(pdf_path):
+        data = render()
+        tmp_path = f"{pdf_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, pdf_path)
     return pdf_path
 
-def generate_pdf_of_rough_notes(notes):
+
+def generate_pdf_of_youtube_summaries():
     """Generates a PDF containing the summary and Q&A."""
-    data_folder = "data"
-    os.makedirs(data_folder, exist_ok=True)
-    pdf_path = os.path.join(data_folder, "summary.pdf")
+    summary, history = st.session_state['summary'], st.session_state['conversation_history']
+    return save_pdf(lambda: youtube_summary_pdf(summary, history), content_key(summary, history), "summary")
 
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.add_font('Noto', '', 'fonts/NotoSans-Regular.ttf', uni=True)
-    pdf.set_font('Noto', '', 5)
 
-    pdf.cell(200, 10, "Summary", ln=True, align='C')
-    pdf.ln(10)
-    pdf.multi_cell(190, 10, notes)
-    pdf.output(pdf_path)
-    return pdf_path
\ No newline at end of file
+def generate_pdf_of_rough_notes(notes):
+    """Generates a PDF containing the rough notes."""
+    return save_pdf(lambda: rough_notes_pdf(notes), content_key(notes), "note")
+
+
+def generate_pdf_of_live_session(meta, segments, paragraph_seconds=60):
+    """Generates a PDF of a live session's transcript, one timestamped paragraph per minute or so."""
+    paragraphs, current = [], []
+    for segment in segments:
+        if current and segment['start'] - current[0]['start'] >= paragraph_seconds:
+            paragraphs.append(current)
+            current = []
+        current.append(segment)
+    if current:
+        paragraphs.append(current)
+    document = {
+        "title": meta.get("title") or meta["id"],
+        "details": f"Live session recorded {datetime.fromtimestamp(meta['created_at']):%Y-%m-%d %H:%M}",
+        "pages": [f"[{clock_time(p[0]['start'])}] " + " ".join(s['text'] for s in p) for p in paragraphs],
+    }
+    return save_pdf(lambda: document_pdf(document), content_key(document), "live")
@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .bm25_index import BM25Index
+from .chunking import indexed_text
+from .db_registry import CHROMA_PATH, get_epoch
+from .embeddings import embed_query, collection_model
+
+RRF_K = 60
+CANDIDATES = 30
+REBUILD_PAGE_SIZE = 1000
+FILTER_CACHE_SIZE = 16
+
+_lock = threading.Lock()
+_indexes = {}  # (path, name) -> (BM25 index, collection epoch it holds)
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+_filter_lock = threading.Lock()
+_filter_ids = OrderedDict()  # (path, name, where, epoch) -> IDs matching where, least recently used first
+
+
+def get_lexical_index(collection, name=None, path=CHROMA_PATH):
+    """Returns the shared BM25 index of a collection, reloaded after writes from other processes."""
+    name = name or collection.name
+    key = (path, name)
+    with _lock:
+        # Read before loading, so a write that lands during the load is picked up next time
+        epoch = get_epoch(name, path)
+        index, loaded_epoch = _indexes.get(key, (None, None))
+        if index is None:
+            os.makedirs(path, exist_ok=True)
+            index = BM25Index(os.path.join(path, f"{name}.bm25.pkl")).load()
+            if len(index) != collection.count():
+                index = BM25Index(index.path)
+                offset = 0
+                while True:
+                    page = collection.get(include=["documents", "metadatas"], limit=REBUILD_PAGE_SIZE, offset=offset)
+                    if not page["ids"]:
+                        break
+                    index.add(page["ids"], [indexed_text(d, m) for d, m in zip(page["documents"], page["metadatas"])])
+                    offset += len(page["ids"])
+                index.compact()
+        elif loaded_epoch != epoch:
+            # Written since it was loaded, e.g. by filldb.py: its changes are in the snapshot and log
+            index.load()
+        _indexes[key] = (index, epoch)
+    return index
+
+
+def lexical_index_written(name, epoch, path=CHROMA_PATH):
+    """Records that the shared index already holds the write that moved the collection to epoch."""
+    with _lock:
+        if (path, name) in _indexes:
+            _indexes[(path, name)] = (_indexes[(path, name)][0], epoch)
+
+
+def forget_lexical_index(name, path=CHROMA_PATH):
+    """Drops the shared index of a deleted collection and its files."""
+    with _lock:
+        _indexes.pop((path, name), None)
+        index_path = os.path.join(path, f"{name}.bm25.pkl")
+        for file_path in (index_path, index_path + ".log"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merges ranked ID lists into one list of (id, score), best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def vector_search(collection, query, n_results=10, where=None):
+    embedding = embed_query(query, model_name=collection_model(collection))
+    results = collection.query(query_embeddings=[embedding], n_results=n_results, where=where)
+    return results["ids"][0]
+
+
+def _filtered_ids(collection, where, name, path):
+    # IDs matching a metadata filter, fetched from Chroma once per filter until the collection is written to
+    key = (path, name, json.dumps(where, sort_keys=True), get_epoch(name, path))
+    with _filter_lock:
+        ids = _filter_ids.get(key)
+        if ids is not None:
+            _filter_ids.move_to_end(key)
+            return ids
+    ids = frozenset(collection.get(where=where, include=[])["ids"])
+    with _filter_lock:
+        _filter_ids[key] = ids
+        while len(_filter_ids) > FILTER_CACHE_SIZE:
+            _filter_ids.popitem(last=False)
+    return ids
+
+
+def _lexical_search(collection, index, query, n_results, where=None, name=None, path=CHROMA_PATH):
+    # The metadata filter is pushed down to Chroma; BM25 only scores the matching IDs
+    allowed_ids = _filtered_ids(collection, where, name or collection.name, path) if where else None
+    return [doc_id for doc_id, _ in index.search(query, n_results, allowed_ids=allowed_ids)]
+
+
+def hybrid_search(collection, query, n_results=10, name=None, path=CHROMA_PATH, where=None):
+    """Runs the vector and BM25 queries in parallel and fuses them by reciprocal rank."""
+    index = get_lexical_index(collection, name, path)
+    vector_future = _pool.submit(vector_search, collection, query, CANDIDATES, where)
+    lexical_future = _pool.submit(_lexical_search, collection, index, query, CANDIDATES, where, name, path)
+    vector_ids = vector_future.result()
+    lexical_ids = lexical_future.result()
+
+    fused = reciprocal_rank_fusion([vector_ids, lexical_ids])[:n_results]
+    ids = [doc_id for doc_id, _ in fused]
+    found = collection.get(ids=ids, include=["documents", "metadatas"]) if ids else {"ids": [], "documents": [], "metadatas": []}
+    by_id = {doc_id: (doc, meta) for doc_id, doc, meta in zip(found["ids"], found["documents"], found["metadatas"])}
+
+    kept = [(doc_id, score) for doc_id, score in fused if doc_id in by_id]
+    return {
+        "ids": [[doc_id for doc_id, _ in kept]],
+        "documents": [[by_id[doc_id][0] for doc_id, _ in kept]],
+        "metadatas": [[by_id[doc_id][1] for doc_id, _ in kept]],
+        "scores": [[score for _, score in kept]],
+    }
@@ -0,0 +1,52 @@
+"""Lock-free single-producer/single-consumer ring buffer for captured audio."""
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Preallocated float32 ring with one writer thread and one reader thread."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        # Each counter is stored by one side only and an int store is atomic in CPython, so neither side locks
+        self._written = 0  # samples ever written; stored by the producer only
+        self._read = 0  # samples ever released; stored by the consumer only
+        self.dropped = 0  # samples lost to overflow
+        self.overflows = 0  # writes that lost samples
+
+    def __len__(self):
+        return self._written - self._read
+
+    def write(self, block):
+        """Producer: copies block in and returns how many of its samples did not fit and were dropped."""
+        block = np.asarray(block).reshape(-1)
+        written, count = self._written, len(block)
+        free = self.capacity - (written - self._read)
+        start = written % self.capacity
+        # Usual case: the block fits without wrapping around; assigning converts it to float32
+        if count <= free and start + count <= self.capacity:
+            self._buffer[start:start + count] = block
+            self._written = written + count
+            return 0
+        if count > free:
+            self.dropped += count - free
+            self.overflows += 1
+            count = free
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = block[:first]
+        self._buffer[:count - first] = block[first:count]
+        # Published only once the samples are in place
+        self._written = written + count
+        return len(block) - count
+
+    def peek(self, max_samples=None):
+        """Consumer: a view of the oldest unreleased samples up to the end of the array, valid until released."""
+        start = self._read % self.capacity
+        count = min(self._written - self._read, self.capacity - start)
+        if max_samples is not None:
+            count = min(count, max_samples)
+        return self._buffer[start:start + count]
+
+    def release(self, count):
+        """Consumer: hands the space of the first count peeked samples back to the producer."""
+        self._read += count
@@ -0,0 +1,134 @@
+"""Portable snapshots of a collection: IDs, documents, metadata and embeddings."""
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from .db_registry import CHROMA_PATH
+from .db_utils import UPSERT_BATCH_SIZE, connect_db, store_chunks
+from .near_duplicates import duplicate_index_path, get_duplicate_index, forget_duplicate_index
+
+SNAPSHOT_VERSION = 1
+EXPORT_PAGE_SIZE = 5000
+MANIFEST = "manifest.json"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_collection(name, output_dir, page_size=EXPORT_PAGE_SIZE, half=False, progress=print):
+    """Writes collection name to a new snapshot directory output_dir; returns the manifest."""
+    if os.path.exists(output_dir):
+        raise ValueError(f"Snapshot directory '{output_dir}' already exists")
+    collection = connect_db(name)
+    # Written under a temporary name, so an interrupted export never looks complete
+    tmp_dir = output_dir.rstrip("/\\") + ".partial"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    started = time.perf_counter()
+    files, rows, dim, offset = {}, 0, None, 0
+    while True:
+        page = collection.get(include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset)
+        if not len(page["ids"]):
+            break
+        part = f"part-{len(files) // 2:05d}"
+        embeddings = np.asarray(page["embeddings"], dtype=np.float16 if half else np.float32)
+        dim = embeddings.shape[1]
+        np.save(os.path.join(tmp_dir, part + ".npy"), embeddings)
+        with open(os.path.join(tmp_dir, part + ".jsonl"), "w", encoding="utf-8") as f:
+            for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                f.write(json.dumps({"id": chunk_id, "document": document, "metadata": metadata}, ensure_ascii=False) + "\n")
+        for file_name in (part + ".npy", part + ".jsonl"):
+            files[file_name] = file_sha256(os.path.join(tmp_dir, file_name))
+        rows += len(page["ids"])
+        offset += len(page["ids"])
+        elapsed = time.perf_counter() - started
+        progress(f"Exported {rows} rows ({rows / elapsed:.0f} rows/sec)")
+
+    if os.path.exists(duplicate_index_path(name, CHROMA_PATH)):
+        get_duplicate_index(name, CHROMA_PATH).backup(os.path.join(tmp_dir, "minhash.sqlite3"))
+        files["minhash.sqlite3"] = file_sha256(os.path.join(tmp_dir, "minhash.sqlite3"))
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "collection": name,
+        "metadata": collection.metadata or {},
+        "rows": rows,
+        "dim": dim,
+        "dtype": "float16" if half else "float32",
+        "files": files,
+        "created_at": int(time.time()),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_dir, output_dir)
+    elapsed = time.perf_counter() - started
+    manifest["seconds"] = elapsed
+    manifest["rows_per_sec"] = rows / elapsed if elapsed else 0.0
+    return manifest
+
+
+def read_manifest(snapshot_dir):
+    with open(os.path.join(snapshot_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')}")
+    return manifest
+
+
+def _verified(snapshot_dir, manifest, file_name):
+    path = os.path.join(snapshot_dir, file_name)
+    if file_sha256(path) != manifest["files"][file_name]:
+        raise ValueError(f"Checksum mismatch for {file_name}; the snapshot is corrupt")
+    return path
+
+
+def verify_snapshot(snapshot_dir):
+    """Checks every file of a snapshot against its manifest checksum; returns the manifest."""
+    manifest = read_manifest(snapshot_dir)
+    for file_name in manifest["files"]:
+        _verified(snapshot_dir, manifest, file_name)
+    return manifest
+
+
+def import_collection(snapshot_dir, name=None, batch_size=UPSERT_BATCH_SIZE, progress=print):
+    """Loads a snapshot into collection name (default: the exported one) without re-embedding."""
+    # Every file is checked before the first write, so a corrupt snapshot leaves the collection untouched
+    manifest = verify_snapshot(snapshot_dir)
+    name = name or manifest["collection"]
+    collection = connect_db(name, manifest["metadata"] or None)
+    if collection.count():
+        progress(f"'{name}' already holds {collection.count()} rows; rows with the same IDs are overwritten")
+
+    started = time.perf_counter()
+    rows = 0
+    parts = sorted(f[:-len(".npy")] for f in manifest["files"] if f.endswith(".npy"))
+    for part in parts:
+        embeddings = np.load(os.path.join(snapshot_dir, part + ".npy")).astype(np.float32)
+        ids, documents, metadatas = [], [], []
+        with open(os.path.join(snapshot_dir, part + ".jsonl"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                documents.append(record["document"])
+                metadatas.append(record["metadata"])
+        if len(ids) != len(embeddings):
+            raise ValueError(f"{part}: {len(ids)} records but {len(embeddings)} embeddings")
+        store_chunks(collection, documents, metadatas, ids, embeddings, batch_size)
+        rows += len(ids)
+        elapsed = time.perf_counter() - started
+        progress(f"Imported {rows}/{manifest['rows']} rows ({rows / elapsed:.0f} rows/sec)")
+
+    if "minhash.sqlite3" in manifest["files"] and not len(get_duplicate_index(name, CHROMA_PATH)):
+        forget_duplicate_index(name, CHROMA_PATH)
+        shutil.copyfile(os.path.join(snapshot_dir, "minhash.sqlite3"), duplicate_index_path(name, CHROMA_PATH))
+
+    elapsed = time.perf_counter() - started
+    return {"collection": name, "rows": rows, "seconds": elapsed, "rows_per_sec": rows / elapsed if elapsed else 0.0}
@@ -0,0 +1,3 @@
+def clock_time(seconds):
+    """mm:ss of a time in the session."""
+    return f"{int(seconds) // 60:02d}:{int(seconds) % 60:02d}"
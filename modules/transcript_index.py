@@ -0,0 +1,127 @@
+"""Searchable index of a live session's transcript, built as it grows."""
+import os
+import threading
+from collections import deque
+import numpy as np
+from .bm25_index import BM25Index
+from .embeddings import EMBEDDING_MODEL, get_embedder
+from .retrieval import CANDIDATES, reciprocal_rank_fusion
+from .time_utils import clock_time
+
+PASSAGE_SECONDS = 30.0
+TOP_K = 4
+RECENT_SECONDS = float(os.environ.get("LIVE_CHAT_RECENT_SECONDS", "120"))
+
+
+class TranscriptIndex:
+    """BM25 and embedding index over the passages of one session's transcript segments."""
+
+    def __init__(self, segments, embedding_model=EMBEDDING_MODEL, passage_seconds=PASSAGE_SECONDS):
+        self.segments = segments
+        self.passage_seconds = passage_seconds
+        self.passages = []  # {"start", "end", "text"}, indexed under their position as ID
+        self.error = None
+        self._embedding_model = embedding_model
+        self._embed = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._bm25 = BM25Index()
+        self._open = []  # segments of the passage being filled
+        self._recent = deque()  # segments of the last RECENT_SECONDS or so
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    def _embedder(self):
+        if self._embed is None and self._embedding_model:
+            try:
+                self._embed = get_embedder(self._embedding_model)
+            except Exception as e:
+                self._disable_embeddings(e)
+        return self._embed
+
+    def _disable_embeddings(self, error):
+        self.error = f"Transcript embeddings unavailable, searching by keywords only: {error}"
+        self._embedding_model = self._embed = None
+
+    def _embedded(self, texts):
+        embed = self._embedder()
+        if embed is None:
+            return None
+        try:
+            vectors = np.asarray(embed(texts), dtype=np.float32)
+        except Exception as e:
+            self._disable_embeddings(e)
+            return None
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def _index(self, passages):
+        first = len(self.passages)
+        self.passages.extend(passages)
+        self._bm25.add([str(first + i) for i in range(len(passages))], [p['text'] for p in passages])
+        vectors = self._embedded([p['text'] for p in passages])
+        if vectors is None:
+            return
+        if len(self._vectors) < len(self.passages):
+            # Grown by doubling, so adding a passage does not copy the whole matrix each time
+            rows = max(2 * len(self._vectors), len(self.passages), 64)
+            grown = np.zeros((rows, vectors.shape[1]), dtype=np.float32)
+            if first:
+                grown[:first] = self._vectors[:first]
+            self._vectors = grown
+        self._vectors[first:len(self.passages)] = vectors
+
+    def update(self, recent_seconds=RECENT_SECONDS):
+        """Indexes the segments that arrived since the last call; returns how many passages closed."""
+        with self._lock:
+            new = self.segments.since(self._cursor)
+            self._cursor += len(new)
+            closed = []
+            for segment in new:
+                self._open.append(segment)
+                self._recent.append(segment)
+                if segment['end'] - self._open[0]['start'] >= self.passage_seconds:
+                    closed.append({"start": self._open[0]['start'], "end": segment['end'],
+                                   "text": " ".join(s['text'] for s in self._open)})
+                    self._open = []
+            while self._recent and self._recent[0]['end'] < self._recent[-1]['end'] - recent_seconds:
+                self._recent.popleft()
+            if closed:
+                self._index(closed)
+            return len(closed)
+
+    def search(self, query, k=TOP_K, before=None):
+        """Up to k passages most relevant to query, in time order."""
+        with self._lock:
+            count = len(self.passages)
+            if before is not None:
+                count = next((i for i, p in enumerate(self.passages) if p['end'] > before), count)
+            if not count:
+                return []
+            allowed = None if count == len(self.passages) else {str(i) for i in range(count)}
+            rankings = [[doc_id for doc_id, _ in self._bm25.search(query, CANDIDATES, allowed_ids=allowed)]]
+            query_vector = self._embedded([query]) if len(self._vectors) >= count else None
+            if query_vector is not None:
+                scores = self._vectors[:count] @ query_vector[0]
+                top = np.argsort(-scores)[:CANDIDATES]
+                rankings.append([str(i) for i in top])
+            fused = reciprocal_rank_fusion(rankings)[:k]
+            return sorted((self.passages[int(doc_id)] for doc_id, _ in fused), key=lambda p: p['start'])
+
+    def recent(self, seconds=RECENT_SECONDS):
+        """Segments of the last `seconds` of transcript, oldest first."""
+        with self._lock:
+            if not self._recent:
+                return []
+            since = self._recent[-1]['end'] - seconds
+            return [s for s in self._recent if s['end'] >= since]
+
+    def context(self, query, k=TOP_K, recent_seconds=RECENT_SECONDS):
+        """Prompt context: the most relevant earlier passages, then the latest minutes verbatim."""
+        self.update(recent_seconds)
+        recent = self.recent(recent_seconds)
+        earlier = self.search(query, k, before=recent[0]['start'] if recent else None)
+        parts = [f"[{clock_time(p['start'])}] {p['text']}" for p in earlier]
+        if recent:
+            if earlier:
+                parts.append("...")
+            parts.append(f"[{clock_time(recent[0]['start'])}, most recent] " + " ".join(s['text'] for s in recent))
+        return "\n\n".join(parts)
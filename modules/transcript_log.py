@@ -0,0 +1,188 @@
+"""Append-only on-disk log of each live session's transcript segments."""
+import json
+import os
+import threading
+import time
+import uuid
+from array import array
+from datetime import datetime
+
+# Outside "data" so `filldb.py ingest data` never picks the logs up
+SESSIONS_DIR = os.environ.get("LIVE_SESSIONS_DIR", "live_sessions")
+# Appends are flushed at once but fsynced at most this often, so a power cut loses at most this much
+SYNC_SECONDS = float(os.environ.get("LIVE_LOG_SYNC_SECONDS", "2"))
+TAIL_SEGMENTS = 200
+
+_lock = threading.Lock()
+_logs = {}
+
+
+def new_session_id():
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _complete_lines(path):
+    """(offset, length, segment) of each whole line of a log, stopping at one cut short by a crash."""
+    if not os.path.exists(path):
+        return
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            try:
+                segment = json.loads(line)
+            except ValueError:
+                return
+            yield offset, len(line), segment
+            offset += len(line)
+
+
+class TranscriptLog:
+    """One session's segment log: appended by the transcription worker, read by anyone."""
+
+    def __init__(self, session_id, folder=SESSIONS_DIR, sync_seconds=SYNC_SECONDS):
+        self.session_id = session_id
+        self.folder = folder
+        self.sync_seconds = sync_seconds
+        self.path = os.path.join(folder, f"{session_id}.jsonl")
+        self.meta_path = os.path.join(folder, f"{session_id}.json")
+        os.makedirs(folder, exist_ok=True)
+        self.meta = {"id": session_id, "title": "", "created_at": time.time()}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.meta.update(json.load(f))
+        else:
+            _write_json(self.meta_path, self.meta)
+        self.last_end = 0.0
+        self._offsets = array('q')
+        self._lock = threading.Lock()
+        self._recover()
+        self._file = open(self.path, "ab")
+        self._synced = time.monotonic()
+        self._dirty = False
+
+    def _recover(self):
+        # Index the complete lines; a line cut short by a crash (no newline or bad JSON) is truncated away
+        good = 0
+        for offset, length, segment in _complete_lines(self.path):
+            self._offsets.append(offset)
+            self.last_end = segment['end']
+            good = offset + length
+        if os.path.exists(self.path) and good < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        self._size = good
+
+    def __len__(self):
+        return len(self._offsets)
+
+    @property
+    def title(self):
+        return self.meta.get("title") or ""
+
+    def set_title(self, title):
+        if title and title != self.title:
+            self.meta["title"] = title
+            _write_json(self.meta_path, self.meta)
+
+    def append(self, segments):
+        """Appends segments as lines; fsyncs if the last sync is SYNC_SECONDS old."""
+        if not segments:
+            return
+        with self._lock:
+            for segment in segments:
+                line = (json.dumps(segment, ensure_ascii=False) + "\n").encode("utf-8")
+                self._file.write(line)
+                self._offsets.append(self._size)
+                self._size += len(line)
+                self.last_end = segment['end']
+            self._file.flush()
+            self._dirty = True
+            if time.monotonic() - self._synced >= self.sync_seconds:
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._synced = time.monotonic()
+        self._dirty = False
+
+    def sync(self):
+        """Forces what was appended to disk, e.g. when recording stops."""
+        with self._lock:
+            if self._dirty and not self._file.closed:
+                self._sync()
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            self._file.close()
+        with _lock:
+            if _logs.get((self.folder, self.session_id)) is self:
+                del _logs[(self.folder, self.session_id)]
+
+    def read(self, start=0, stop=None):
+        """Segments from position start up to (not including) stop, read back from the file."""
+        with self._lock:
+            stop = len(self._offsets) if stop is None else min(stop, len(self._offsets))
+            if start >= stop:
+                return []
+            begin = self._offsets[start]
+            end = self._offsets[stop] if stop < len(self._offsets) else self._size
+        with open(self.path, "rb") as f:
+            f.seek(begin)
+            data = f.read(end - begin)
+        return [json.loads(line) for line in data.splitlines()]
+
+    def text(self):
+        """The whole transcript as one string."""
+        return " ".join(segment['text'] for segment in self.read())
+
+
+def open_log(session_id=None, title="", folder=SESSIONS_DIR):
+    """The process's one open log of a session, a new one if session_id is None."""
+    with _lock:
+        session_id = session_id or new_session_id()
+        log = _logs.get((folder, session_id))
+        if log is None:
+            log = TranscriptLog(session_id, folder)
+            _logs[(folder, session_id)] = log
+    log.set_title(title)
+    return log
+
+
+def read_session(session_id, folder=SESSIONS_DIR):
+    """(metadata, segments) of a logged session, read without opening it for appending."""
+    with open(os.path.join(folder, f"{session_id}.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta, [segment for _, _, segment in _complete_lines(os.path.join(folder, f"{session_id}.jsonl"))]
+
+
+def list_sessions(folder=SESSIONS_DIR):
+    """Metadata of the non-empty sessions in folder, newest first."""
+    if not os.path.isdir(folder):
+        return []
+    sessions = []
+    for name in os.listdir(folder):
+        if not name.endswith(".json"):
+            continue
+        log_path = os.path.join(folder, name[:-len(".json")] + ".jsonl")
+        size = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+        if not size:
+            continue
+        try:
+            with open(os.path.join(folder, name), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        sessions.append({**meta, "bytes": size})
+    return sorted(sessions, key=lambda meta: meta.get("created_at", 0), reverse=True)
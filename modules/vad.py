@@ -0,0 +1,169 @@
+"""Energy/zero-crossing voice activity detection for live audio."""
+import os
+from collections import deque
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+# A frame is speech when it is this much louder than the noise floor (the quiet end of recent non-speech frames)
+ENERGY_MARGIN_DB = float(os.environ.get("VAD_ENERGY_MARGIN_DB", "9"))
+# Quieter frames count as speech only when they look like unvoiced consonants (many zero crossings)
+ZCR_THRESHOLD = 0.25
+NOISE_PERCENTILE = 10
+NOISE_HISTORY_SECONDS = 10.0
+# Never call something this quiet speech, whatever the noise floor (digital silence has no floor)
+MIN_SPEECH_DB = -55.0
+# Pause that closes a segment of at least MIN_SEGMENT_SECONDS; MAX_PAUSE_SECONDS closes any
+MIN_PAUSE_SECONDS = 0.3
+MAX_PAUSE_SECONDS = 1.0
+MIN_SEGMENT_SECONDS = 3.0
+MAX_SEGMENT_SECONDS = float(os.environ.get("VAD_MAX_SEGMENT_SECONDS", "10"))
+# Segments with less speech than this are clicks or coughs and are dropped
+MIN_SPEECH_SECONDS = 0.25
+PADDING_SECONDS = 0.2
+# A capped segment is cut at the quietest frame of its last CUT_SEARCH_SECONDS
+CUT_SEARCH_SECONDS = 2.0
+
+
+def frame_features(frames):
+    """Log energy (dBFS) and zero-crossing rate of each row of a (frames, samples) array."""
+    energy_db = 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-12)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr
+
+
+def _frame_count(seconds):
+    return max(1, int(round(seconds / FRAME_SECONDS)))
+
+
+class VoiceActivitySegmenter:
+    """Turns a stream of audio blocks into speech segments cut at pauses."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, max_segment_seconds=MAX_SEGMENT_SECONDS, enabled=True):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.frame = int(FRAME_SECONDS * sample_rate)
+        self.min_pause = _frame_count(MIN_PAUSE_SECONDS)
+        self.max_pause = _frame_count(MAX_PAUSE_SECONDS)
+        self.min_segment = _frame_count(MIN_SEGMENT_SECONDS)
+        self.max_segment = _frame_count(max(max_segment_seconds, MIN_SEGMENT_SECONDS))
+        self.min_speech = _frame_count(MIN_SPEECH_SECONDS)
+        self.padding = _frame_count(PADDING_SECONDS)
+        self.cut_search = _frame_count(CUT_SEARCH_SECONDS)
+        self._history = deque(maxlen=_frame_count(NOISE_HISTORY_SECONDS))
+        self._remainder = np.empty(0, dtype=np.float32)
+        self._lead_in = deque(maxlen=self.padding)
+        self._frames, self._energies = [], []
+        self._start = 0
+        self._speech = 0
+        self._silence = 0
+        self.position = 0  # frames consumed
+        self.speech_seconds = 0.0  # audio kept in segments
+
+    @property
+    def elapsed(self):
+        return (self.position * self.frame + len(self._remainder)) / self.sample_rate
+
+    @property
+    def in_speech(self):
+        """Whether a segment is open, i.e. speech started and no pause has closed it yet."""
+        return bool(self._frames)
+
+    def _is_speech(self, energy_db, zcr):
+        if not self.enabled:
+            return np.ones(len(energy_db), dtype=bool)
+        # Until a non-speech frame is seen, the block itself sets the floor
+        history = np.fromiter(self._history, dtype=np.float64) if self._history else energy_db
+        floor = np.percentile(history, NOISE_PERCENTILE)
+        loud = energy_db > max(floor + ENERGY_MARGIN_DB, MIN_SPEECH_DB)
+        fricative = (energy_db > max(floor + ENERGY_MARGIN_DB / 2, MIN_SPEECH_DB)) & (zcr > ZCR_THRESHOLD)
+        speech = loud | fricative
+        # Only non-speech frames move the floor, so long continuous speech cannot raise it to its own level
+        self._history.extend(energy_db[~speech].tolist())
+        return speech
+
+    def _emit(self, count):
+        """Closes the first count frames of the open segment; returns it unless it is too little speech."""
+        frames, self._frames = self._frames[:count], self._frames[count:]
+        self._energies = self._energies[count:]
+        start = self._start
+        self._start += count
+        if self._speech < self.min_speech:
+            return None
+        self.speech_seconds += len(frames) * self.frame / self.sample_rate
+        return {
+            "start": start * self.frame / self.sample_rate,
+            "end": (start + count) * self.frame / self.sample_rate,
+            "audio": np.concatenate(frames),
+        }
+
+    def _close(self, keep_silence):
+        # Trailing silence beyond the padding is not part of the segment; it becomes the next lead-in
+        count = len(self._frames) - max(0, self._silence - keep_silence)
+        tail, energies = self._frames[count:], self._energies[count:]
+        segment = self._emit(count)
+        self._lead_in.extend(zip(tail, energies))
+        self._frames, self._energies = [], []
+        self._speech = self._silence = 0
+        return segment
+
+    def _cap(self):
+        # Cut at the quietest frame near the end, so a long monologue is not split mid-word
+        search = np.asarray(self._energies[-self.cut_search:])
+        cut = len(self._frames) - len(search) + int(np.argmin(search)) + 1
+        segment = self._emit(cut)
+        self._speech = len(self._frames)
+        self._silence = 0
+        return segment
+
+    def feed(self, block):
+        audio = np.concatenate([self._remainder, np.asarray(block, dtype=np.float32).reshape(-1)])
+        count = len(audio) // self.frame
+        self._remainder = audio[count * self.frame:]
+        if not count:
+            return []
+        frames = audio[:count * self.frame].reshape(count, self.frame)
+        energy_db, zcr = frame_features(frames)
+        speech = self._is_speech(energy_db, zcr)
+
+        segments = []
+        for i in range(count):
+            if not self._frames:
+                if not speech[i]:
+                    self._lead_in.append((frames[i], energy_db[i]))
+                    self.position += 1
+                    continue
+                # Speech starts: open a segment with the preceding silence as lead-in
+                self._frames = [frame for frame, _ in self._lead_in]
+                self._energies = [energy for _, energy in self._lead_in]
+                self._start = self.position - len(self._frames)
+                self._lead_in.clear()
+            self._frames.append(frames[i])
+            self._energies.append(energy_db[i])
+            self.position += 1
+            if speech[i]:
+                self._speech += 1
+                self._silence = 0
+            else:
+                self._silence += 1
+            closed = None
+            if self._silence >= self.max_pause or (self._silence >= self.min_pause and len(self._frames) >= self.min_segment):
+                closed = self._close(self.padding)
+            elif len(self._frames) >= self.max_segment:
+                closed = self._cap()
+            if closed is not None:
+                segments.append(closed)
+        return segments
+
+    def flush(self):
+        """Closes the open segment (and any partial frame); returns it as a list of at most one segment."""
+        if len(self._remainder):
+            segments = self.feed(np.zeros(self.frame - len(self._remainder), dtype=np.float32))
+        else:
+            segments = []
+        if self._frames:
+            segment = self._close(self.padding)
+            if segment is not None:
+                segments.append(segment)
+        return segments
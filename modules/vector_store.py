@@ -0,0 +1,418 @@
+"""Memory-mapped NumPy vector store, usable in place of ChromaDB."""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import numpy as np
+
+VECTOR_DTYPE = os.environ.get("NUMPY_VECTOR_DTYPE", "float16")  # "float16" or "int8"
+IVF_MIN_ROWS = 50000       # brute force below this many rows
+IVF_NPROBE = 8             # minimum inverted lists scanned per query
+IVF_PROBE_FRACTION = 0.1   # ... or this share of all lists, whichever is larger
+IVF_REBUILD_RATIO = 0.2    # rebuild when this share of rows is not in the IVF lists yet
+SCAN_BLOCK_ROWS = 65536    # rows scored per block, bounds temporary memory
+INITIAL_CAPACITY = 1024
+
+
+class NumpyCollection:
+    def __init__(self, name, directory, metadata=None):
+        self.name = name
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding="utf-8") as f:
+                self._meta = json.load(f)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self._meta = {"metadata": metadata or {}, "dim": None, "dtype": VECTOR_DTYPE,
+                          "count": 0, "capacity": 0, "ivf_rows": 0, "deleted": 0}
+            self._save_meta()
+        self._vectors = None
+        self._scales = None
+        self._ivf = None
+        self._db = None
+
+    @property
+    def metadata(self):
+        return self._meta["metadata"] or None
+
+    # --- storage helpers ---
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _records(self):
+        if self._db is None:
+            self._db = sqlite3.connect(os.path.join(self.directory, "records.sqlite3"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS records (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+                "document TEXT, metadata TEXT)"
+            )
+        return self._db
+
+    def _open_vectors(self):
+        if self._vectors is None and self._meta["capacity"]:
+            dtype = np.int8 if self._meta["dtype"] == "int8" else np.float16
+            vectors = np.lib.format.open_memmap(os.path.join(self.directory, "vectors.npy"), mode="r+")
+            if vectors.dtype != dtype:
+                raise ValueError(f"{self.directory}: vectors.npy holds {vectors.dtype} vectors, "
+                                 f"but the store's metadata says {np.dtype(dtype)}")
+            self._vectors = vectors
+            if self._meta["dtype"] == "int8":
+                self._scales = np.lib.format.open_memmap(os.path.join(self.directory, "scales.npy"), mode="r+")
+        return self._vectors
+
+    def _grow(self, needed):
+        capacity = self._meta["capacity"]
+        if needed <= capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, capacity * 2, needed)
+        dtype = np.int8 if self._meta["dtype"] == "int8" else np.float16
+        old = self._open_vectors()
+        vectors = np.lib.format.open_memmap(os.path.join(self.directory, "vectors.npy.tmp"), mode="w+",
+                                            dtype=dtype, shape=(new_capacity, self._meta["dim"]))
+        scales = None
+        if self._meta["dtype"] == "int8":
+            scales = np.lib.format.open_memmap(os.path.join(self.directory, "scales.npy.tmp"), mode="w+",
+                                               dtype=np.float32, shape=(new_capacity,))
+        count = self._meta["count"]
+        if old is not None and count:
+            vectors[:count] = old[:count]
+            if scales is not None:
+                scales[:count] = self._scales[:count]
+        vectors.flush()
+        del vectors
+        self._vectors = None
+        os.replace(os.path.join(self.directory, "vectors.npy.tmp"), os.path.join(self.directory, "vectors.npy"))
+        if scales is not None:
+            scales.flush()
+            del scales
+            self._scales = None
+            os.replace(os.path.join(self.directory, "scales.npy.tmp"), os.path.join(self.directory, "scales.npy"))
+        self._meta["capacity"] = new_capacity
+        self._save_meta()
+
+    def _encode(self, matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.maximum(norms, 1e-12)
+        if self._meta["dtype"] == "int8":
+            scales = np.maximum(np.abs(matrix).max(axis=1), 1e-12) / 127.0
+            return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return matrix.astype(np.float16), None
+
+    def _decode(self, rows):
+        vectors = self._open_vectors()[rows].astype(np.float32)
+        if self._meta["dtype"] == "int8":
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    # --- Chroma-compatible API ---
+
+    def count(self):
+        return self._meta["count"] - self._meta.get("deleted", 0)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            if self._meta["dim"] is None:
+                self._meta["dim"] = int(matrix.shape[1])
+            encoded, scales = self._encode(matrix)
+            db = self._records()
+            existing = dict(db.execute(
+                f"SELECT id, row FROM records WHERE id IN ({','.join('?' * len(ids))})", list(ids)
+            ).fetchall()) if ids else {}
+            rows = []
+            next_row = self._meta["count"]
+            for doc_id in ids:
+                if doc_id in existing:
+                    rows.append(existing[doc_id])
+                else:
+                    existing[doc_id] = next_row
+                    rows.append(next_row)
+                    next_row += 1
+            self._grow(next_row)
+            vectors = self._open_vectors()
+            vectors[rows] = encoded
+            if scales is not None:
+                self._scales[rows] = scales
+            db.executemany(
+                "INSERT OR REPLACE INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(row, doc_id, doc, json.dumps(meta) if meta is not None else None)
+                 for row, doc_id, doc, meta in zip(rows, ids, documents, metadatas)],
+            )
+            db.commit()
+            vectors.flush()
+            self._meta["count"] = next_row
+            self._save_meta()
+            if next_row >= IVF_MIN_ROWS and next_row - self._meta["ivf_rows"] > IVF_REBUILD_RATIO * max(self._meta["ivf_rows"], 1):
+                self.build_ivf()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        sql = "SELECT row, id, document, metadata FROM records"
+        clauses, params = [], []
+        if ids is not None:
+            if not ids:
+                return _empty_get(include)
+            clauses.append(f"id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if where:
+            where_sql, where_params = _where_sql(where)
+            clauses.append(where_sql)
+            params.extend(where_params)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY row"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+            if offset:
+                sql += f" OFFSET {int(offset)}"
+        with self._lock:
+            rows = self._records().execute(sql, params).fetchall()
+        result = {"ids": [r[1] for r in rows], "documents": None, "metadatas": None, "embeddings": None}
+        if "documents" in include:
+            result["documents"] = [r[2] for r in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(r[3]) if r[3] else None for r in rows]
+        if "embeddings" in include:
+            result["embeddings"] = self._decode(np.array([r[0] for r in rows], dtype=np.int64)) if rows else np.zeros((0, self._meta["dim"] or 0), np.float32)
+        return result
+
+    def query(self, query_embeddings, n_results=10, where=None, include=("documents", "metadatas", "distances")):
+        result = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        allowed = None
+        if where:
+            with self._lock:
+                where_sql, params = _where_sql(where)
+                allowed = np.array([r[0] for r in self._records().execute(
+                    f"SELECT row FROM records WHERE {where_sql}", params).fetchall()], dtype=np.int64)
+        # Deleted rows can still rank, so fetch enough extra to fill n_results after dropping them
+        extra = 0 if allowed is not None else self._meta.get("deleted", 0)
+        for embedding in query_embeddings:
+            rows, scores = self._search(np.asarray(embedding, dtype=np.float32), n_results + extra, allowed)
+            found = self._rows_to_records(rows)
+            kept = [(r, s) for r, s in zip(rows, scores) if r in found][:n_results]
+            rows, scores = [r for r, _ in kept], [s for _, s in kept]
+            result["ids"].append([found[r][0] for r in rows])
+            result["distances"].append([float(1.0 - s) for s in scores])
+            result["documents"].append([found[r][1] for r in rows])
+            result["metadatas"].append([found[r][2] for r in rows])
+        return result
+
+    def delete(self, ids=None, where=None):
+        """Drops records; their vector rows are zeroed and skipped by searches, not reused."""
+        with self._lock:
+            found = self.get(ids=ids, where=where, include=())
+            if not found["ids"]:
+                return
+            db = self._records()
+            placeholders = ",".join("?" * len(found["ids"]))
+            rows = [r[0] for r in db.execute(f"SELECT row FROM records WHERE id IN ({placeholders})", found["ids"])]
+            db.execute(f"DELETE FROM records WHERE id IN ({placeholders})", found["ids"])
+            db.commit()
+            vectors = self._open_vectors()
+            vectors[rows] = 0
+            vectors.flush()
+            self._meta["deleted"] = self._meta.get("deleted", 0) + len(rows)
+            self._save_meta()
+
+    def modify(self, metadata=None, name=None):
+        with self._lock:
+            if metadata is not None:
+                self._meta["metadata"] = metadata
+                self._save_meta()
+
+    # --- search ---
+
+    def _rows_to_records(self, rows):
+        if not len(rows):
+            return {}
+        with self._lock:
+            records = self._records().execute(
+                f"SELECT row, id, document, metadata FROM records WHERE row IN ({','.join('?' * len(rows))})",
+                [int(r) for r in rows],
+            ).fetchall()
+        return {r[0]: (r[1], r[2], json.loads(r[3]) if r[3] else None) for r in records}
+
+    def _score_rows(self, query, rows):
+        vectors = self._open_vectors()
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+            block = rows[start:start + SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = vectors[block].astype(np.float32) @ query
+            if self._meta["dtype"] == "int8":
+                scores[start:start + len(block)] *= self._scales[block]
+        return scores
+
+    def _score_range(self, query, count):
+        vectors = self._open_vectors()
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCAN_BLOCK_ROWS):
+            stop = min(start + SCAN_BLOCK_ROWS, count)
+            scores[start:stop] = vectors[start:stop].astype(np.float32) @ query
+            if self._meta["dtype"] == "int8":
+                scores[start:stop] *= self._scales[start:stop]
+        return scores
+
+    def _search(self, query, k, allowed=None):
+        count = self._meta["count"]
+        if not count or k <= 0:
+            return [], []
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            if allowed is not None:
+                rows = allowed
+                scores = self._score_rows(query, rows) if len(rows) else np.empty(0, np.float32)
+            elif self._meta["ivf_rows"]:
+                rows = self._ivf_candidates(query)
+                scores = self._score_rows(query, rows)
+            else:
+                rows = None
+                scores = self._score_range(query, count)
+        if not len(scores):
+            return [], []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        found_rows = top if rows is None else rows[top]
+        return [int(r) for r in found_rows], [float(s) for s in scores[top]]
+
+    # --- IVF ---
+
+    def _load_ivf(self):
+        if self._ivf is None:
+            self._ivf = (
+                np.load(os.path.join(self.directory, "ivf_centroids.npy")),
+                np.load(os.path.join(self.directory, "ivf_order.npy"), mmap_mode="r"),
+                np.load(os.path.join(self.directory, "ivf_offsets.npy")),
+            )
+        return self._ivf
+
+    def _ivf_candidates(self, query):
+        centroids, order, offsets = self._load_ivf()
+        n_probe = max(IVF_NPROBE, int(len(centroids) * IVF_PROBE_FRACTION))
+        probes = np.argsort(-(centroids @ query))[:n_probe]
+        parts = [np.asarray(order[offsets[p]:offsets[p + 1]]) for p in probes]
+        # Rows added since the last build are not in any list yet and are always scanned
+        parts.append(np.arange(self._meta["ivf_rows"], self._meta["count"], dtype=np.int64))
+        return np.concatenate(parts).astype(np.int64)
+
+    def build_ivf(self, n_lists=None, iterations=10, sample_size=100000, seed=0):
+        """Clusters the rows with k-means and stores one inverted list per centroid."""
+        with self._lock:
+            count = self._meta["count"]
+            n_lists = n_lists or max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+            sample = self._decode(sample_rows)
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(n_lists):
+                    members = sample[assignment == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+            assignment = np.empty(count, dtype=np.int32)
+            for start in range(0, count, SCAN_BLOCK_ROWS):
+                stop = min(start + SCAN_BLOCK_ROWS, count)
+                assignment[start:stop] = np.argmax(self._decode(np.arange(start, stop)) @ centroids.T, axis=1)
+            order = np.argsort(assignment, kind="stable").astype(np.int64)
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))]).astype(np.int64)
+
+            np.save(os.path.join(self.directory, "ivf_centroids.npy"), centroids.astype(np.float32))
+            np.save(os.path.join(self.directory, "ivf_order.npy"), order)
+            np.save(os.path.join(self.directory, "ivf_offsets.npy"), offsets)
+            self._ivf = None
+            self._meta["ivf_rows"] = count
+            self._save_meta()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._vectors = None
+            self._scales = None
+            self._ivf = None
+
+
+def _empty_get(include):
+    return {"ids": [], "documents": [] if "documents" in include else None,
+            "metadatas": [] if "metadatas" in include else None, "embeddings": None}
+
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _where_sql(where):
+    """Translates a Chroma where clause into SQL over the metadata JSON column."""
+    if "$and" in where or "$or" in where:
+        op = "$and" if "$and" in where else "$or"
+        parts = [_where_sql(clause) for clause in where[op]]
+        joiner = " AND " if op == "$and" else " OR "
+        return "(" + joiner.join(p[0] for p in parts) + ")", [v for p in parts for v in p[1]]
+    clauses, params = [], []
+    for key, condition in where.items():
+        column = f"json_extract(metadata, '$.\"{key}\"')"
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, value in condition.items():
+            if op in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(value))
+                clauses.append(f"{column} {'IN' if op == '$in' else 'NOT IN'} ({placeholders})")
+                params.extend(int(v) if isinstance(v, bool) else v for v in value)
+            else:
+                clauses.append(f"{column} {_OPERATORS[op]} ?")
+                params.append(int(value) if isinstance(value, bool) else value)
+    return "(" + " AND ".join(clauses) + ")", params
+
+
+class NumpyClient:
+    """Directory of NumpyCollections with the ChromaDB client methods the app uses."""
+
+    def __init__(self, path):
+        self.root = os.path.join(path, "numpy_store")
+        self._lock = threading.Lock()
+        self._collections = {}
+
+    def heartbeat(self):
+        return time.time_ns()
+
+    def _directory(self, name):
+        return os.path.join(self.root, name)
+
+    def get_collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                if not os.path.exists(os.path.join(self._directory(name), "meta.json")):
+                    raise ValueError(f"Collection {name} does not exist.")
+                self._collections[name] = NumpyCollection(name, self._directory(name))
+            return self._collections[name]
+
+    def get_or_create_collection(self, name, metadata=None):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = NumpyCollection(name, self._directory(name), metadata)
+            return self._collections[name]
+
+    def list_collections(self):
+        if not os.path.isdir(self.root):
+            return []
+        return [self.get_collection(name) for name in sorted(os.listdir(self.root))
+                if os.path.exists(os.path.join(self._directory(name), "meta.json"))]
+
+    def delete_collection(self, name):
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(self._directory(name), ignore_errors=True)
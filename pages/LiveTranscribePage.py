@@ -1,5 +1,4 @@
 import streamlit as st
-import threading
 import queue
 import os
 import json
@@ -7,85 +6,115 @@ import time
 from datetime import datetime, timedelta
 from modules.mindmap_utils import generate_flowchart_prompt, parse_llm_response
 from modules.summarization import get_gemini_response
-from modules.live_transcriber import load_whisper_model, record_audio, transcribe_audio_chunks
+from modules.live_transcriber import find_live_session, get_live_session, load_whisper_model, write_live_transcript
+from modules.live_summarizer import LiveSummarizer, write_live_summary
+from modules.transcript_index import TranscriptIndex
+from modules.transcript_log import list_sessions, open_log, read_session
+from modules.pdf_generator import generate_pdf_of_live_session
+from modules.db_utils import add_to_db, write_ingest_jobs
+from modules.metadata_utils import build_metadata, parse_tags
 from streamlit_markmap import markmap
 
-# Constants
-SUMMARY_PROMPT = """
-You are a helpful teaching assistant. Summarize the following transcript segment from a {topic} session.
-Focus on the main points and key takeaways. If there are any technical terms or jargon, briefly explain them.
+def open_session(whisper_model, log):
+    """Makes log the page's live session, reattaching to its recording if one runs, and points the URL at it."""
+    previous = st.session_state['live_session']
+    if previous is not None and previous.session_id != log.session_id:
+        previous.close()
+    session = get_live_session(whisper_model, log)
+    if session.summarizer is None:
+        # Summarizes the new transcript every few minutes, so the final summary is one small merge
+        session.summarizer = LiveSummarizer(session.worker.segments, topic=log.title or "the session")
+        # Chat questions are answered from the relevant passages and the latest minutes, not the whole transcript
+        session.index = TranscriptIndex(session.worker.segments)
+    st.session_state.update({
+        'live_session': session,
+        'transcript_log': session.log,
+        'transcription_worker': session.worker,
+        'audio_buffer': session.audio_buffer,
+        'audio_status_queue': session.status_queue,
+        'live_summarizer': session.summarizer,
+        'transcript_index': session.index,
+        'is_recording': session.recording,
+    })
+    st.query_params['live_session'] = log.session_id
 
-Transcript:
-{transcript}
-
-Summary:
-"""
+def ingest_session(session_id, tags=None):
+    # The whole transcript, read back from its log, goes to the second brain as a live_session document
+    meta, segments = read_session(session_id)
+    pdf_path = generate_pdf_of_live_session(meta, segments)
+    created = datetime.fromtimestamp(meta['created_at'])
+    add_to_db(pdf_path, build_metadata("live_session", tags=tags, title=meta.get('title') or None, created=created))
 
 # Main Streamlit Page
 def LiveTranscribePage():
     st.title("🎤 Voice Transcription & Chat")
-    
-    # Session name input
-    session_name = st.text_input("📝 Session/Topic Name", 
-                              placeholder="Enter the name or topic of this session (e.g., 'Machine Learning Basics')")
-    
-    # Initialize session state for tracking
-    if 'last_summary_time' not in st.session_state:
-        st.session_state.last_summary_time = datetime.now()
-    if 'current_segment' not in st.session_state:
-        st.session_state.current_segment = ""
-    if 'segment_summaries' not in st.session_state:
-        st.session_state.segment_summaries = []
 
     # --- Session State Init ---
     for key, default in {
-        'whisper_model': None,
-        'audio_queue': None,
+        'live_session': None,
+        'audio_buffer': None,
         'audio_status_queue': None,
-        'transcription_text': "",
         'conversation_history': [],
         'is_recording': False,
-        'recording_control_flag': None,
+        'transcription_worker': None,
+        'transcript_log': None,
+        'live_summarizer': None,
+        'transcript_index': None,
         'segment_summaries': []
     }.items():
         if key not in st.session_state:
             st.session_state[key] = default
 
-    if st.session_state['audio_queue'] is None:
-        st.session_state['audio_queue'] = queue.Queue()
     if st.session_state['audio_status_queue'] is None:
         st.session_state['audio_status_queue'] = queue.Queue()
-    if st.session_state['recording_control_flag'] is None:
-        st.session_state['recording_control_flag'] = {'running': False}
 
-    # --- Whisper Model Load ---
-    if st.session_state['whisper_model'] is None:
-        with st.spinner("Loading Whisper model..."):
-            os.environ['CURL_CA_BUNDLE'] = ""
-            st.session_state['whisper_model'] = load_whisper_model()
-            if st.session_state['whisper_model'] is None:
-                return
+    # --- Whisper Model (one per process, shared by all sessions; loads in the background) ---
+    os.environ['CURL_CA_BUNDLE'] = ""
+    whisper_model = load_whisper_model()
+    if whisper_model is None:
+        return
+
+    # --- Recovery: a reload (or a restarted server) reopens the session named in the URL from its log ---
+    session_id = st.query_params.get('live_session')
+    # A recording still running from before the reload is reattached, never started a second time
+    if st.session_state['live_session'] is None and session_id:
+        # Checked first, since a recording can be running before its first segment reaches the log
+        live = find_live_session(session_id)
+        if live is not None or any(meta['id'] == session_id for meta in list_sessions()):
+            open_session(whisper_model, live.log if live is not None else open_log(session_id))
+            title = st.session_state['transcript_log'].title or session_id
+            if st.session_state['is_recording']:
+                st.info(f"Reattached to the running recording of session {title}")
+            else:
+                st.info(f"Reopened session {title} from its log")
+        else:
+            del st.query_params['live_session']
+    session = st.session_state['live_session']
+    # The recorder may have stopped elsewhere (another tab, a capture error)
+    st.session_state['is_recording'] = session is not None and session.recording
+
+    # Session name input
+    log = st.session_state['transcript_log']
+    session_name = st.text_input("📝 Session/Topic Name", value=log.title if log is not None else "",
+                              placeholder="Enter the name or topic of this session (e.g., 'Machine Learning Basics')")
 
     # --- Recording Controls ---
     start = st.button("🎙️ Start Recording")
     stop = st.button("⏹️ Stop Recording")
 
     if start and not st.session_state['is_recording']:
+        # One worker per session transcribes continuously, independent of page reruns, into the session's log
+        if session is None:
+            open_session(whisper_model, open_log(title=session_name))
+        elif session.closed:
+            # Closed while idle or from another tab: continue it from its log
+            open_session(whisper_model, open_log(session.session_id))
+        st.session_state['live_session'].start_recording()
         st.session_state['is_recording'] = True
-        st.session_state['recording_control_flag']['running'] = True
-        threading.Thread(
-            target=record_audio,
-            args=(
-                st.session_state['audio_queue'],
-                st.session_state['audio_status_queue'],
-                st.session_state['recording_control_flag'],
-            ),
-            daemon=True
-        ).start()
 
     if stop and st.session_state['is_recording']:
+        st.session_state['live_session'].stop_recording()
         st.session_state['is_recording'] = False
-        st.session_state['recording_control_flag']['running'] = False
 
     # --- Visual Mic Status Indicator ---
     mic_status = "🔴 Mic is LIVE" if st.session_state['is_recording'] else "⚫️ Mic is OFF"
@@ -107,31 +136,50 @@ def LiveTranscribePage():
     )
 
     st.markdown("---")
-    # --- Process incoming audio for transcription ---
-    transcribe_audio_chunks()
-    
-    # --- Process incoming audio for transcription ---
-    transcribe_audio_chunks()
+    # --- Live transcript and recording errors, polled from the transcription worker ---
+    write_live_transcript()
+    if st.session_state['live_summarizer'] is not None:
+        st.session_state['live_summarizer'].topic = session_name or "the session"
+        st.session_state['transcript_log'].set_title(session_name)
+    write_live_summary()
 
-    # --- Display any recording errors ---
-    while not st.session_state['audio_status_queue'].empty():
-        st.warning(st.session_state['audio_status_queue'].get())
+    # --- Past sessions, from their logs on disk ---
+    with st.expander("📚 Past sessions"):
+        sessions = list_sessions()
+        if not sessions:
+            st.caption("Recorded sessions are kept here, to reopen or add to your second brain")
+        else:
+            labels = {meta['id']: f"{meta.get('title') or 'Untitled'} — "
+                                  f"{datetime.fromtimestamp(meta['created_at']):%Y-%m-%d %H:%M} "
+                                  f"({meta['bytes'] / 1024:.0f} KB)" for meta in sessions}
+            selected = st.selectbox("Session", list(labels), format_func=labels.get, key="past_session")
+            session_tags = st.text_input("Tags (comma separated, optional)", key="past_session_tags")
+            reopen_col, ingest_col = st.columns(2)
+            with reopen_col:
+                current = st.session_state['transcript_log']
+                if st.button("📂 Reopen and continue", disabled=st.session_state['is_recording']
+                             or (current is not None and current.session_id == selected)):
+                    open_session(whisper_model, open_log(selected))
+                    st.rerun()
+            with ingest_col:
+                if st.button("🧠 Add transcript to second brain"):
+                    with st.spinner("💾 Saving transcript..."):
+                        ingest_session(selected, parse_tags(session_tags))
+            write_ingest_jobs()
 
-
-    
     # --- Summarize the transcription ---
     col1, col2 = st.columns(2)
     
     with col1:
         if st.button("📝 Summarize the entire transcription"):
             with st.spinner("🔍 Generating summary..."):
-                summary = get_gemini_response(
-                    SUMMARY_PROMPT.format(
-                        topic=session_name or "the session",
-                        transcript=st.session_state['transcription_text']
-                    ),
-                    model_name="gemini-2.0-flash"
-                )
+                if st.session_state['live_summarizer'] is not None:
+                    try:
+                        summary = st.session_state['live_summarizer'].final_summary()
+                    except RuntimeError as e:
+                        summary = str(e)
+                else:
+                    summary = "No transcription to summarize yet."
                 st.markdown(summary)
     
     # Mind Map Section
@@ -149,7 +197,9 @@ def LiveTranscribePage():
         try:
             with st.spinner("Generating mind map..."):
                 # Get the transcription text
-                transcription_text = st.session_state.get('transcription_text', '')
+                # The whole session, read back from its log
+                log = st.session_state['transcript_log']
+                transcription_text = log.text() if log is not None else ""
                 if not transcription_text:
                     st.warning("No transcription available to generate mind map")
                     st.stop()
@@ -279,7 +329,7 @@ def LiveTranscribePage():
 
     user_input = st.chat_input("Ask something based on what you've said...")
 
-    if user_input and st.session_state['transcription_text']:
+    if user_input and st.session_state['transcript_log'] is not None and len(st.session_state['transcript_log']):
         st.session_state['conversation_history'].append(("You", user_input))
         with st.chat_message('user'):            
             st.markdown(f"**You**: {user_input}")
@@ -287,10 +337,10 @@ def LiveTranscribePage():
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
                 prompt = f"""You are my in class teaching assistant, when I dont understand a concept in the class, you explain it to me in simple terms. And as brief as possible. For your reference, 
-                this is the  transcription of the class so far.
+                these are the parts of the class transcription most relevant to my question, with their times, and what was said most recently.
 
 Transcription:
-{st.session_state['transcription_text']}
+{st.session_state['transcript_index'].context(user_input)}
 
 User Query:
 {user_input}
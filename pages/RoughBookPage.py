@@ -1,7 +1,8 @@
 import streamlit as st
 import pyperclip
-from modules.db_utils import add_to_db
-from modules.pdf_generator import generate_pdf_of_rough_notes
+from modules.db_utils import add_to_db, write_ingest_jobs
+from modules.metadata_utils import build_metadata, parse_tags
+from modules.pdf_generator import generate_pdf_of_rough_notes, rough_notes_pdf
 from modules.summarization import get_gemini_response
 
 def RoughBookPage():
@@ -28,6 +29,8 @@ def RoughBookPage():
         height=400
     )
 
+    note_tags = st.text_input("Tags (comma separated, optional)", key="rough_note_tags")
+
     # Buttons: side by side
     col1, col2, col3 = st.columns([1, 1, 1])
 
@@ -35,8 +38,7 @@ def RoughBookPage():
         if st.button("💾 Add Note to DB"):
             with st.spinner("💾 Saving note..."):
                 pdf_path = generate_pdf_of_rough_notes(st.session_state['rough_notes'])
-                add_to_db(pdf_path)
-                st.success("Notes saved to DB")
+                add_to_db(pdf_path, build_metadata("note", tags=parse_tags(note_tags)))
 
     with col2:
         if st.button("🪄 Format Neatly"):
@@ -56,4 +58,9 @@ def RoughBookPage():
     with col3:
         if st.button("📋 Copy to Clipboard"):
             pyperclip.copy(st.session_state['rough_notes'])
-            st.success("Copied to clipboard!")
\ No newline at end of file
+            st.success("Copied to clipboard!")
+        notes = st.session_state['rough_notes']
+        st.download_button("📄 Download PDF", data=lambda: rough_notes_pdf(notes), file_name="notes.pdf",
+                           mime="application/pdf", on_click="ignore", disabled=not notes)
+
+    write_ingest_jobs()
\ No newline at end of file
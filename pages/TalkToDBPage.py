@@ -1,14 +1,38 @@
 import streamlit as st
-from modules.db_utils import talk_to_db, write_db_conversation_history
+from modules.db_utils import talk_to_db, write_db_conversation_history, write_db_status, write_ingest_jobs
+from modules.metadata_utils import SOURCE_TYPES, DATE_RANGES, date_range_start, parse_tags
+from modules.batch_export import EXPORT_FORMATS, enqueue_export, write_export_jobs
 
 
 def TalkToDBPage():
     
     st.title("Talk to Your Database 🧠")
+    write_db_status()
+    write_ingest_jobs()
+
+    with st.expander("🔎 Filters"):
+        source_types = st.multiselect("Source types", SOURCE_TYPES, format_func=lambda t: t.replace("_", " ").title())
+        date_range = st.selectbox("Created", DATE_RANGES)
+        tags = st.text_input("Tags (comma separated)", placeholder="E.g., lecture, rag")
+
+    filters = {
+        "source_types": source_types,
+        "since": date_range_start(date_range),
+        "tags": parse_tags(tags),
+    }
+
+    with st.expander("📦 Export"):
+        st.caption("Exports every saved document matching the filters above, in the background.")
+        export_format = st.radio("Format", EXPORT_FORMATS, horizontal=True,
+                                 format_func=lambda f: "PDF volumes" if f == "pdf" else "Markdown files (zip)")
+        if st.button("Export documents"):
+            job_id = enqueue_export(export_format, filters, f"{date_range} {export_format} export")
+            st.session_state.setdefault('export_jobs', []).append(job_id)
+        write_export_jobs()
 
     user_query = st.text_input("Ask something from the DB...", placeholder="E.g., What is quantum mechanics?")
     if st.button("Get Answer"):
-       response =  talk_to_db(user_query)
+       response =  talk_to_db(user_query, filters)
 
     if st.session_state['db_conversation']:
         write_db_conversation_history() 
\ No newline at end of file
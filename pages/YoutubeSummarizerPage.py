@@ -1,9 +1,10 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from modules.summarization import get_gemini_response
-from modules.pdf_generator import generate_pdf_of_youtube_summaries
-from modules.db_utils import add_to_db
-from modules.youtube_utils import fetch_transcript
+from modules.pdf_generator import generate_pdf_of_youtube_summaries, youtube_summary_pdf
+from modules.db_utils import add_to_db, write_ingest_jobs
+from modules.youtube_utils import fetch_transcript, get_video_id
+from modules.metadata_utils import build_metadata, parse_tags
 from modules.data_extraction import extract_numerical_data
 from modules.ask_questions import ask_question, write_conversation_history
 from modules.timeline_generator import extract_timeline
@@ -24,6 +25,21 @@ def is_youtube_url(url):
     return url and ("youtube.com/watch" in url or "youtu.be" in url)
 
 
+def summary_metadata(tags):
+    """Structured metadata for saving the current summary to the second brain."""
+    urls = st.session_state['youtube_urls']
+    youtube_urls = [url for url in urls if is_youtube_url(url)]
+    if youtube_urls:
+        source_type = "video"
+    elif urls:
+        source_type = "website"
+    else:
+        source_type = "document"
+    url = (youtube_urls or urls or [None])[0]
+    video_id = get_video_id(youtube_urls[0]) if youtube_urls else None
+    return build_metadata(source_type, url=url, video_id=video_id, tags=tags)
+
+
 def extract_text_from_pdf(file):
     pdf_reader = PyPDF2.PdfReader(file)
     text = ""
@@ -402,9 +418,17 @@ Transcript : ''' + combined_transcripts
     # This section has been moved and integrated into the main fetch_summary_clicked block above
 
     # Add Summary to DB
+    summary_tags = st.text_input("Tags (comma separated, optional)", key="summary_tags",
+                                 placeholder="E.g., lecture, rag")
     if st.button("Save Summary to DB"):
         
         pdf_file = generate_pdf_of_youtube_summaries()
 
-        # ✅ Run filldb.py to process the PDF into ChromaDB
-        add_to_db(pdf_file)
\ No newline at end of file
+        # ✅ Queue the PDF for the background ingestion worker
+        add_to_db(pdf_file, summary_metadata(parse_tags(summary_tags)))
+    if st.session_state['summary']:
+        # Rendered in memory only when clicked; nothing is written to disk
+        summary, history = st.session_state['summary'], list(st.session_state['conversation_history'])
+        st.download_button("📄 Download PDF", data=lambda: youtube_summary_pdf(summary, history),
+                           file_name="summary.pdf", mime="application/pdf", on_click="ignore")
+    write_ingest_jobs()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from modules import bm25_index
+from modules.bm25_index import BM25Index, tokenize
+from modules.db_registry import bump_epoch
+from modules.retrieval import forget_lexical_index, get_lexical_index
+from modules.vector_store import NumpyClient
+
+
+def _ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("What is the GPU's L2 cache?") == ["gpu", "s", "l2", "cache"]
+
+
+def test_search_ranks_matching_chunks():
+    index = BM25Index()
+    index.add(["a", "b", "c"], ["gradient descent step size", "learning rate schedule", "gradient clipping"])
+    assert _ids(index.search("gradient descent")) == ["a", "c"]
+    assert _ids(index.search("gradient", allowed_ids={"c"})) == ["c"]
+    index.remove(["a"])
+    index.add(["c"], ["cosine schedule"])
+    assert _ids(index.search("gradient")) == []
+    assert sorted(_ids(index.search("schedule"))) == ["b", "c"]
+
+
+def test_snapshot_and_log_round_trip(tmp_path):
+    path = str(tmp_path / "docs.bm25.pkl")
+    index = BM25Index(path)
+    index.add(["a", "b"], ["alpha beta", "beta gamma"])
+    index.save()  # first save writes the snapshot
+    assert os.path.exists(path) and not os.path.exists(path + ".log")
+
+    index.add(["c"], ["gamma delta"])
+    index.remove(["a"])
+    index.add(["b"], ["epsilon"])
+    index.save()
+    assert sum(1 for _ in open(path + ".log")) == 3
+
+    reloaded = BM25Index(path).load()
+    assert len(reloaded) == 2 and "a" not in reloaded
+    assert reloaded.search("gamma") == index.search("gamma")
+    assert _ids(reloaded.search("epsilon")) == ["b"]
+
+
+def test_load_skips_a_partly_written_log_line(tmp_path):
+    path = str(tmp_path / "docs.bm25.pkl")
+    index = BM25Index(path)
+    index.add(["a"], ["alpha"])
+    index.save()
+    index.add(["b"], ["beta"])
+    index.save()
+    with open(path + ".log", "a") as f:
+        f.write('["add", "c", "gam')
+    reloaded = BM25Index(path).load()
+    assert sorted(reloaded._doc_terms) == ["a", "b"]
+
+
+def test_log_is_compacted_into_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25_index, "COMPACT_AFTER", 3)
+    path = str(tmp_path / "docs.bm25.pkl")
+    index = BM25Index(path)
+    index.save()
+    for i in range(4):
+        index.add([f"d{i}"], [f"word{i} shared"])
+        index.save()
+    assert not os.path.exists(path + ".log")
+    reloaded = BM25Index(path).load()
+    assert len(reloaded) == 4 and reloaded._logged == 0
+    assert _ids(reloaded.search("word3")) == ["d3"]
+
+
+def test_load_replaces_state_with_another_writers_changes(tmp_path):
+    path = str(tmp_path / "docs.bm25.pkl")
+    reader = BM25Index(path)
+    reader.add(["a"], ["alpha"])
+    reader.save()
+    writer = BM25Index(path).load()
+    writer.add(["z"], ["zeta"])
+    writer.remove(["a"])
+    writer.save()
+    reader.load()
+    assert _ids(reader.search("zeta")) == ["z"] and "a" not in reader
+
+
+def test_shared_index_reloads_after_another_process_writes(tmp_path):
+    path = str(tmp_path)
+    collection = NumpyClient(path).get_or_create_collection("docs")
+    collection.upsert(ids=["a"], embeddings=np.ones((1, 4)), documents=["alpha"])
+    index = get_lexical_index(collection, path=path)
+    assert _ids(index.search("alpha")) == ["a"]
+
+    # What filldb.py does in its own process: write the snapshot and log, then bump the epoch
+    other = BM25Index(index.path).load()
+    other.add(["z"], ["zeta"])
+    other.save()
+    assert _ids(get_lexical_index(collection, path=path).search("zeta")) == []  # epoch unchanged
+    bump_epoch("docs", path)
+    assert get_lexical_index(collection, path=path) is index
+    assert _ids(index.search("zeta")) == ["z"]
+    forget_lexical_index("docs", path)
@@ -0,0 +1,69 @@
+import random
+import re
+import pytest
+from langchain_core.documents import Document
+from modules.chunking import StructuredTextSplitter, count_tokens
+
+
+def _lecture(seed=0):
+    rng = random.Random(seed)
+    vocabulary = ["tensor", "gradient", "kernel", "cache", "latency", "batch", "model", "layer", "token", "GPU's"]
+
+    def sentence(n):
+        return " ".join(rng.choice(vocabulary) for _ in range(n)).capitalize() + rng.choice(".!?")
+
+    parts = []
+    for chapter in range(3):
+        parts.append(f"# Chapter {chapter}")
+        for section in range(3):
+            parts.append(f"## Section {chapter}.{section}")
+            for _ in range(rng.randint(1, 4)):
+                parts.append(" ".join(sentence(rng.randint(3, 40)) for _ in range(rng.randint(1, 8))))
+    # Unpunctuated run-on text, as flattened PDFs produce, must still be split by words
+    parts.append("**Appendix**")
+    parts.append(" ".join(rng.choice(vocabulary) for _ in range(700)))
+    return "\n\n".join(parts)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(160, 16), (40, 8), (25, 0)])
+def test_chunks_stay_under_the_token_ceiling(chunk_size, chunk_overlap):
+    text = _lecture()
+    chunks = StructuredTextSplitter(chunk_size, chunk_overlap).split_text(text)
+    assert len(chunks) > 1
+    assert max(count_tokens(chunk) for chunk in chunks) <= chunk_size
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_every_word_lands_in_a_chunk(seed):
+    text = _lecture(seed)
+    spans, _ = StructuredTextSplitter(40, 8).split_spans(text)
+    covered = [False] * len(text)
+    for start, end, _ in spans:
+        covered[start:end] = [True] * (end - start)
+    missed = [m.group() for m in re.finditer(r"\S+", text) if not all(covered[m.start():m.end()])]
+    assert missed == []
+    # Spans are in text order and never cut through a word
+    assert [s[0] for s in spans] == sorted(s[0] for s in spans)
+    for start, end, _ in spans:
+        assert (start == 0 or text[start - 1].isspace()) and (end == len(text) or text[end].isspace())
+
+
+def test_chunks_carry_their_header_path():
+    text = "# Intro\n\nShort opening.\n\n## Setup\n\n" + "Install the package first. " * 30
+    spans, end_path = StructuredTextSplitter(40, 8).split_spans(text)
+    assert end_path == ["Intro", "Setup"]
+    assert spans[-1][2] == ["Intro", "Setup"]
+
+
+def test_split_documents_continues_the_header_path_across_pages():
+    pages = [Document(page_content="# Results\n\nFirst page text.", metadata={"source": "a.pdf", "page": 0}),
+             Document(page_content="Second page text.", metadata={"source": "a.pdf", "page": 1}),
+             Document(page_content="Other file text.", metadata={"source": "b.pdf", "page": 0})]
+    chunks = StructuredTextSplitter().split_documents(pages)
+    assert [c.metadata.get("header_path") for c in chunks] == ["Results", "Results", None]
+    assert chunks[1].metadata["start_index"] == 0 and chunks[1].metadata["page"] == 1
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        StructuredTextSplitter(16, 16)
@@ -0,0 +1,65 @@
+import random
+import numpy as np
+from modules.near_duplicates import LSH_BANDS, DuplicateIndex, document_id, minhash, similarity
+
+
+def _transcript(seed, words=600):
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(400)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def _edit(text, share, seed=0):
+    """Replaces share of the words, like a re-uploaded video with a slightly different transcript."""
+    rng = random.Random(seed)
+    words = text.split()
+    for i in rng.sample(range(len(words)), int(len(words) * share)):
+        words[i] = "changed"
+    return " ".join(words)
+
+
+def test_signature_similarity_tracks_jaccard():
+    text = _transcript(0)
+    assert similarity(minhash(text), minhash(text.upper())) == 1.0
+    assert similarity(minhash(text), minhash(_edit(text, 0.01))) > 0.85
+    assert similarity(minhash(text), minhash(_transcript(1))) < 0.1
+
+
+def test_find_returns_the_near_duplicate(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "docs.minhash.sqlite3"))
+    texts = [_transcript(seed) for seed in range(20)]
+    for text in texts:
+        index.add(document_id(text), minhash(text), title=text[:10])
+    assert len(index) == 20
+
+    doc_id, title, score = index.find(minhash(_edit(texts[7], 0.005)))
+    assert doc_id == document_id(texts[7]) and title == texts[7][:10] and score >= 0.9
+    assert index.find(minhash(_transcript(99))) is None
+    assert index.find(minhash(_edit(texts[7], 0.3))) is None
+
+
+def test_remove_and_reopen(tmp_path):
+    path = str(tmp_path / "docs.minhash.sqlite3")
+    index = DuplicateIndex(path)
+    a, b = _transcript(0), _transcript(1)
+    index.add("A", minhash(a))
+    index.add("B", minhash(b))
+    index.add("B", minhash(b))  # re-adding replaces, it does not duplicate band rows
+    index.remove("A")
+    index.close()
+
+    reopened = DuplicateIndex(path)
+    assert len(reopened) == 1
+    assert reopened.find(minhash(a)) is None
+    assert reopened.find(minhash(b))[0] == "B"
+    assert reopened._conn.execute("SELECT COUNT(*) FROM bands").fetchone()[0] == LSH_BANDS
+
+
+def test_backup_copies_the_index(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "a.sqlite3"))
+    signature = minhash(_transcript(3))
+    index.add("D", signature)
+    index.backup(str(tmp_path / "b.sqlite3"))
+    copy = DuplicateIndex(str(tmp_path / "b.sqlite3"))
+    assert copy.find(signature)[0] == "D"
+    assert np.array_equal(minhash(_transcript(3)), signature)
@@ -0,0 +1,65 @@
+import threading
+import numpy as np
+from modules.ring_buffer import AudioRingBuffer
+
+
+def _drain(ring):
+    out = []
+    while len(ring):
+        view = ring.peek()
+        out.append(view.copy())
+        ring.release(len(view))
+    return np.concatenate(out) if out else np.empty(0, np.float32)
+
+
+def test_order_is_kept_across_wraparound():
+    ring = AudioRingBuffer(10)
+    ring.write(np.arange(7))
+    assert ring.peek(4).tolist() == [0, 1, 2, 3]
+    ring.release(4)
+    assert ring.write(np.arange(7, 14)) == 0  # wraps around the end of the array
+    assert len(ring) == 10
+    assert ring.peek().tolist() == [4, 5, 6, 7, 8, 9]  # a view stops at the end of the array
+    assert _drain(ring).tolist() == list(range(4, 14))
+    assert ring.dropped == ring.overflows == 0
+
+
+def test_overflow_drops_the_newest_samples_and_counts_them():
+    ring = AudioRingBuffer(8)
+    assert ring.write(np.arange(6)) == 0
+    assert ring.write(np.arange(6, 11)) == 3
+    assert ring.write(np.arange(11, 13)) == 2
+    assert (ring.dropped, ring.overflows) == (5, 2)
+    assert _drain(ring).tolist() == list(range(8))
+    assert ring.write(np.arange(3)) == 0
+    assert ring.peek().dtype == np.float32
+
+
+def test_threaded_producer_and_consumer_see_one_ordered_stream():
+    ring = AudioRingBuffer(1000)
+    blocks, block_size = 2000, 160
+    done = threading.Event()
+    sent = []
+
+    def produce():
+        # Each block continues a counter, so any lost or reordered sample shows up as a gap
+        for i in range(blocks):
+            block = np.arange(i * block_size, (i + 1) * block_size, dtype=np.float32)
+            dropped = ring.write(block)
+            sent.append(block[:block_size - dropped])
+        done.set()
+
+    received = []
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while not done.is_set() or len(ring):
+        view = ring.peek(300)
+        if len(view):
+            received.append(view.copy())
+            ring.release(len(view))
+    producer.join()
+
+    received, sent = np.concatenate(received), np.concatenate(sent)
+    assert np.array_equal(received, sent)
+    assert ring.dropped == blocks * block_size - len(received)
+    assert (ring.overflows == 0) == (ring.dropped == 0)
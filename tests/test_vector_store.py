@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from modules import vector_store
+from modules.vector_store import NumpyClient
+
+
+@pytest.fixture
+def collection(tmp_path):
+    return NumpyClient(str(tmp_path)).get_or_create_collection("docs", metadata={"hnsw:space": "cosine"})
+
+
+def _unit(rng, n, dim=16):
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_upsert_then_query_finds_each_vector(collection):
+    vectors = _unit(np.random.default_rng(0), 50)
+    ids = [f"c{i}" for i in range(50)]
+    collection.upsert(ids=ids, embeddings=vectors, documents=[f"doc {i}" for i in range(50)],
+                      metadatas=[{"source": "a.pdf" if i % 2 else "b.pdf", "page": i} for i in range(50)])
+    assert collection.count() == 50
+    result = collection.query(query_embeddings=vectors[:3], n_results=2)
+    assert [ids[0] for ids in result["ids"]] == ["c0", "c1", "c2"]
+    assert result["documents"][1][0] == "doc 1"
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-2)
+
+
+def test_upsert_replaces_existing_ids(collection):
+    vectors = _unit(np.random.default_rng(1), 3)
+    collection.upsert(ids=["a", "b", "c"], embeddings=vectors, documents=["a1", "b1", "c1"])
+    collection.upsert(ids=["b"], embeddings=vectors[2:], documents=["b2"])
+    assert collection.count() == 3
+    assert collection.get(ids=["b"])["documents"] == ["b2"]
+    assert set(collection.query(query_embeddings=vectors[2:], n_results=2)["ids"][0]) == {"b", "c"}
+
+
+def test_where_filters_get_and_query(collection):
+    vectors = _unit(np.random.default_rng(2), 20)
+    collection.upsert(ids=[f"c{i}" for i in range(20)], embeddings=vectors,
+                      metadatas=[{"source": "a.pdf" if i < 5 else "b.pdf", "page": i} for i in range(20)])
+    assert collection.get(where={"source": "a.pdf"})["ids"] == [f"c{i}" for i in range(5)]
+    assert collection.get(where={"$and": [{"source": "b.pdf"}, {"page": {"$lt": 7}}]})["ids"] == ["c5", "c6"]
+    result = collection.query(query_embeddings=vectors[10:11], n_results=10, where={"source": "a.pdf"})
+    assert sorted(result["ids"][0]) == [f"c{i}" for i in range(5)]
+
+
+def test_deleted_records_are_not_returned(collection):
+    vectors = _unit(np.random.default_rng(3), 10)
+    collection.upsert(ids=[f"c{i}" for i in range(10)], embeddings=vectors,
+                      metadatas=[{"source": "a.pdf" if i < 4 else "b.pdf"} for i in range(10)])
+    collection.delete(ids=["c5"])
+    collection.delete(where={"source": "a.pdf"})
+    assert collection.count() == 5
+    result = collection.query(query_embeddings=vectors[5:6], n_results=5)
+    assert sorted(result["ids"][0]) == ["c4", "c6", "c7", "c8", "c9"]
+    assert collection.get(ids=["c0", "c5", "c6"])["ids"] == ["c6"]
+
+
+def test_ivf_recall_matches_brute_force(collection):
+    rng = np.random.default_rng(4)
+    centers = _unit(rng, 40, dim=32)
+    vectors = centers[rng.integers(0, 40, 4000)] + 0.3 * rng.normal(size=(4000, 32)).astype(np.float32) / np.sqrt(32)
+    collection.upsert(ids=[f"c{i}" for i in range(4000)], embeddings=vectors)
+    queries = vectors[rng.choice(4000, 50, replace=False)] + 0.05 * rng.normal(size=(50, 32)).astype(np.float32)
+    exact = collection.query(query_embeddings=queries, n_results=10)["ids"]
+    collection.build_ivf()
+    assert collection._meta["ivf_rows"] == 4000
+    approx = collection.query(query_embeddings=queries, n_results=10)["ids"]
+    recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(approx, exact)])
+    assert recall >= 0.9
+
+
+def test_reopen_keeps_records_and_dtype(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "VECTOR_DTYPE", "int8")
+    vectors = _unit(np.random.default_rng(5), 30)
+    client = NumpyClient(str(tmp_path))
+    collection = client.get_or_create_collection("docs")
+    collection.upsert(ids=[f"c{i}" for i in range(30)], embeddings=vectors, documents=[str(i) for i in range(30)])
+    collection.delete(ids=["c0"])
+    collection.close()
+
+    monkeypatch.setattr(vector_store, "VECTOR_DTYPE", "float16")
+    reopened = NumpyClient(str(tmp_path)).get_collection("docs")
+    assert reopened.count() == 29
+    assert reopened.query(query_embeddings=vectors[7:8], n_results=1)["ids"] == [["c7"]]
+    assert reopened.get(ids=["c7"])["documents"] == ["7"]
+    assert [c.name for c in NumpyClient(str(tmp_path)).list_collections()] == ["docs"]